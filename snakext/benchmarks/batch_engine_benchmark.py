@@ -0,0 +1,54 @@
+"""
+Measures the throughput of the batched engine in board-steps per second for
+a growing number of boards, showing how a step scales with N.
+
+Usage: python -m snakext.benchmarks.batch_engine_benchmark [--steps STEPS]
+"""
+import argparse
+import time
+import numpy as np
+from snakext.game.logic import batch_engine
+
+BOARD_COUNTS = (1, 16, 256, 1024, 4096, 16384)
+DEFAULT_STEPS = 200
+# Grid of the default 1280x720 playground
+BENCHMARK_SHAPE = (15, 30)
+ACTION_COUNT = 5
+
+
+def measure(board_count: int, steps: int, seed: int = 0) -> float:
+    """
+    Runs the batched engine with random actions.
+
+    Args:
+        board_count (int): Number of boards stepped in lockstep.
+        steps (int): Number of steps to run.
+        seed (int): Seed of the engine and the actions.
+
+    Returns:
+        float: Board-steps per second.
+    """
+    engine = batch_engine.BatchEngine(board_count, BENCHMARK_SHAPE, seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, ACTION_COUNT, size=(steps, board_count))
+    start = time.perf_counter()
+    for step_actions in actions:
+        engine.step(step_actions)
+    elapsed = time.perf_counter() - start
+    return engine.board_steps / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS)
+    args = parser.parse_args()
+    print(f"{'boards':>8} {'board-steps/s':>16} {'us/step':>10}")
+    for board_count in BOARD_COUNTS:
+        board_steps_per_second = measure(board_count, args.steps)
+        step_time = board_count / board_steps_per_second * 1e6
+        print(f"{board_count:>8} {board_steps_per_second:>16,.0f} "
+              f"{step_time:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Measures the load of the dedicated match server for a growing number of
+concurrent rooms. For every room count a fresh server is started in its own
+process, with one or more worker processes, and two bots per room join it
+from this process, optionally watched by spectators. The bots keep a
+`MatchMirror` of their match and press a random movement key now and then.
+After the run the workers report their moves, how late they were, the most
+deadline misses of a room, the most rooms advanced on one tick, the
+messages skipped for spectators that fell behind, the dropped spectators
+and the CPU time they used, summed over the workers.
+
+Usage: python -m snakext.benchmarks.match_server_benchmark [--seconds SECONDS]
+    [--rooms ROOMS ...] [--spectators SPECTATORS] [--workers WORKERS]
+    [--port PORT]
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import websockets
+from snakext import match_server
+from snakext.communication import match_protocol
+from snakext.game.logic import logic_controller
+
+ROOM_COUNTS = (50, 100, 200, 400)
+DEFAULT_SECONDS = 10.0
+DEFAULT_PORT = 54330
+SUMMED_STATS = ("rooms", "moves", "late_moves", "total_lateness",
+                "spectators", "skipped_frames", "dropped_spectators",
+                "cpu_seconds")
+# Chance that a bot presses a key after an update
+KEY_PROBABILITY = 0.2
+
+
+async def play_bot(uri: str, measuring: asyncio.Event, stop: asyncio.Event,
+                   seed: int, room_ids: set[int]) -> int:
+    """
+    Joins a room and plays random keys until stopped.
+
+    Args:
+        uri (str): Address of the server.
+        measuring (asyncio.Event): Set while the updates are counted.
+        stop (asyncio.Event): Set to end the bot.
+        seed (int): Seed of the keys.
+        room_ids (set[int]): Ids of the joined rooms, the room of the bot
+            is added.
+
+    Returns:
+        int: Number of updates received while measuring.
+    """
+    rng = random.Random(seed)
+    directions = list(logic_controller.MOVEMENT_DIRECTIONS)
+    mirror = match_protocol.MatchMirror()
+    updates = 0
+    async with websockets.connect(uri) as connection:
+        await connection.send(match_protocol.JOIN_REQUEST)
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(connection.recv(), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            if not isinstance(message, bytes):
+                continue
+            mirror.apply(message)
+            room_ids.add(mirror.room_id)
+            if message[0] == match_protocol.UPDATE_TAG:
+                updates += measuring.is_set()
+                if rng.random() < KEY_PROBABILITY:
+                    await connection.send(
+                        match_protocol.encode_input(rng.choice(directions)))
+    return updates
+
+
+async def watch_room(uri: str, measuring: asyncio.Event,
+                     stop: asyncio.Event) -> int:
+    """
+    Watches a room until stopped.
+
+    Args:
+        uri (str): Address of the watched room.
+        measuring (asyncio.Event): Set while the updates are counted.
+        stop (asyncio.Event): Set to end the spectator.
+
+    Returns:
+        int: Number of updates received while measuring.
+    """
+    mirror = match_protocol.MatchMirror()
+    updates = 0
+    async with websockets.connect(uri) as connection:
+        await connection.send(match_protocol.WATCH_REQUEST)
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(connection.recv(), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            if isinstance(message, bytes):
+                mirror.apply(message)
+                updates += (measuring.is_set()
+                            and message[0] == match_protocol.UPDATE_TAG)
+    return updates
+
+
+async def request_stats(uri: str) -> dict[str, float]:
+    async with websockets.connect(uri) as connection:
+        await connection.send(match_protocol.STATS_REQUEST)
+        stats: dict[str, float] = json.loads(await connection.recv())
+        return stats
+
+
+async def request_server_stats(port: int,
+                               worker_count: int) -> dict[str, float]:
+    """
+    Args:
+        port (int): Port of the server.
+        worker_count (int): Number of worker processes of the server.
+
+    Returns:
+        dict[str, float]: Statistics of the server, summed over its workers.
+    """
+    if worker_count == 1:
+        return await request_stats(f"ws://localhost:{port}")
+    worker_stats = await asyncio.gather(*(
+        request_stats(f"ws://localhost:{port + 1 + worker}")
+        for worker in range(worker_count)))
+    stats = {
+        key: sum(worker[key] for worker in worker_stats)
+        for key in SUMMED_STATS
+    }
+    for key in ("max_lateness", "max_room_misses", "max_batch"):
+        stats[key] = max(worker[key] for worker in worker_stats)
+    stats["uptime_seconds"] = max(worker["uptime_seconds"]
+                                  for worker in worker_stats)
+    return stats
+
+
+async def measure(port: int, worker_count: int, room_count: int,
+                  spectator_count: int,
+                  seconds: float) -> tuple[dict[str, float], int]:
+    """
+    Plays two bots per room against the server for a number of seconds.
+
+    Args:
+        port (int): Port of the server.
+        worker_count (int): Number of worker processes of the server.
+        room_count (int): Number of concurrent rooms.
+        spectator_count (int): Number of spectators of every room.
+        seconds (float): Duration of the measurement.
+
+    Returns:
+        tuple[dict[str, float], int]: Change of the server statistics during
+            the measurement and the updates received by all bots and
+            spectators.
+    """
+    measuring = asyncio.Event()
+    stop = asyncio.Event()
+    room_ids: set[int] = set()
+    clients = [
+        asyncio.create_task(
+            play_bot(f"ws://localhost:{port}", measuring, stop, seed,
+                     room_ids))
+        for seed in range(room_count * match_server.PLAYERS_PER_ROOM)
+    ]
+    # Let all rooms fill before measuring
+    await asyncio.sleep(2.0)
+    clients.extend(
+        asyncio.create_task(
+            watch_room(
+                f"ws://localhost:{port}{match_protocol.WATCH_PATH}{room_id}",
+                measuring, stop)) for room_id in room_ids
+        for _ in range(spectator_count))
+    await asyncio.sleep(1.0 if spectator_count else 0.0)
+    before = await request_server_stats(port, worker_count)
+    measuring.set()
+    await asyncio.sleep(seconds)
+    measuring.clear()
+    after = await request_server_stats(port, worker_count)
+    stop.set()
+    updates = sum(await asyncio.gather(*clients))
+    change = {
+        key: after[key] - before[key]
+        for key in ("moves", "late_moves", "total_lateness", "skipped_frames",
+                    "dropped_spectators", "cpu_seconds", "uptime_seconds")
+    }
+    for key in ("rooms", "max_lateness", "max_room_misses", "max_batch",
+                "spectators"):
+        change[key] = after[key]
+    return change, updates
+
+
+def run_server(port: int, worker_count: int, room_count: int,
+               spectator_count: int,
+               seconds: float) -> tuple[dict[str, float], int]:
+    """
+    Starts a server, measures it and stops it.
+
+    Args:
+        port (int): Port of the server.
+        worker_count (int): Number of worker processes of the server.
+        room_count (int): Number of concurrent rooms.
+        spectator_count (int): Number of spectators of every room.
+        seconds (float): Duration of the measurement.
+
+    Returns:
+        tuple[dict[str, float], int]: See `measure`.
+    """
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "snakext.match_server", "--host",
+            "localhost", "--port",
+            str(port), "--workers",
+            str(worker_count)
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        # Every worker reports when it listens
+        for _ in range(worker_count):
+            if server.stdout is not None:
+                server.stdout.readline()
+        return asyncio.run(
+            measure(port, worker_count, room_count, spectator_count,
+                    seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    parser.add_argument("--rooms", type=int, nargs="+", default=ROOM_COUNTS)
+    parser.add_argument("--spectators", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    print(f"{'rooms':>6} {'moves/s':>9} {'late':>6} {'room max':>9} "
+          f"{'batch':>6} {'mean ms':>8} {'max ms':>8} {'viewers':>8} "
+          f"{'skipped':>8} {'dropped':>8} {'cpu %':>6} {'updates/s':>10}")
+    for room_count in args.rooms:
+        change, updates = run_server(args.port, args.workers, room_count,
+                                     args.spectators, args.seconds)
+        moves = max(change["moves"], 1)
+        print(f"{int(change['rooms']):>6} "
+              f"{change['moves'] / change['uptime_seconds']:>9,.0f} "
+              f"{int(change['late_moves']):>6} "
+              f"{int(change['max_room_misses']):>9} "
+              f"{int(change['max_batch']):>6} "
+              f"{change['total_lateness'] / moves * 1e3:>8.2f} "
+              f"{change['max_lateness'] * 1e3:>8.2f} "
+              f"{int(change['spectators']):>8} "
+              f"{int(change['skipped_frames']):>8} "
+              f"{int(change['dropped_spectators']):>8} "
+              f"{change['cpu_seconds'] / change['uptime_seconds'] * 100:>6.1f}"
+              f" {updates / args.seconds:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Compares the encode time, decode time and message size of the wire formats
+of the transmitted state for a delta update of one move and for snapshots of
+snakes of growing length. The old format is the JSON text that was encoded
+twice before it was sent.
+
+Usage: python -m snakext.benchmarks.wire_format_benchmark [--repeats REPEATS]
+"""
+import argparse
+import json
+import time
+from typing import Callable
+from snakext.communication import wire_format
+from snakext.game.state import state
+
+SNAKE_LENGTHS = (3, 30, 300)
+FOOD_COUNT = 1
+DEFAULT_REPEATS = 2000
+
+
+def make_state(snake_length: int) -> state.TransmittedState:
+    """
+    Creates a state of a running game with a snake of the given length.
+
+    Args:
+        snake_length (int): Number of cells of the snake.
+
+    Returns:
+        state.TransmittedState: A snapshot state as sent after a move.
+    """
+    cols = 30
+    return state.TransmittedState(
+        snake_placement=[(index // cols, index % cols)
+                         for index in range(snake_length)],
+        food_placement=[(14, 29)] * FOOD_COUNT,
+        time_sent=time.time(),
+        time_last_communicated=time.time(),
+        sent_handshake=time.time(),
+        game_state=state.GameStates.RUNNING.value,
+        snake_base_tick=-1,
+        snake_tick=snake_length,
+    )
+
+
+def make_delta_state() -> state.TransmittedState:
+    """
+    Returns:
+        state.TransmittedState: A delta state as streamed after a move.
+    """
+    transmitted_state = make_state(0)
+    transmitted_state.snake_base_tick = 9
+    transmitted_state.snake_tick = 10
+    transmitted_state.snake_heads = [(5, 10)]
+    transmitted_state.snake_tails = [(5, 7)]
+    return transmitted_state
+
+
+def _encode_double_json(transmitted_state: state.TransmittedState) -> str:
+    return json.dumps(transmitted_state.to_json())
+
+
+def _decode_double_json(message: str | bytes) -> state.TransmittedState:
+    return state.TransmittedState.from_json(json.loads(message))
+
+
+def measure(
+    encode: Callable[[state.TransmittedState], str | bytes],
+    decode: Callable[[str | bytes], state.TransmittedState],
+    transmitted_state: state.TransmittedState,
+    repeats: int,
+) -> tuple[float, float, int]:
+    """
+    Encodes and decodes a state repeatedly.
+
+    Args:
+        encode (Callable): Encodes a state into a message.
+        decode (Callable): Decodes a state from a message.
+        transmitted_state (state.TransmittedState): The state to send.
+        repeats (int): Number of times to encode and decode.
+
+    Returns:
+        tuple[float, float, int]: Encode and decode time in microseconds,
+            and the size of the message in bytes.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        message = encode(transmitted_state)
+    encode_time = (time.perf_counter() - start) / repeats * 1e6
+    start = time.perf_counter()
+    for _ in range(repeats):
+        decode(message)
+    decode_time = (time.perf_counter() - start) / repeats * 1e6
+    size = len(message.encode() if isinstance(message, str) else message)
+    return encode_time, decode_time, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    args = parser.parse_args()
+    formats: dict[str, tuple[Callable[[state.TransmittedState], str | bytes],
+                             Callable[[str | bytes],
+                                      state.TransmittedState]]] = {
+        "double json": (_encode_double_json, _decode_double_json),
+        wire_format.WIRE_FORMAT_JSON: (
+            lambda transmitted_state: wire_format.encode(
+                transmitted_state, wire_format.WIRE_FORMAT_JSON),
+            wire_format.decode,
+        ),
+        wire_format.WIRE_FORMAT_BINARY: (wire_format.encode_binary,
+                                         wire_format.decode),
+    }
+    states = {"delta": make_delta_state()}
+    for snake_length in SNAKE_LENGTHS:
+        states[f"snake {snake_length}"] = make_state(snake_length)
+    print(f"{'state':>10} {'format':>12} {'encode us':>10} "
+          f"{'decode us':>10} {'bytes':>8}")
+    for state_name, transmitted_state in states.items():
+        for name, (encode, decode) in formats.items():
+            encode_time, decode_time, size = measure(encode, decode,
+                                                     transmitted_state,
+                                                     args.repeats)
+            print(f"{state_name:>10} {name:>12} {encode_time:>10.1f} "
+                  f"{decode_time:>10.1f} {size:>8}")
+
+
+if __name__ == "__main__":
+    main()
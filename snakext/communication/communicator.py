@@ -2,12 +2,31 @@
 Communicates with other peers for multiplayer in a gaming environment. This module 
 contains functions and coroutines for setting up and handling server-client 
 communications using WebSockets, enabling real-time interaction in a multiplayer game.
+
+Three synchronization modes are supported. In the streaming mode the client
+sends a single stream request and the server then pushes the local state as
+soon as the game signals a move with `push_local_state`, so the remote snake
+arrives half a round trip after the move. Streamed states carry the snake as
+deltas of the `snake_delta` protocol. The pushed updates go through a
+`send_queue` that keeps only the newest state and merges the deltas that
+wait for the socket, so a slow peer gets fewer, larger updates instead of a
+backlog. In the polling mode the client
+requests the state `PINGS_PER_SECOND` times a second. In the lockstep mode
+the server sends its seed, then the movement keys of the local snake as soon
+as the game queues them, and the state without the snake only as a
+keepalive, see `lockstep`.
+
+Before either mode the client negotiates the encoding of the states, see
+`wire_format`.
 """
 import websockets
 import asyncio
 import time
-import json
+import dataclasses
+import functools
 from typing import Awaitable, Callable, Coroutine, Any
+from snakext.communication import (snake_delta, wire_format, lockstep,
+                                   send_queue)
 from snakext.game.state import state
 from snakext.utils import arg_parser
 
@@ -20,6 +39,17 @@ PINGS_PER_SECOND = 3
 PING_PERIOD = 1 / PINGS_PER_SECOND
 PING_WAIT_PERIOD = 0.02
 CONNECTION_ATTEMPT_PERIOD = 1
+# The state is pushed at least this often in the streaming mode, also
+# without moves, e.g. before the game starts
+STREAM_KEEPALIVE_PERIOD = 0.5
+STREAM_REQUEST = "stream"
+LOCKSTEP_REQUEST = "lockstep"
+SYNC_MODE_STREAM = "stream"
+SYNC_MODE_POLL = "poll"
+SYNC_MODE_LOCKSTEP = "lockstep"
+# Bytes buffered by a connection before a send waits for the socket, kept
+# small so that waiting states are merged instead of buffered
+SEND_BUFFER_LIMIT = 4096
 
 handshake_sent = False
 time_received_handshake = 0
@@ -28,6 +58,20 @@ current_time = 0.0
 local_ping_count = 0
 remote_ping_count = 0
 
+_push_loop: asyncio.AbstractEventLoop | None = None
+_state_pushed: asyncio.Event | None = None
+# Streamed states of all connections, printed by the game with --send-stats
+send_stats = send_queue.SendQueueStats()
+
+
+def push_local_state() -> None:
+    """
+    Makes the streaming server send the local state now. Safe to call from
+    the game thread.
+    """
+    if _push_loop is not None and _state_pushed is not None:
+        _push_loop.call_soon_threadsafe(_state_pushed.set)
+
 
 def make_server_task(
     future: asyncio.Future[int],
@@ -128,6 +172,7 @@ async def _start_server(
         _handle_request,
         arg_parser.LOCAL_SERVER_IP,
         arg_parser.LOCAL_SERVER_PORT,
+        write_limit=SEND_BUFFER_LIMIT,
     )
     print(START_SERVER_SUCCESS)
     return start_server
@@ -159,7 +204,14 @@ async def _receive_state(
                     f"ws://{arg_parser.REMOTE_SERVER_IP}:{arg_parser.REMOTE_SERVER_PORT}"
             ) as websocket:
                 print(CONNECTED_MESSAGE)
-                await _communicate_remote_state(
+                await _negotiate_wire_format(websocket)
+                if arg_parser.SYNC_MODE == SYNC_MODE_STREAM:
+                    communicate = _receive_remote_state_stream
+                elif arg_parser.SYNC_MODE == SYNC_MODE_LOCKSTEP:
+                    communicate = _receive_lockstep_inputs
+                else:
+                    communicate = _communicate_remote_state
+                await communicate(
                     websocket,
                     remote_state,
                     local_state,
@@ -200,7 +252,9 @@ async def _respond_to_message_with_transmission_state(
     Responds to messages from the client with the current game state.
 
     This coroutine is called by the server to handle incoming client messages and respond
-    with the latest game state.
+    with the latest game state. A wire format request chooses the encoding of
+    the states, and a stream or lockstep request switches the connection to
+    the streaming or lockstep mode.
 
     Args:
         websocket (websockets.WebSocketServerProtocol): The WebSocket connection object.
@@ -210,33 +264,230 @@ async def _respond_to_message_with_transmission_state(
     Returns:
         None
     """
-    global remote_ping_count, handshake_sent
+    wire_format_name = wire_format.WIRE_FORMAT_JSON
     async for message in websocket:
-        local_transmission_state.time_sent = time.time()
-        local_transmission_state.is_handshake = True if not handshake_sent else False
-        response = json.dumps(local_transmission_state.to_json())
-        remote_ping_count += 1
-        if future.done():
+        if wire_format.is_request(message):
+            wire_format_name = wire_format.choose(str(message),
+                                                  _supported_wire_formats())
+            await websocket.send(wire_format.make_request((wire_format_name, )))
+            continue
+        if message == STREAM_REQUEST:
+            await _stream_transmission_state(websocket,
+                                             local_transmission_state, future,
+                                             wire_format_name)
+            return
+        if message == LOCKSTEP_REQUEST:
+            await _stream_lockstep_inputs(websocket, local_transmission_state,
+                                          future, wire_format_name)
+            return
+        if not await _send_transmission_state(
+                websocket, local_transmission_state, future,
+                wire_format_name=wire_format_name):
+            return
+
+
+async def _stream_transmission_state(
+    websocket: websockets.WebSocketServerProtocol,
+    local_transmission_state: state.TransmittedState,
+    future: asyncio.Future[int],
+    wire_format_name: str = wire_format.WIRE_FORMAT_JSON,
+) -> None:
+    """
+    Pushes the game state to the client whenever the game signals a move,
+    and at least every `STREAM_KEEPALIVE_PERIOD` seconds. The snake updates
+    are queued without waiting for the socket and sent as fast as the
+    socket accepts them, merged while they wait.
+
+    Args:
+        websocket (websockets.WebSocketServerProtocol): The WebSocket connection object.
+        local_transmission_state (state.TransmittedState): The local game state to be transmitted.
+        future (asyncio.Future[int]): A future object representing the game's completion status.
+        wire_format_name (str): Encoding of the states on this connection.
+
+    Returns:
+        None
+    """
+    global _push_loop, _state_pushed
+    _push_loop = asyncio.get_running_loop()
+    _state_pushed = asyncio.Event()
+    state_pushed = _state_pushed
+    updates: send_queue.LatestOnlyQueue[snake_delta.SnakeUpdate] = (
+        send_queue.LatestOnlyQueue(
+            functools.partial(snake_delta.merge_updates,
+                              snake_log=snake_delta.local_snake_log),
+            send_stats))
+    # The first state of a connection carries a snapshot of the snake
+    last_queued_tick: int | None = None
+
+    async def _receive_resync_requests() -> None:
+        nonlocal last_queued_tick
+        async for message in websocket:
+            if message == snake_delta.RESYNC_REQUEST:
+                last_queued_tick = None
+                state_pushed.set()
+
+    async def _queue_pushed_updates() -> None:
+        nonlocal last_queued_tick
+        while True:
+            snake_update = None
+            if last_queued_tick is not None:
+                snake_update = snake_delta.local_snake_log.since(
+                    last_queued_tick)
+            if snake_update is None:
+                snake_update = snake_delta.local_snake_log.snapshot()
+            updates.put(snake_update)
+            last_queued_tick = snake_update.tick
             try:
-                await websocket.close_connection()
-            except websockets.exceptions.ConnectionClosedError:
+                await asyncio.wait_for(state_pushed.wait(),
+                                       STREAM_KEEPALIVE_PERIOD)
+            except asyncio.TimeoutError:
                 pass
-            break
+            state_pushed.clear()
+
+    receive_task = asyncio.create_task(_receive_resync_requests())
+    queue_task = asyncio.create_task(_queue_pushed_updates())
+    try:
+        while await _send_transmission_state(websocket,
+                                             local_transmission_state, future,
+                                             await updates.get(),
+                                             wire_format_name):
+            pass
+    finally:
+        receive_task.cancel()
+        queue_task.cancel()
+
+
+async def _stream_lockstep_inputs(
+    websocket: websockets.WebSocketServerProtocol,
+    local_transmission_state: state.TransmittedState,
+    future: asyncio.Future[int],
+    wire_format_name: str = wire_format.WIRE_FORMAT_JSON,
+) -> None:
+    """
+    Sends the seed of the local peer, then the movement keys of the local
+    snake whenever the game queues them. The state, which carries neither
+    snake nor food in the lockstep mode, is sent first and then every
+    `STREAM_KEEPALIVE_PERIOD` seconds for the handshake and the end of the
+    game.
+
+    Args:
+        websocket (websockets.WebSocketServerProtocol): The WebSocket connection object.
+        local_transmission_state (state.TransmittedState): The local game state to be transmitted.
+        future (asyncio.Future[int]): A future object representing the game's completion status.
+        wire_format_name (str): Encoding of the states on this connection.
+
+    Returns:
+        None
+    """
+    global _push_loop, _state_pushed
+    _push_loop = asyncio.get_running_loop()
+    _state_pushed = asyncio.Event()
+    state_pushed = _state_pushed
+    if not await _send_message(
+            websocket,
+            lockstep.encode_seed(lockstep.input_exchange.local_seed), future):
+        return
+    is_state_due = True
+    while True:
+        for move, movement_key in lockstep.input_exchange.take_outgoing():
+            if not await _send_message(
+                    websocket, lockstep.encode_input(move, movement_key),
+                    future):
+                return
+        if is_state_due and not await _send_transmission_state(
+                websocket,
+                local_transmission_state,
+                future,
+                wire_format_name=wire_format_name):
+            return
         try:
-            await websocket.send(response)
-        except websockets.exceptions.ConnectionClosedError:
-            print(CONNECTION_CLOSED_MESSAGE)
-            future.set_result(0)
-            break
-        # Determines who is the host
-        if not handshake_sent:
-            handshake_sent = True
-            local_transmission_state.sent_handshake = time.time()
-        local_transmission_state.time_last_communicated = time.time()
-        if local_transmission_state.game_state == state.GameStates.STOPPED.value:
+            await asyncio.wait_for(state_pushed.wait(),
+                                   STREAM_KEEPALIVE_PERIOD)
+            is_state_due = (local_transmission_state.game_state ==
+                            state.GameStates.STOPPED.value)
+        except asyncio.TimeoutError:
+            is_state_due = True
+        state_pushed.clear()
+
+
+async def _send_message(
+    websocket: websockets.WebSocketServerProtocol,
+    message: str | bytes,
+    future: asyncio.Future[int],
+) -> bool:
+    """
+    Sends a message that is not a state to the client.
+
+    Args:
+        websocket (websockets.WebSocketServerProtocol): The WebSocket connection object.
+        message (str | bytes): The message.
+        future (asyncio.Future[int]): A future object representing the game's completion status.
+
+    Returns:
+        bool: False if the connection was closed.
+    """
+    try:
+        await websocket.send(message)
+    except websockets.exceptions.ConnectionClosedError:
+        print(CONNECTION_CLOSED_MESSAGE)
+        if not future.done():
             future.set_result(0)
+        return False
+    return True
+
+
+async def _send_transmission_state(
+    websocket: websockets.WebSocketServerProtocol,
+    local_transmission_state: state.TransmittedState,
+    future: asyncio.Future[int],
+    snake_update: snake_delta.SnakeUpdate | None = None,
+    wire_format_name: str = wire_format.WIRE_FORMAT_JSON,
+) -> bool:
+    """
+    Sends the current game state to the client.
+
+    Args:
+        websocket (websockets.WebSocketServerProtocol): The WebSocket connection object.
+        local_transmission_state (state.TransmittedState): The local game state to be transmitted.
+        future (asyncio.Future[int]): A future object representing the game's completion status.
+        snake_update (snake_delta.SnakeUpdate | None): Update of the snake to
+            send instead of all of its coordinates.
+        wire_format_name (str): Encoding of the states on this connection.
+
+    Returns:
+        bool: False if the connection was closed or the game ended.
+    """
+    global remote_ping_count, handshake_sent
+    local_transmission_state.time_sent = time.time()
+    local_transmission_state.is_handshake = True if not handshake_sent else False
+    sent_state = local_transmission_state
+    if snake_update is not None:
+        sent_state = dataclasses.replace(local_transmission_state)
+        snake_delta.write_update(snake_update, sent_state)
+    response = wire_format.encode(sent_state, wire_format_name)
+    remote_ping_count += 1
+    if future.done():
+        try:
             await websocket.close_connection()
-            return
+        except websockets.exceptions.ConnectionClosedError:
+            pass
+        return False
+    try:
+        await websocket.send(response)
+    except websockets.exceptions.ConnectionClosedError:
+        print(CONNECTION_CLOSED_MESSAGE)
+        future.set_result(0)
+        return False
+    # Determines who is the host
+    if not handshake_sent:
+        handshake_sent = True
+        local_transmission_state.sent_handshake = time.time()
+    local_transmission_state.time_last_communicated = time.time()
+    if local_transmission_state.game_state == state.GameStates.STOPPED.value:
+        future.set_result(0)
+        await websocket.close_connection()
+        return False
+    return True
 
 
 def _is_ping(current_time: float) -> bool:
@@ -274,25 +525,62 @@ def _register_ping() -> tuple[int, float]:
     return local_ping_count - 1, current_time
 
 
+def _supported_wire_formats() -> tuple[str, ...]:
+    """
+    Returns:
+        tuple[str, ...]: Wire formats in order of preference, only JSON if
+            it is forced by the arguments.
+    """
+    if arg_parser.WIRE_FORMAT == wire_format.WIRE_FORMAT_JSON:
+        return (wire_format.WIRE_FORMAT_JSON, )
+    return wire_format.WIRE_FORMATS
+
+
+async def _negotiate_wire_format(
+        websocket: websockets.WebSocketClientProtocol) -> str:
+    """
+    Offers the supported wire formats to the server. Received states are
+    decoded by the type of their frames, so the client only needs to make
+    the offer.
+
+    Args:
+        websocket (websockets.WebSocketClientProtocol): The WebSocket connection object.
+
+    Returns:
+        str: The wire format chosen by the server.
+    """
+    await websocket.send(wire_format.make_request(_supported_wire_formats()))
+    return wire_format.read_response(await websocket.recv())
+
+
 def _update_remote_state(
     response: str | bytes,
     remote_state: state.TransmittedState,
     local_state: state.TransmittedState,
+    receive_snake: bool = True,
 ) -> state.TransmittedState:
     """
-    Calculates the position in the middle-right part of the matrix.
+    Decodes a state received from the server and updates the remote state.
 
     Args:
-        matrix (state_types.OBJECT_ND_ARRAY): The matrix to calculate the position for.
+        response (str | bytes): The received message of any wire format.
+        remote_state (state.TransmittedState): The remote game state instance.
+        local_state (state.TransmittedState): The local game state instance.
+        receive_snake (bool): Whether to pass the snake to the mirror of the
+            remote snake, False in the lockstep mode.
 
     Returns:
-        tuple[int, int]: The middle-right position in the matrix.
+        state.TransmittedState: The received state.
     """
-    initial_load = json.loads(response)
-    received_remote_state = state.TransmittedState.from_json(initial_load)
-    remote_state.snake_placement = received_remote_state.snake_placement
+    received_remote_state = wire_format.decode(response)
+    if receive_snake:
+        snake_update = snake_delta.read_update(received_remote_state)
+        snake_delta.remote_snake_mirror.receive(snake_update)
+        if snake_update.is_snapshot:
+            remote_state.snake_placement = received_remote_state.snake_placement
     remote_state.food_placement = received_remote_state.food_placement
     remote_state.sent_handshake = received_remote_state.sent_handshake
+    remote_state.time_sent = received_remote_state.time_sent
     remote_state.time_last_communicated = time.time()
     return received_remote_state
 
@@ -349,3 +637,89 @@ async def _communicate_remote_state(
             future.set_result(0)
             await websocket.close_connection()
             break
+
+
+async def _receive_remote_state_stream(
+    websocket: websockets.WebSocketClientProtocol,
+    remote_state: state.TransmittedState,
+    local_state: state.TransmittedState,
+    future: asyncio.Future[int],
+) -> None:
+    """
+    Requests the streaming mode from the server and applies every state the
+    server pushes.
+
+    Args:
+        websocket (websockets.WebSocketClientProtocol): The WebSocket connection object.
+        remote_state (state.TransmittedState): The remote game state instance.
+        local_state (state.TransmittedState): The local game state instance.
+        future (asyncio.Future[int]): A future object representing the game's completion status.
+
+    Returns:
+        None
+    """
+    try:
+        await websocket.send(STREAM_REQUEST)
+        async for response in websocket:
+            if future.done():
+                await websocket.close_connection()
+                return
+            received_remote_state = _update_remote_state(
+                response,
+                remote_state,
+                local_state,
+            )
+            if (received_remote_state.game_state ==
+                    state.GameStates.STOPPED.value):
+                future.set_result(0)
+                await websocket.close_connection()
+                return
+            if snake_delta.remote_snake_mirror.take_resync_request():
+                await websocket.send(snake_delta.RESYNC_REQUEST)
+    except websockets.exceptions.ConnectionClosedError:
+        print(CONNECTION_CLOSED_MESSAGE)
+        future.set_result(0)
+
+
+async def _receive_lockstep_inputs(
+    websocket: websockets.WebSocketClientProtocol,
+    remote_state: state.TransmittedState,
+    local_state: state.TransmittedState,
+    future: asyncio.Future[int],
+) -> None:
+    """
+    Requests the lockstep mode from the server and stores the seed and the
+    movement keys of the remote snake it sends.
+
+    Args:
+        websocket (websockets.WebSocketClientProtocol): The WebSocket connection object.
+        remote_state (state.TransmittedState): The remote game state instance.
+        local_state (state.TransmittedState): The local game state instance.
+        future (asyncio.Future[int]): A future object representing the game's completion status.
+
+    Returns:
+        None
+    """
+    try:
+        await websocket.send(LOCKSTEP_REQUEST)
+        async for message in websocket:
+            if future.done():
+                await websocket.close_connection()
+                return
+            if isinstance(message, bytes) and lockstep.is_message(message):
+                lockstep.input_exchange.receive(message)
+                continue
+            received_remote_state = _update_remote_state(
+                message,
+                remote_state,
+                local_state,
+                receive_snake=False,
+            )
+            if (received_remote_state.game_state ==
+                    state.GameStates.STOPPED.value):
+                future.set_result(0)
+                await websocket.close_connection()
+                return
+    except websockets.exceptions.ConnectionClosedError:
+        print(CONNECTION_CLOSED_MESSAGE)
+        future.set_result(0)
@@ -0,0 +1,173 @@
+"""
+Input exchange of the lockstep multiplayer mode. Both peers simulate both
+snakes and the food on a `SnakeEngine` seeded with the seed of the host, so
+only the movement key of every move has to be sent, and the food and the
+collisions are the same on both screens.
+
+A movement key pressed before move `n` is applied on move
+`n + INPUT_DELAY_MOVES`, which gives it one move to reach the other peer
+before the other peer needs it. A peer that does not have the key of the
+other peer for a move yet waits for it instead of moving.
+
+Messages are binary websocket frames starting with a tag that is not a
+version of the binary wire format:
+    seed     tag, seed of the sending peer
+    input    tag, move, movement key
+"""
+from __future__ import annotations
+import random
+import struct
+import threading
+from snakext.game.logic import turn_buffer
+
+INPUT_DELAY_MOVES = 1
+SEED_BITS = 32
+SEED_TAG = 0x81
+INPUT_TAG = 0x82
+SEED_MESSAGE = struct.Struct(">BI")
+INPUT_MESSAGE = struct.Struct(">BIB")
+LOCKSTEP_TAGS = (SEED_TAG, INPUT_TAG)
+
+UNKNOWN_MESSAGE = "Unknown lockstep message"
+
+
+def encode_seed(seed: int) -> bytes:
+    return SEED_MESSAGE.pack(SEED_TAG, seed)
+
+
+def encode_input(move: int, movement_key: int) -> bytes:
+    return INPUT_MESSAGE.pack(INPUT_TAG, move, movement_key)
+
+
+def is_message(message: bytes) -> bool:
+    return len(message) > 0 and message[0] in LOCKSTEP_TAGS
+
+
+class InputExchange:
+    """
+    Movement keys of both snakes by move, written by the game thread for the
+    local snake and by the network code for the remote snake.
+    """
+
+    def __init__(self, input_delay: int = INPUT_DELAY_MOVES) -> None:
+        self._lock = threading.Lock()
+        self.input_delay = input_delay
+        self.local_seed = random.getrandbits(SEED_BITS)
+        self.remote_seed: int | None = None
+        self._local_keys: dict[int, int] = {}
+        self._remote_keys: dict[int, int] = {}
+        self._outgoing: list[tuple[int, int]] = []
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets all movement keys. The first moves, for which no key could
+        have been sent yet, keep the direction of both snakes.
+        """
+        with self._lock:
+            self._local_keys = {
+                move: turn_buffer.NO_TURN
+                for move in range(self.input_delay)
+            }
+            self._remote_keys = dict(self._local_keys)
+            self._outgoing = []
+
+    def agreed_seed(self, is_host: bool) -> int:
+        """
+        Args:
+            is_host (bool): Whether the local peer is the host.
+
+        Returns:
+            int: The seed of the host.
+
+        Raises:
+            ValueError: If the seed of the other peer was not received.
+        """
+        if is_host:
+            return self.local_seed
+        if self.remote_seed is None:
+            raise ValueError("Seed of the host was not received")
+        return self.remote_seed
+
+    def queue_local_key(self, move: int, movement_key: int) -> None:
+        """
+        Schedules a key of the local snake `input_delay` moves ahead and
+        queues it for sending.
+
+        Args:
+            move (int): The current move.
+            movement_key (int): The key, `turn_buffer.NO_TURN` for none.
+        """
+        with self._lock:
+            scheduled_move = move + self.input_delay
+            self._local_keys[scheduled_move] = movement_key
+            self._outgoing.append((scheduled_move, movement_key))
+
+    def pending_direction(self, move: int, direction: int) -> int:
+        """
+        Returns the direction the local snake will move in once the keys
+        scheduled from the move on are applied.
+
+        Args:
+            move (int): The current move.
+            direction (int): The current direction of the local snake.
+
+        Returns:
+            int: The direction after the scheduled keys.
+        """
+        with self._lock:
+            for scheduled_move in sorted(self._local_keys):
+                movement_key = self._local_keys[scheduled_move]
+                if (scheduled_move >= move
+                        and movement_key != turn_buffer.NO_TURN):
+                    direction = movement_key
+        return direction
+
+    def take_outgoing(self) -> list[tuple[int, int]]:
+        with self._lock:
+            outgoing, self._outgoing = self._outgoing, []
+            return outgoing
+
+    def receive(self, message: bytes) -> None:
+        """
+        Stores a seed or a movement key received from the other peer.
+
+        Args:
+            message (bytes): The lockstep message.
+
+        Raises:
+            ValueError: If the message is not a lockstep message.
+        """
+        if message[0] == SEED_TAG:
+            _, self.remote_seed = SEED_MESSAGE.unpack(message)
+        elif message[0] == INPUT_TAG:
+            _, move, movement_key = INPUT_MESSAGE.unpack(message)
+            with self._lock:
+                self._remote_keys[move] = movement_key
+        else:
+            raise ValueError(UNKNOWN_MESSAGE)
+
+    def has_remote_key(self, move: int) -> bool:
+        with self._lock:
+            return move in self._remote_keys
+
+    def movement_keys(self, move: int, local_index: int) -> list[int]:
+        """
+        Takes the keys of both snakes for a move.
+
+        Args:
+            move (int): The move to make.
+            local_index (int): Index of the local snake in the engine.
+
+        Returns:
+            list[int]: Movement key of every snake of the engine.
+        """
+        with self._lock:
+            local_key = self._local_keys.pop(move, turn_buffer.NO_TURN)
+            remote_key = self._remote_keys.pop(move)
+        movement_keys = [remote_key, remote_key]
+        movement_keys[local_index] = local_key
+        return movement_keys
+
+
+input_exchange = InputExchange()
@@ -0,0 +1,259 @@
+"""
+Protocol between the dedicated match server and its players. The server
+simulates every match on a `SnakeEngine` and is the authority for the food
+and the collisions, the players only send their movement keys.
+
+A player joins with a `JOIN_REQUEST`, optionally naming a private room, and
+is assigned to a room. Once the room is full the server sends the start of
+the match, and then an update after every move. Updates carry the new heads
+and the food, so their size does not depend on the length of the snakes.
+`STATS_REQUEST` returns the load of the server as JSON text.
+
+A spectator attaches to the room of a running match with a `WATCH_REQUEST`
+and the id of the room, or by connecting to the path `WATCH_PATH` followed
+by the id. It is assigned to the room as `SPECTATOR_INDEX` and receives the
+same messages as the players, starting with a start message of the current
+state of the match. A spectator that fell behind receives a start message
+of the current state again instead of the updates it missed.
+
+Messages of the server are binary websocket frames (big-endian):
+    assigned  tag, room, player index, rows, cols
+    start     tag, tick, snake count, per snake: direction, length,
+              (row, col) from tail to head; food count, (row, col) of food
+    update    tag, tick, flags, snake count, per snake: status, direction,
+              (row, col) of the head; food count, (row, col) of food
+Messages of the players:
+    input     tag, movement key
+"""
+from __future__ import annotations
+import struct
+from snakext.game.logic import engine, logic_controller
+from snakext.game.state import board, snake_body, free_cells
+
+JOIN_REQUEST = "join"
+STATS_REQUEST = "stats"
+WATCH_REQUEST = "watch"
+WATCH_PATH = "/watch/"
+SPECTATOR_INDEX = 0xFF
+
+ASSIGNED_TAG = 0x90
+START_TAG = 0x91
+UPDATE_TAG = 0x92
+INPUT_TAG = 0x93
+
+ASSIGNED_MESSAGE = struct.Struct(">BIBHH")
+START_HEADER = struct.Struct(">BIB")
+UPDATE_HEADER = struct.Struct(">BIBB")
+INPUT_MESSAGE = struct.Struct(">BB")
+SNAKE_HEADER = struct.Struct(">BH")
+SNAKE_UPDATE = struct.Struct(">BBHH")
+COUNT = struct.Struct(">B")
+COORDINATES = struct.Struct(">HH")
+
+# Flags of an update
+GAME_OVER_FLAG = 0x01
+# Status of a snake in an update
+ALIVE_STATUS = 0x01
+MOVED_STATUS = 0x02
+DROPPED_TAIL_STATUS = 0x04
+
+UNKNOWN_MESSAGE = "Unknown match message"
+UNKNOWN_MOVEMENT_KEY_MESSAGE = "Unknown movement key {}"
+
+
+def encode_assigned(room_id: int, player_index: int,
+                    shape: tuple[int, int]) -> bytes:
+    return ASSIGNED_MESSAGE.pack(ASSIGNED_TAG, room_id, player_index, *shape)
+
+
+def encode_input(movement_key: int) -> bytes:
+    return INPUT_MESSAGE.pack(INPUT_TAG, movement_key)
+
+
+def decode_input(message: bytes) -> int:
+    """
+    Args:
+        message (bytes): An input message.
+
+    Returns:
+        int: The movement key, 0 or one of the movement directions.
+
+    Raises:
+        ValueError: If the message is not an input message or its key is
+            not a movement key.
+    """
+    if len(message) != INPUT_MESSAGE.size or message[0] != INPUT_TAG:
+        raise ValueError(UNKNOWN_MESSAGE)
+    movement_key = message[1]
+    if (movement_key != 0
+            and movement_key not in logic_controller.MOVEMENT_DIRECTIONS):
+        raise ValueError(UNKNOWN_MOVEMENT_KEY_MESSAGE.format(movement_key))
+    return movement_key
+
+
+def encode_start(engine_instance: engine.SnakeEngine) -> bytes:
+    """
+    Encodes the whole state of a match.
+
+    Args:
+        engine_instance (engine.SnakeEngine): The engine of the match.
+
+    Returns:
+        bytes: The start message.
+    """
+    chunks = [
+        START_HEADER.pack(START_TAG, engine_instance.tick_count,
+                          len(engine_instance.snakes))
+    ]
+    for direction, snake in zip(engine_instance.directions,
+                                engine_instance.snakes):
+        chunks.append(SNAKE_HEADER.pack(direction, len(snake)))
+        chunks.extend(
+            COORDINATES.pack(*coords) for coords in snake.segments)
+    chunks.append(_encode_food(engine_instance))
+    return b"".join(chunks)
+
+
+def encode_update(
+    engine_instance: engine.SnakeEngine,
+    moved: list[bool],
+    dropped_tails: list[bool],
+    game_over: bool,
+) -> bytes:
+    """
+    Encodes the result of a step of a match.
+
+    Args:
+        engine_instance (engine.SnakeEngine): The engine after the step.
+        moved (list[bool]): Whether every snake moved.
+        dropped_tails (list[bool]): Whether every snake dropped its tail.
+        game_over (bool): Whether the match is over.
+
+    Returns:
+        bytes: The update message.
+    """
+    flags = GAME_OVER_FLAG if game_over else 0
+    chunks = [
+        UPDATE_HEADER.pack(UPDATE_TAG, engine_instance.tick_count, flags,
+                           len(engine_instance.snakes))
+    ]
+    for index, snake in enumerate(engine_instance.snakes):
+        status = ((ALIVE_STATUS if engine_instance.alive[index] else 0) |
+                  (MOVED_STATUS if moved[index] else 0) |
+                  (DROPPED_TAIL_STATUS if dropped_tails[index] else 0))
+        chunks.append(
+            SNAKE_UPDATE.pack(status, engine_instance.directions[index],
+                              *snake.head))
+    chunks.append(_encode_food(engine_instance))
+    return b"".join(chunks)
+
+
+def is_game_over(message: bytes) -> bool:
+    return (message[0] == UPDATE_TAG
+            and bool(UPDATE_HEADER.unpack_from(message)[2] & GAME_OVER_FLAG))
+
+
+class MatchMirror:
+    """
+    The match as seen by a player, kept on an engine that is never stepped,
+    so the bot policies can look at it like at their own engine.
+    """
+
+    def __init__(self) -> None:
+        self.room_id = -1
+        self.player_index = -1
+        self.engine: engine.SnakeEngine | None = None
+        self.game_over = False
+
+    def apply(self, message: bytes) -> None:
+        """
+        Applies a message of the server.
+
+        Args:
+            message (bytes): The message.
+
+        Raises:
+            ValueError: If the message is unknown or comes before the
+                assignment to a room.
+        """
+        tag = message[0]
+        if tag == ASSIGNED_TAG:
+            _, self.room_id, self.player_index, rows, cols = (
+                ASSIGNED_MESSAGE.unpack(message))
+            self.engine = _make_mirror_engine((rows, cols))
+        elif self.engine is None:
+            raise ValueError(UNKNOWN_MESSAGE)
+        elif tag == START_TAG:
+            self._apply_start(self.engine, message)
+        elif tag == UPDATE_TAG:
+            self._apply_update(self.engine, message)
+        else:
+            raise ValueError(UNKNOWN_MESSAGE)
+
+    def _apply_start(self, engine_instance: engine.SnakeEngine,
+                     message: bytes) -> None:
+        _, tick, snake_count = START_HEADER.unpack_from(message)
+        offset = START_HEADER.size
+        for index in range(snake_count):
+            direction, length = SNAKE_HEADER.unpack_from(message, offset)
+            offset += SNAKE_HEADER.size
+            snake = engine_instance.snakes[index]
+            while len(snake) > 0:
+                snake.pop_tail()
+            for _ in range(length):
+                snake.push_head(COORDINATES.unpack_from(message, offset))
+                offset += COORDINATES.size
+            engine_instance.directions[index] = direction
+            engine_instance.alive[index] = True
+        _apply_food(engine_instance, message, offset)
+        engine_instance.tick_count = tick
+        self.game_over = False
+
+    def _apply_update(self, engine_instance: engine.SnakeEngine,
+                      message: bytes) -> None:
+        _, tick, flags, snake_count = UPDATE_HEADER.unpack_from(message)
+        offset = UPDATE_HEADER.size
+        for index in range(snake_count):
+            status, direction, head_i, head_k = SNAKE_UPDATE.unpack_from(
+                message, offset)
+            offset += SNAKE_UPDATE.size
+            snake = engine_instance.snakes[index]
+            if status & MOVED_STATUS:
+                snake.push_head((head_i, head_k))
+                if status & DROPPED_TAIL_STATUS:
+                    snake.pop_tail()
+            engine_instance.directions[index] = direction
+            engine_instance.alive[index] = bool(status & ALIVE_STATUS)
+        _apply_food(engine_instance, message, offset)
+        engine_instance.tick_count = tick
+        self.game_over = bool(flags & GAME_OVER_FLAG)
+
+
+def _make_mirror_engine(shape: tuple[int, int]) -> engine.SnakeEngine:
+    free_cells_instance = free_cells.FreeCells(shape)
+    snakes = [
+        snake_body.SnakeBody(board.make_board(shape, free_cells_instance))
+        for _ in engine.START_POSITIONS
+    ]
+    return engine.SnakeEngine(board.make_board(shape, free_cells_instance),
+                              snakes,
+                              food_authority=False)
+
+
+def _encode_food(engine_instance: engine.SnakeEngine) -> bytes:
+    food = board.cells_of_kind(engine_instance.food_placement, board.FOOD_CELL)
+    return COUNT.pack(len(food)) + b"".join(
+        COORDINATES.pack(*coords) for coords in food)
+
+
+def _apply_food(engine_instance: engine.SnakeEngine, message: bytes,
+                offset: int) -> None:
+    food_placement = engine_instance.food_placement
+    for coords in board.cells_of_kind(food_placement, board.FOOD_CELL):
+        food_placement.set_cell(coords, board.VOID_CELL)
+    (food_count, ) = COUNT.unpack_from(message, offset)
+    offset += COUNT.size
+    for _ in range(food_count):
+        food_placement.set_cell(COORDINATES.unpack_from(message, offset),
+                                board.FOOD_CELL)
+        offset += COORDINATES.size
@@ -0,0 +1,79 @@
+"""
+Outbound queue of a connection that keeps only the newest message. A message
+put while an older one still waits for the socket replaces it, or is merged
+with it, so a slow peer holds at most one waiting message instead of a
+growing backlog, and the message it gets next is always the newest one.
+
+The game keeps putting messages without waiting, and the send coroutine of
+the connection takes them at the pace the socket accepts them.
+"""
+from __future__ import annotations
+import asyncio
+import dataclasses
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclasses.dataclass
+class SendQueueStats:
+    """
+    Messages of the queues since the start, `merged` and `dropped` count the
+    messages that never reached the socket on their own.
+    """
+    queued: int = 0
+    sent: int = 0
+    merged: int = 0
+    dropped: int = 0
+
+    def summary(self) -> str:
+        return (f"Streamed states: {self.queued} queued, {self.sent} sent, "
+                f"{self.merged} merged, {self.dropped} dropped")
+
+
+class LatestOnlyQueue(Generic[T]):
+    """
+    A queue of one waiting message. Without a merge function a new message
+    drops the waiting one.
+    """
+
+    def __init__(
+        self,
+        merge: Callable[[T, T], T] | None = None,
+        stats: SendQueueStats | None = None,
+    ) -> None:
+        self._merge = merge
+        self._pending: list[T] = []
+        self._ready = asyncio.Event()
+        self.stats = stats if stats is not None else SendQueueStats()
+
+    def put(self, message: T) -> None:
+        """
+        Queues a message without waiting.
+
+        Args:
+            message (T): The newest message.
+        """
+        self.stats.queued += 1
+        if not self._pending:
+            self._pending.append(message)
+        elif self._merge is not None:
+            self._pending[0] = self._merge(self._pending[0], message)
+            self.stats.merged += 1
+        else:
+            self._pending[0] = message
+            self.stats.dropped += 1
+        self._ready.set()
+
+    async def get(self) -> T:
+        """
+        Waits for a message and takes it.
+
+        Returns:
+            T: The waiting message.
+        """
+        while not self._pending:
+            await self._ready.wait()
+            self._ready.clear()
+        self.stats.sent += 1
+        return self._pending.pop()
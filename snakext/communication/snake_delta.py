@@ -0,0 +1,340 @@
+"""
+Delta protocol for the snake of a peer. Instead of all coordinates of the
+snake, an update carries the heads added and the tails dropped since a base
+tick, so its size and the cost of applying it do not depend on the length of
+the snake. A full snapshot is sent only when a connection starts, when the
+receiver asks for a resync after missing an update, or when the sender no
+longer remembers the moves since the base tick.
+
+The log of the local snake is written by the game thread and read by the
+network code, the mirror of the remote snake is written by the network code
+and applied by the game thread, so both are guarded by locks.
+"""
+from __future__ import annotations
+import collections
+import dataclasses
+import threading
+from snakext.game.state import state, snake_body
+
+# Base tick of a snapshot update
+SNAPSHOT_BASE_TICK = -1
+# Tick of updates from peers that do not tag their snake with ticks
+UNKNOWN_TICK = -1
+DELTA_LOG_SIZE = 256
+RESYNC_REQUEST = "resync"
+
+
+@dataclasses.dataclass
+class SnakeUpdate:
+    """
+    Change of a snake from `base_tick` to `tick`: the head added by every
+    move and the tail it dropped, None for moves after which the snake grew.
+    A snapshot has the base tick `SNAPSHOT_BASE_TICK` and all coordinates of
+    the snake in `coordinates`, from the tail to the head.
+    """
+    base_tick: int
+    tick: int
+    heads: list[tuple[int, int]] = dataclasses.field(default_factory=list)
+    tails: list[tuple[int, int] | None] = dataclasses.field(
+        default_factory=list)
+    coordinates: list[tuple[int, int]] = dataclasses.field(
+        default_factory=list)
+
+    @property
+    def is_snapshot(self) -> bool:
+        return self.base_tick == SNAPSHOT_BASE_TICK
+
+
+class SnakeDeltaLog:
+    """
+    Recent moves of the local snake, and its coordinates for snapshots.
+    """
+
+    def __init__(self, capacity: int = DELTA_LOG_SIZE) -> None:
+        self._lock = threading.Lock()
+        self._moves: collections.deque[tuple[int, tuple[int, int], tuple[
+            int, int] | None]] = collections.deque(maxlen=capacity)
+        self._coordinates: collections.deque[tuple[int,
+                                                   int]] = collections.deque()
+        # Snapshots sent before the first reset are applied unconditionally
+        self.tick = UNKNOWN_TICK
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._coordinates)
+
+    def reset(self, coordinates: list[tuple[int, int]], tick: int = 0) -> None:
+        """
+        Starts the log over from the given snake.
+
+        Args:
+            coordinates (list[tuple[int, int]]): Coordinates of the snake from the tail to the head.
+            tick (int): Tick of the snake.
+        """
+        with self._lock:
+            self._moves.clear()
+            self._coordinates = collections.deque(coordinates)
+            self.tick = tick
+
+    def record(self, tick: int, head: tuple[int, int],
+               dropped_tail: tuple[int, int] | None) -> None:
+        """
+        Records a move of the snake.
+
+        Args:
+            tick (int): Tick of the snake after the move.
+            head (tuple[int, int]): The new head.
+            dropped_tail (tuple[int, int] | None): The tail dropped by the
+                move, None if the snake grew.
+        """
+        with self._lock:
+            self._moves.append((tick, head, dropped_tail))
+            self._coordinates.append(head)
+            if dropped_tail is not None:
+                self._coordinates.popleft()
+            self.tick = tick
+
+    def snapshot(self) -> SnakeUpdate:
+        with self._lock:
+            return SnakeUpdate(SNAPSHOT_BASE_TICK,
+                               self.tick,
+                               coordinates=list(self._coordinates))
+
+    def coordinates_at(self, tick: int) -> list[tuple[int, int]] | None:
+        """
+        Returns the coordinates the snake had at a tick, by undoing the moves
+        after it.
+
+        Args:
+            tick (int): The tick.
+
+        Returns:
+            list[tuple[int, int]] | None: Coordinates from the tail to the
+                head, or None if the tick is ahead of the snake or some of the
+                moves after it are no longer in the log.
+        """
+        with self._lock:
+            if tick > self.tick:
+                return None
+            if tick < self.tick and (not self._moves
+                                     or self._moves[0][0] > tick + 1):
+                return None
+            coordinates = collections.deque(self._coordinates)
+            for move_tick, _, dropped_tail in reversed(self._moves):
+                if move_tick <= tick:
+                    break
+                coordinates.pop()
+                if dropped_tail is not None:
+                    coordinates.appendleft(dropped_tail)
+            return list(coordinates)
+
+    def since(self, base_tick: int) -> SnakeUpdate | None:
+        """
+        Returns the moves after the base tick.
+
+        Args:
+            base_tick (int): Tick the receiver has the snake at.
+
+        Returns:
+            SnakeUpdate | None: The delta update, or None if some of the
+                moves are no longer in the log.
+        """
+        with self._lock:
+            if base_tick == self.tick:
+                return SnakeUpdate(base_tick, self.tick)
+            if not self._moves or self._moves[0][0] > base_tick + 1:
+                return None
+            update = SnakeUpdate(base_tick, self.tick)
+            for tick, head, dropped_tail in self._moves:
+                if tick <= base_tick:
+                    continue
+                update.heads.append(head)
+                update.tails.append(dropped_tail)
+            return update
+
+
+class RemoteSnakeMirror:
+    """
+    Updates of the remote snake waiting to be applied on the game thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: list[SnakeUpdate] = []
+        self._resync_needed = False
+        self.tick = UNKNOWN_TICK
+
+    def receive(self, update: SnakeUpdate) -> None:
+        with self._lock:
+            self._pending.append(update)
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return len(self._pending) > 0
+
+    def apply(self, snake: snake_body.SnakeBody) -> bool:
+        """
+        Applies the received updates to the remote snake. An update that
+        does not continue from the tick of the snake, or drops tails the
+        snake does not have, is discarded and a resync is requested.
+
+        Args:
+            snake (snake_body.SnakeBody): The remote snake.
+
+        Returns:
+            bool: Whether the snake changed.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        changed = False
+        for update in pending:
+            if update.is_snapshot:
+                if update.tick != UNKNOWN_TICK and update.tick == self.tick:
+                    continue
+                _replace_snake(snake, update.coordinates)
+            elif update.base_tick != self.tick or not _apply_delta(
+                    snake, update):
+                with self._lock:
+                    self._resync_needed = True
+                continue
+            self.tick = update.tick
+            changed = True
+        return changed
+
+    def take_resync_request(self) -> bool:
+        """
+        Returns:
+            bool: Whether a resync is needed, clearing the request.
+        """
+        with self._lock:
+            resync_needed, self._resync_needed = self._resync_needed, False
+            return resync_needed
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending = []
+            self._resync_needed = False
+            self.tick = UNKNOWN_TICK
+
+
+local_snake_log = SnakeDeltaLog()
+remote_snake_mirror = RemoteSnakeMirror()
+
+
+def write_update(update: SnakeUpdate,
+                 transmitted_state: state.TransmittedState) -> None:
+    """
+    Stores an update in the snake fields of a transmitted state.
+
+    Args:
+        update (SnakeUpdate): The update to send.
+        transmitted_state (state.TransmittedState): The state to send it in.
+    """
+    transmitted_state.snake_base_tick = update.base_tick
+    transmitted_state.snake_tick = update.tick
+    transmitted_state.snake_heads = update.heads
+    transmitted_state.snake_tails = update.tails
+    transmitted_state.snake_placement = update.coordinates
+
+
+def merge_updates(older: SnakeUpdate,
+                  newer: SnakeUpdate,
+                  snake_log: SnakeDeltaLog | None = None) -> SnakeUpdate:
+    """
+    Merges two consecutive updates into one update with the change of both,
+    for an older update that was not sent yet. Merged deltas that cover more
+    moves than the snake is long, or than `DELTA_LOG_SIZE`, are collapsed
+    into a snapshot taken from the log of the snake, so the merged update
+    does not grow with the time it waits.
+
+    Args:
+        older (SnakeUpdate): The older update.
+        newer (SnakeUpdate): The newer update, a snapshot or a delta from
+            the tick of the older update.
+        snake_log (SnakeDeltaLog | None): Log of the updated snake, None to
+            never collapse merged deltas.
+
+    Returns:
+        SnakeUpdate: The merged update, a snapshot if either update is one
+            or the merged delta was collapsed.
+
+    Raises:
+        ValueError: If the newer update is a delta that does not continue
+            from the older update.
+    """
+    if newer.is_snapshot:
+        return newer
+    if newer.base_tick != older.tick:
+        raise ValueError("Updates are not consecutive")
+    if not older.is_snapshot:
+        merged = SnakeUpdate(older.base_tick, newer.tick,
+                             older.heads + newer.heads,
+                             older.tails + newer.tails)
+        if snake_log is None or len(merged.heads) <= min(
+                len(snake_log), DELTA_LOG_SIZE):
+            return merged
+        snapshot_coordinates = snake_log.coordinates_at(merged.tick)
+        if snapshot_coordinates is None:
+            return merged
+        return SnakeUpdate(SNAPSHOT_BASE_TICK,
+                           merged.tick,
+                           coordinates=snapshot_coordinates)
+    coordinates = collections.deque(older.coordinates)
+    for head, tail in zip(newer.heads, newer.tails):
+        if tail is not None:
+            coordinates.popleft()
+        coordinates.append(head)
+    return SnakeUpdate(SNAPSHOT_BASE_TICK,
+                       newer.tick,
+                       coordinates=list(coordinates))
+
+
+def read_update(transmitted_state: state.TransmittedState) -> SnakeUpdate:
+    """
+    Reads the snake update from a received state. States of peers that send
+    the whole snake every time are read as snapshots.
+
+    Args:
+        transmitted_state (state.TransmittedState): The received state.
+
+    Returns:
+        SnakeUpdate: The update of the remote snake.
+    """
+    return SnakeUpdate(
+        base_tick=transmitted_state.snake_base_tick,
+        tick=transmitted_state.snake_tick,
+        heads=[(i, k) for i, k in transmitted_state.snake_heads],
+        tails=[
+            (tail[0], tail[1]) if tail is not None else None
+            for tail in transmitted_state.snake_tails
+        ],
+        coordinates=[(i, k) for i, k in transmitted_state.snake_placement],
+    )
+
+
+def _replace_snake(snake: snake_body.SnakeBody,
+                   coordinates: list[tuple[int, int]]) -> None:
+    while len(snake) > 0:
+        snake.pop_tail()
+    for coords in coordinates:
+        snake.push_head(coords)
+
+
+def _apply_delta(snake: snake_body.SnakeBody, update: SnakeUpdate) -> bool:
+    """
+    Applies the moves of a delta update in order.
+
+    Args:
+        snake (snake_body.SnakeBody): The snake to update.
+        update (SnakeUpdate): The delta update.
+
+    Returns:
+        bool: False if a dropped tail does not match the snake.
+    """
+    for head, tail in zip(update.heads, update.tails):
+        if tail is not None:
+            if len(snake) == 0 or snake.tail != tail:
+                return False
+            snake.pop_tail()
+        snake.push_head(head)
+    return True
@@ -0,0 +1,252 @@
+"""
+Wire formats of the transmitted state. The binary format packs the fixed
+fields with `struct` and every list of coordinates into one buffer of
+unsigned shorts, and is sent in binary websocket frames. The JSON format is
+kept as a fallback for peers that do not support the binary format or one of
+its versions, and is sent in text frames, so a received message is decoded by
+the type of its frame.
+
+The format is negotiated once per connection: the client offers the formats
+it supports in order of preference with a `WIRE_FORMAT_REQUEST`, and the
+server answers with the first one it supports too. A server that does not
+answer the offer is spoken to in JSON.
+
+Binary layout (big-endian):
+    header   version, flags, game state, time sent, time last communicated,
+             handshake time, snake base tick, snake tick, coordinate counts
+    body     (row, col) of the snake, the food, the added heads and the
+             dropped tails, a missing tail as the largest coordinate twice
+
+Coordinates are single bytes and the counts unsigned shorts. If a
+coordinate does not fit in a byte or a count in an unsigned short,
+`WIDE_FLAG` is set and the coordinates are unsigned shorts and the counts
+unsigned ints, see `WIDE_HEADER`.
+"""
+from __future__ import annotations
+import array
+import json
+import struct
+import sys
+from snakext.game.state import state
+
+BINARY_VERSION = 2
+WIRE_FORMAT_BINARY = f"binary/{BINARY_VERSION}"
+WIRE_FORMAT_JSON = "json"
+WIRE_FORMATS = (WIRE_FORMAT_BINARY, WIRE_FORMAT_JSON)
+WIRE_FORMAT_REQUEST = "wire-format"
+WIRE_FORMAT_SEPARATOR = ","
+
+HEADER = struct.Struct(">BBBdddiiHHHH")
+WIDE_HEADER = struct.Struct(">BBBdddiiIIII")
+NARROW_MISSING_COORDINATE = 0xFF
+WIDE_MISSING_COORDINATE = 0xFFFF
+MAX_NARROW_COUNT = 0xFFFF
+HANDSHAKE_FLAG = 0x01
+WIDE_FLAG = 0x02
+
+UNSUPPORTED_VERSION_MESSAGE = "Unsupported wire format version"
+UNKNOWN_WIRE_FORMAT_MESSAGE = "Unknown wire format"
+COORDINATE_RANGE_MESSAGE = "Coordinates must be below {}"
+
+
+def encode_binary(transmitted_state: state.TransmittedState) -> bytes:
+    """
+    Encodes a state into the binary format.
+
+    Args:
+        transmitted_state (state.TransmittedState): The state to encode.
+
+    Returns:
+        bytes: The encoded state.
+
+    Raises:
+        ValueError: If a coordinate does not fit in an unsigned short.
+    """
+    coordinates: list[int] = []
+    for coords in transmitted_state.snake_placement:
+        coordinates.extend(coords)
+    for coords in transmitted_state.food_placement:
+        coordinates.extend(coords)
+    for coords in transmitted_state.snake_heads:
+        coordinates.extend(coords)
+    missing_tails = []
+    for tail in transmitted_state.snake_tails:
+        if tail is None:
+            missing_tails.append(len(coordinates))
+            coordinates.extend((0, 0))
+        else:
+            coordinates.extend(tail)
+    largest_coordinate = max(coordinates, default=0)
+    if largest_coordinate >= WIDE_MISSING_COORDINATE:
+        raise ValueError(
+            COORDINATE_RANGE_MESSAGE.format(WIDE_MISSING_COORDINATE))
+    counts = (len(transmitted_state.snake_placement),
+              len(transmitted_state.food_placement),
+              len(transmitted_state.snake_heads),
+              len(transmitted_state.snake_tails))
+    wide = (largest_coordinate >= NARROW_MISSING_COORDINATE
+            or max(counts) > MAX_NARROW_COUNT)
+    missing_coordinate = (WIDE_MISSING_COORDINATE
+                          if wide else NARROW_MISSING_COORDINATE)
+    for index in missing_tails:
+        coordinates[index] = coordinates[index + 1] = missing_coordinate
+    flags = ((HANDSHAKE_FLAG if transmitted_state.is_handshake else 0) |
+             (WIDE_FLAG if wide else 0))
+    header = (WIDE_HEADER if wide else HEADER).pack(
+        BINARY_VERSION,
+        flags,
+        transmitted_state.game_state,
+        transmitted_state.time_sent,
+        transmitted_state.time_last_communicated,
+        transmitted_state.sent_handshake,
+        transmitted_state.snake_base_tick,
+        transmitted_state.snake_tick,
+        *counts,
+    )
+    if not wide:
+        return header + bytes(coordinates)
+    body = array.array("H", coordinates)
+    if sys.byteorder == "little":
+        body.byteswap()
+    return header + body.tobytes()
+
+
+def decode_binary(data: bytes) -> state.TransmittedState:
+    """
+    Decodes a state from the binary format.
+
+    Args:
+        data (bytes): The encoded state.
+
+    Returns:
+        state.TransmittedState: The decoded state.
+
+    Raises:
+        ValueError: If the data is of an unsupported version.
+    """
+    if not data or data[0] != BINARY_VERSION:
+        raise ValueError(UNSUPPORTED_VERSION_MESSAGE)
+    wide = len(data) > 1 and bool(data[1] & WIDE_FLAG)
+    header = WIDE_HEADER if wide else HEADER
+    (_, flags, game_state, time_sent, time_last_communicated, sent_handshake,
+     snake_base_tick, snake_tick, snake_count, food_count, head_count,
+     tail_count) = header.unpack_from(data)
+    values: bytes | array.array[int] = data[header.size:]
+    missing_coordinate = NARROW_MISSING_COORDINATE
+    if wide:
+        values = array.array("H", values)
+        if sys.byteorder == "little":
+            values.byteswap()
+        missing_coordinate = WIDE_MISSING_COORDINATE
+    value_iterator = iter(values)
+    coordinates = list(zip(value_iterator, value_iterator))
+    food_start = snake_count
+    heads_start = food_start + food_count
+    tails_start = heads_start + head_count
+    return state.TransmittedState(
+        snake_placement=coordinates[:food_start],
+        food_placement=coordinates[food_start:heads_start],
+        time_sent=time_sent,
+        time_last_communicated=time_last_communicated,
+        is_handshake=bool(flags & HANDSHAKE_FLAG),
+        sent_handshake=sent_handshake,
+        game_state=game_state,
+        snake_base_tick=snake_base_tick,
+        snake_tick=snake_tick,
+        snake_heads=coordinates[heads_start:tails_start],
+        snake_tails=[
+            None if coords[0] == missing_coordinate else coords
+            for coords in coordinates[tails_start:]
+        ],
+    )
+
+
+def encode(transmitted_state: state.TransmittedState,
+           wire_format: str) -> str | bytes:
+    """
+    Encodes a state into a websocket message of the wire format.
+
+    Args:
+        transmitted_state (state.TransmittedState): The state to encode.
+        wire_format (str): One of `WIRE_FORMATS`.
+
+    Returns:
+        str | bytes: Bytes for a binary frame, or text of the JSON format.
+
+    Raises:
+        ValueError: If the wire format is unknown.
+    """
+    if wire_format == WIRE_FORMAT_BINARY:
+        return encode_binary(transmitted_state)
+    if wire_format == WIRE_FORMAT_JSON:
+        return transmitted_state.to_json()
+    raise ValueError(UNKNOWN_WIRE_FORMAT_MESSAGE)
+
+
+def decode(message: str | bytes) -> state.TransmittedState:
+    """
+    Decodes a state from a websocket message of any wire format. JSON states
+    that were encoded twice, as older peers send them, are accepted too.
+
+    Args:
+        message (str | bytes): Bytes of a binary frame, or text.
+
+    Returns:
+        state.TransmittedState: The decoded state.
+    """
+    if isinstance(message, bytes):
+        return decode_binary(message)
+    loaded = json.loads(message)
+    if isinstance(loaded, str):
+        return state.TransmittedState.from_json(loaded)
+    return state.TransmittedState(**loaded)
+
+
+def make_request(wire_formats: tuple[str, ...]) -> str:
+    """
+    Args:
+        wire_formats (tuple[str, ...]): Formats in order of preference.
+
+    Returns:
+        str: The request offering the formats.
+    """
+    return f"{WIRE_FORMAT_REQUEST} {WIRE_FORMAT_SEPARATOR.join(wire_formats)}"
+
+
+def is_request(message: str | bytes) -> bool:
+    return isinstance(message, str) and message.startswith(WIRE_FORMAT_REQUEST)
+
+
+def choose(message: str, supported_formats: tuple[str, ...]) -> str:
+    """
+    Chooses the format of a connection from the offer of the client.
+
+    Args:
+        message (str): The request of the client.
+        supported_formats (tuple[str, ...]): Formats supported by the server.
+
+    Returns:
+        str: The first offered format that is supported, JSON if none is.
+    """
+    offered = message[len(WIRE_FORMAT_REQUEST):].strip()
+    for wire_format in offered.split(WIRE_FORMAT_SEPARATOR):
+        if wire_format in supported_formats:
+            return wire_format
+    return WIRE_FORMAT_JSON
+
+
+def read_response(message: str | bytes) -> str:
+    """
+    Reads the format chosen by the server from its response to the request.
+
+    Args:
+        message (str | bytes): The response of the server.
+
+    Returns:
+        str: The chosen format, JSON if the server did not understand the
+            request.
+    """
+    if not isinstance(message, str) or not is_request(message):
+        return WIRE_FORMAT_JSON
+    chosen = message[len(WIRE_FORMAT_REQUEST):].strip()
+    return chosen if chosen in WIRE_FORMATS else WIRE_FORMAT_JSON
@@ -7,14 +7,16 @@ useful for rapid prototyping and educational purposes.
 """
 import pygame
 import sys
+import numpy.typing as npt
 from types import ModuleType
-from typing import Callable
+from typing import Any, Callable
 from snakext.game.state import state
 
 GAME_INITIALIZED_SUCCESSFULLY: int = 5
 DEFAULT_RESOLUTION: tuple[int, int] = (1280, 720)
 DEFAULT_BACKGROUND_COLOR = (255, 255, 255, 255)
 DEFAULT_GENERIC_COLOR = (100, 100, 100, 255)
+NO_SCREEN_MESSAGE = "The screen is not shown, call init_game first"
 
 _pygame_module: ModuleType
 _screen: pygame.Surface | None = None
@@ -74,17 +76,32 @@ def init_game(pygame_module: ModuleType = pygame) -> None:
     _clock = pygame.time.Clock()
 
 
-def show_screen() -> None:
+def show_screen(vsync: bool = False) -> None:
     """
     Displays the game screen with the default resolution.
     This function re-initializes the display mode of the screen.
+
+    Args:
+        vsync (bool, optional): Whether to synchronize display updates with
+            the refresh rate of the monitor. Falls back to no vsync if the
+            display does not support it. Defaults to False.
     """
     global _screen
+    if vsync:
+        try:
+            # Vsync needs a renderer, which SCALED provides
+            _screen = pygame.display.set_mode(DEFAULT_RESOLUTION,
+                                              flags=pygame.SCALED,
+                                              vsync=1)
+            return
+        except pygame.error:
+            pass
     _screen = pygame.display.set_mode(DEFAULT_RESOLUTION, )
 
 
 Rect = pygame.Rect
 Color = pygame.Color
+Surface = pygame.Surface
 error = pygame.error
 
 
@@ -188,6 +205,28 @@ def is_quit_event() -> bool:
     return is_quit_key()
 
 
+def poll_events() -> tuple[bool, list[int]]:
+    """
+    Reads all pending events from the event queue.
+
+    Returns:
+        tuple[bool, list[int]]: Whether quitting was requested, and the
+            directions of the movement keys pressed since the last call, in
+            the order they were pressed.
+    """
+    quit_requested = False
+    directions: list[int] = []
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            quit_requested = True
+        elif event.type == pygame.KEYDOWN:
+            if event.key in EXIT_KEYS:
+                quit_requested = True
+            elif event.key in KEY_DIRECTION:
+                directions.append(KEY_DIRECTION[event.key])
+    return quit_requested, directions
+
+
 def exit() -> None:
     pygame.quit()
     sys.exit()
@@ -207,11 +246,81 @@ def draw_rect(
     color: pygame.Color,
     border_radius: int = 0,
 ) -> None:
-    pygame.draw.rect(_screen, color, rect, border_radius=border_radius)
+    pygame.draw.rect(_get_screen(), color, rect, border_radius=border_radius)
 
 
 def fill_background_with_color(background_color: Color) -> None:
-    _screen.fill(background_color)
+    _get_screen().fill(background_color)
+
+
+def make_surface(size: tuple[int, int], color: Color) -> pygame.Surface:
+    """
+    Creates an off-screen surface in the pixel format of the screen.
+
+    Args:
+        size (tuple[int, int]): Width and height of the surface.
+        color (Color): Color the surface is filled with.
+
+    Returns:
+        pygame.Surface: The new surface.
+    """
+    surface = pygame.Surface(size).convert(_get_screen())
+    surface.fill(color)
+    return surface
+
+
+def make_indexed_surface(size: tuple[int, int],
+                         palette: list[Color]) -> pygame.Surface:
+    """
+    Creates an 8-bit surface whose pixel values are indices into a palette.
+
+    Args:
+        size (tuple[int, int]): Width and height of the surface.
+        palette (list[Color]): Color of every pixel value.
+
+    Returns:
+        pygame.Surface: The new surface.
+    """
+    surface = pygame.Surface(size, depth=8)
+    surface.set_palette(palette)
+    return surface
+
+
+def blit_array(surface: pygame.Surface, pixels: npt.NDArray[Any]) -> None:
+    """
+    Copies an array of pixel values indexed by (x, y) into a surface.
+
+    Args:
+        surface (pygame.Surface): The surface of the same size as the array.
+        pixels (npt.NDArray[Any]): The pixel values.
+    """
+    pygame.surfarray.blit_array(surface, pixels)
+
+
+def scale_surface(source: pygame.Surface, destination: pygame.Surface) -> None:
+    pygame.transform.scale(source, destination.get_size(), destination)
+
+
+def draw_rect_on_surface(
+    surface: pygame.Surface,
+    rect: pygame.Rect,
+    color: pygame.Color,
+    border_radius: int = 0,
+) -> None:
+    pygame.draw.rect(surface, color, rect, border_radius=border_radius)
+
+
+def blit(
+    surface: pygame.Surface,
+    position: tuple[int, int],
+    area: pygame.Rect | None = None,
+) -> None:
+    _get_screen().blit(surface, position, area)
+
+
+def blit_many(
+        blit_sequence: list[tuple[pygame.Surface, tuple[int, int]]]) -> None:
+    _get_screen().blits(blit_sequence, doreturn=False)
 
 
 def create_color(rgba_values: tuple[int, int, int, int]) -> Color:
@@ -222,17 +331,44 @@ def update_display() -> None:
     pygame.display.flip()
 
 
+def update_display_rects(rects: list[pygame.Rect]) -> None:
+    """
+    Pushes only the given areas of the screen to the display.
+
+    Args:
+        rects (list[pygame.Rect]): Areas of the screen that changed.
+    """
+    pygame.display.update(rects)
+
+
 def bottom_screen_pos(bottom: float) -> float:
-    return _screen.get_height() - bottom
+    return _get_screen().get_height() - bottom
 
 
 def right_screen_pos(right: float) -> float:
-    return _screen.get_width() - right
+    return _get_screen().get_width() - right
+
+
+def screen_size() -> tuple[int, int]:
+    return _get_screen().get_size()
 
 
 def screen_width() -> int:
-    return _screen.get_width()
+    return _get_screen().get_width()
 
 
 def screen_height() -> int:
-    return _screen.get_height()
+    return _get_screen().get_height()
+
+
+def _get_screen() -> pygame.Surface:
+    """
+    Returns:
+        pygame.Surface: The shown screen.
+
+    Raises:
+        pygame.error: If the screen is not shown yet.
+    """
+    if _screen is None:
+        raise pygame.error(NO_SCREEN_MESSAGE)
+    return _screen
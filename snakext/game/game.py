@@ -8,10 +8,12 @@ remote players.
 """
 import asyncio
 import threading
+import time
 from snakext.facades import pygame_facade
-from snakext.utils import matrix, game_clock
-from snakext.game.logic import logic_controller
-from snakext.game.state import state
+from snakext.communication import communicator, snake_delta, lockstep
+from snakext.utils import matrix, game_clock, arg_parser
+from snakext.game.logic import logic_controller, engine, turn_buffer, prediction
+from snakext.game.state import state, board
 from snakext.game.views import game_view, playground
 
 CONNECTION_ESTABLISHMENT_WAIT_PERIOD = 0.1
@@ -23,19 +25,23 @@ async def init_game(
 ) -> tuple[
         playground.Playground,
         state.State,
+        engine.SnakeEngine,
 ]:
     """
     Initializes the game environment and sets up the game state.
 
     This coroutine initializes the game using the pygame facade, sets up the playground,
-    establishes a connection for multiplayer games, and handles the initial placement of the snake.
+    establishes a connection for multiplayer games, handles the initial placement of the snake
+    and creates the engine simulating the local snake, or both snakes in the
+    lockstep mode.
 
     Args:
         local_communication_state (state.TransmittedState): The state object for local communication.
         remote_communication_state (state.TransmittedState): The state object for remote communication.
 
     Returns:
-        tuple[playground.Playground, state.State]: A tuple containing the playground instance and the game state.
+        tuple[playground.Playground, state.State, engine.SnakeEngine]: A tuple containing the playground
+            instance, the game state and the engine.
     """
     pygame_facade.init_game()
     playground_instance = playground.get_playground()
@@ -49,26 +55,96 @@ async def init_game(
             local_communication_state,
             remote_communication_state,
         )
+    is_host = state.is_host(
+        local_communication_state,
+        remote_communication_state,
+    )
+    if _is_lockstep(state_instance):
+        engine_instance = _make_lockstep_engine(state_instance, is_host)
+        return _start_game(playground_instance, state_instance,
+                           engine_instance, local_communication_state)
     await setup_initial_placement(
         state_instance=state_instance,
         local_communication_state=local_communication_state,
         remote_communication_state=remote_communication_state,
     )
-    if state_instance.multiplayer and not state.is_host(
-            local_communication_state,
-            remote_communication_state,
-    ):
+    if state_instance.multiplayer and not is_host:
         snake_choose_function = matrix.middle_right_element_position
     else:
         snake_choose_function = matrix.middle_left_element_position
-    state_instance.local_snake_placement = logic_controller.place_initial_snake(
-        state_instance.local_snake_placement,
+    logic_controller.place_initial_snake(
+        state_instance.local_snake,
         choose_coordinates=snake_choose_function,
     )
-    pygame_facade.show_screen()
+    snake_delta.local_snake_log.reset(state_instance.local_snake.coordinates())
+    # Only the host places food in a multiplayer game. The remote snake is
+    # drawn with predicted moves, so the collisions with it are judged by the
+    # game loop on the received snake instead of by the engine, which only
+    # lets it eat the food.
+    engine_instance = engine.engine_from_state(
+        state_instance,
+        food_authority=not state_instance.multiplayer or is_host,
+        remote_snake_obstacle=False,
+    )
+    return _start_game(playground_instance, state_instance, engine_instance,
+                       local_communication_state)
+
+
+def _start_game(
+    playground_instance: playground.Playground,
+    state_instance: state.State,
+    engine_instance: engine.SnakeEngine,
+    local_communication_state: state.TransmittedState,
+) -> tuple[
+        playground.Playground,
+        state.State,
+        engine.SnakeEngine,
+]:
+    """
+    Shows the screen and marks the game as running.
+
+    Args:
+        playground_instance (playground.Playground): The playground instance for the game.
+        state_instance (state.State): The current game state instance.
+        engine_instance (engine.SnakeEngine): The engine of the game.
+        local_communication_state (state.TransmittedState): The state object for local communication.
+
+    Returns:
+        tuple[playground.Playground, state.State, engine.SnakeEngine]: A tuple containing the playground
+            instance, the game state and the engine.
+    """
+    pygame_facade.show_screen(vsync=arg_parser.VSYNC)
+    game_view.set_renderer(arg_parser.RENDERER)
+    game_clock.set_target_fps(arg_parser.TARGET_FPS)
     state_instance.game_status = state.GameStates.RUNNING.value
     local_communication_state.game_state = state_instance.game_status
-    return playground_instance, state_instance
+    return playground_instance, state_instance, engine_instance
+
+
+def _make_lockstep_engine(
+    state_instance: state.State,
+    is_host: bool,
+) -> engine.SnakeEngine:
+    """
+    Creates the engine of the lockstep mode, which simulates both snakes and
+    the food on the boards of the state. The snake of the host is the first
+    snake of the engine on both peers and starts in the middle-left part of
+    the board, so both peers simulate the same game.
+
+    Args:
+        state_instance (state.State): The current game state instance.
+        is_host (bool): Whether the local peer is the host.
+
+    Returns:
+        engine.SnakeEngine: The engine with the snakes and the first food placed.
+    """
+    snakes = [state_instance.local_snake, state_instance.remote_snake]
+    if not is_host:
+        snakes.reverse()
+    engine_instance = engine.SnakeEngine(state_instance.food_placement,
+                                         snakes)
+    engine_instance.reset(lockstep.input_exchange.agreed_seed(is_host))
+    return engine_instance
 
 
 def make_game_thread(
@@ -109,7 +185,8 @@ async def establish_connection(
     Establishes a connection for multiplayer games.
 
     This coroutine waits until the handshake between local and remote states is complete, indicating
-    a successful establishment of the multiplayer connection.
+    a successful establishment of the multiplayer connection. In the lockstep mode it also waits for
+    the seed of the other player.
 
     Args:
         state_instance (state.State): The current game state instance.
@@ -125,7 +202,8 @@ async def establish_connection(
             if state.is_handshake_done(
                     local_communication_state,
                     remote_communication_state,
-            ):
+            ) and (not _is_lockstep(state_instance)
+                   or lockstep.input_exchange.remote_seed is not None):
                 break
 
 
@@ -148,7 +226,6 @@ async def setup_initial_placement(
     Returns:
         None
     """
-    state_instance.previous_snake_placement = state_instance.local_snake_placement
     is_host = state.is_host(local_communication_state,
                             remote_communication_state)
     if not state_instance.multiplayer or is_host:
@@ -183,7 +260,7 @@ def run_game(
     Returns:
         None
     """
-    playground_instance, state.state_instance = asyncio.run(
+    playground_instance, state.state_instance, engine_instance = asyncio.run(
         init_game(
             local_communication_state,
             remote_communication_state,
@@ -192,6 +269,7 @@ def run_game(
         _main_game_loop(
             playground_instance=playground_instance,
             state_instance=state.state_instance,
+            engine_instance=engine_instance,
             local_communication_state=local_communication_state,
             remote_communication_state=remote_communication_state,
             future=future,
@@ -203,6 +281,7 @@ def run_game(
 async def _main_game_loop(
     playground_instance: game_view.playground.Playground,
     state_instance: state.State,
+    engine_instance: engine.SnakeEngine,
     local_communication_state: state.TransmittedState,
     remote_communication_state: state.TransmittedState,
     future: asyncio.Future[int],
@@ -216,6 +295,7 @@ async def _main_game_loop(
     Args:
         playground_instance (game_view.playground.Playground): The playground instance for the game.
         state_instance (state.State): The current game state instance.
+        engine_instance (engine.SnakeEngine): The engine simulating the local snake.
         local_communication_state (state.TransmittedState): The local game state for transmission.
         remote_communication_state (state.TransmittedState): The remote game state for transmission.
         future (asyncio.Future[int]): A future object to indicate the game's completion status.
@@ -223,8 +303,15 @@ async def _main_game_loop(
     Returns:
         None
     """
-    movement_key = state.RIGHT_DIRECTION
-    previous_movement_keys: list[int] = []
+    turns = turn_buffer.TurnBuffer()
+    predictor = prediction.RemoteSnakePredictor(
+        state_instance.remote_snake,
+        obstacles=[state_instance.local_snake_placement],
+        move_seconds=game_clock.TICK_PER_MOVE * game_clock.TICK_PERIOD_SECONDS,
+    )
+    remote_collision = False
+    # Received food placement last applied to the local board
+    applied_food: list[tuple[int, int]] | None = None
     while True:
         game_clock.tick(pygame_facade)
         # Check if the game should be ended
@@ -239,68 +326,266 @@ async def _main_game_loop(
             break
         if future.done():
             break
-        if pygame_facade.is_quit_event():
+        quit_requested, pressed_directions = pygame_facade.poll_events()
+        if quit_requested:
             local_communication_state.game_state = state.GameStates.STOPPED.value
+            _report_stats(turns)
             pygame_facade.exit()
+        pressed_time = time.perf_counter()
+        current_direction = _local_direction(engine_instance, state_instance)
+        for direction in pressed_directions:
+            turns.push(direction, current_direction, pressed_time)
 
-        current_movement_keys = pygame_facade.movement_keys()
         # Syncronize with other player
-        if state_instance.multiplayer:
-            local_communication_state.snake_placement = logic_controller.placement_array(
-                state_instance.local_snake_placement, )
-            if state.is_host(local_communication_state,
-                             remote_communication_state):
-                local_communication_state.food_placement = logic_controller.placement_array(
-                    state_instance.food_placement)
-            state_instance.remote_snake_placement = logic_controller.placement_from_array(
-                remote_communication_state.snake_placement,
-                (playground_instance.grid_rows, playground_instance.grid_cols),
-                f"{state.SNAKE_BODY_PLACE}0",
-            )
-
-        # Host handles food placement for one source of thruth
-        if state_instance.multiplayer and not state.is_host(
+        if state_instance.multiplayer and not _is_lockstep(state_instance):
+            _publish_local_state(state_instance, local_communication_state,
+                                 remote_communication_state)
+            remote_collision = (_update_remote_snake(
+                state_instance, remote_communication_state, predictor)
+                                or remote_collision)
+            predictor.predict(time.time())
+
+        # Host handles food placement for one source of thruth, a received
+        # state brings a new list of food
+        if (state_instance.multiplayer and not _is_lockstep(state_instance)
+                and not state.is_host(
                 local_communication_state,
-                remote_communication_state,
-        ):
-            state_instance.food_placement = logic_controller.placement_from_array(
-                remote_communication_state.food_placement,
-                (playground_instance.grid_rows, playground_instance.grid_cols),
-                state.FOOD_PLACE,
-            )
+                    remote_communication_state,
+                ) and remote_communication_state.food_placement
+                is not applied_food):
+            applied_food = remote_communication_state.food_placement
+            state_instance.food_placement.assign(
+                logic_controller.placement_from_array(
+                    remote_communication_state.food_placement,
+                    (playground_instance.grid_rows,
+                     playground_instance.grid_cols),
+                    board.FOOD_CELL,
+                ))
 
         _draw_game_view(playground_instance, state_instance)
 
-        movement_key = pygame_facade.movement_key(
-            previous_movement_keys,
-            pygame_facade.movement_keys,
-            movement_key,
-        )
-        previous_movement_keys = current_movement_keys
-
         # Stops the game if movement is not performed or snake collides
+        tick_count = engine_instance.tick_count
         if state_instance.game_status == state.GameStates.RUNNING.value:
-            if game_clock.is_logic_tick(pygame_facade):
-                moved_successfully = logic_controller.handle_snake_movement(
+            while game_clock.is_logic_tick(pygame_facade):
+                if _is_waiting_for_remote_key(engine_instance,
+                                              state_instance):
+                    break
+                moved_successfully = _handle_snake_movement(
+                    engine_instance,
                     state_instance,
-                    movement_key,
-                    local_communication_state,
-                    remote_communication_state,
+                    turns,
                 )
+                game_clock.logic_tick(pygame_facade)
                 if not moved_successfully:
                     state_instance.game_status = state.GameStates.STOPPED.value
-                game_clock.logic_tick(pygame_facade)
-
-        if state_instance.multiplayer:
-            if logic_controller.check_remote_snake_collision(
+                    break
+
+        if _is_lockstep(state_instance):
+            # Both players simulate the same game, only the keys are sent
+            if engine_instance.tick_count != tick_count:
+                communicator.push_local_state()
+        elif state_instance.multiplayer:
+            # A predicted remote snake is drawn but not collided with
+            if predictor.tick == prediction.UNKNOWN_TICK:
+                remote_collision = logic_controller.check_remote_snake_collision(
                     state_instance.local_snake_placement,
                     state_instance.remote_snake_placement,
-            ):
+                )
+            if remote_collision:
                 state_instance.game_status = state.GameStates.STOPPED.value
                 local_communication_state.game_state = state_instance.game_status
+            # Push the move to the other player right away
+            if (engine_instance.tick_count != tick_count
+                    or state_instance.game_status
+                    == state.GameStates.STOPPED.value):
+                _publish_local_state(state_instance,
+                                     local_communication_state,
+                                     remote_communication_state)
+                communicator.push_local_state()
 
         # Propagate the event loop in case it is not done yet
         pygame_facade.pump()
+    _report_stats(turns)
+
+
+def _publish_local_state(
+    state_instance: state.State,
+    local_communication_state: state.TransmittedState,
+    remote_communication_state: state.TransmittedState,
+) -> None:
+    """
+    Copies the local snake, and the food on the host, into the transmitted
+    state.
+
+    Args:
+        state_instance (state.State): The current game state instance.
+        local_communication_state (state.TransmittedState): The local game state for transmission.
+        remote_communication_state (state.TransmittedState): The remote game state for transmission.
+    """
+    local_communication_state.snake_placement = state_instance.local_snake.coordinates(
+    )
+    if state.is_host(local_communication_state, remote_communication_state):
+        local_communication_state.food_placement = logic_controller.placement_array(
+            state_instance.food_placement)
+
+
+def _update_remote_snake(
+    state_instance: state.State,
+    remote_communication_state: state.TransmittedState,
+    predictor: prediction.RemoteSnakePredictor,
+) -> bool:
+    """
+    Applies the received updates of the remote snake. The predicted moves
+    are rolled back first and predicted again up to now after.
+
+    The collision of the snakes is judged at the tick of the received remote
+    snake against the local snake of the same tick, so it does not depend on
+    the network delay or on a wrong prediction.
+
+    Args:
+        state_instance (state.State): The current game state instance.
+        remote_communication_state (state.TransmittedState): The remote game state for transmission.
+        predictor (prediction.RemoteSnakePredictor): The predictor of the remote snake.
+
+    Returns:
+        bool: Whether the local snake collided with the received remote snake.
+    """
+    mirror = snake_delta.remote_snake_mirror
+    if not mirror.has_pending():
+        return False
+    predictor.roll_back()
+    mirror.apply(state_instance.remote_snake)
+    predictor.accept(mirror.tick, remote_communication_state.time_sent,
+                     time.time())
+    if predictor.tick == prediction.UNKNOWN_TICK:
+        return False
+    local_coordinates = snake_delta.local_snake_log.coordinates_at(
+        predictor.tick)
+    if local_coordinates is None:
+        local_coordinates = state_instance.local_snake.coordinates()
+    return not set(local_coordinates).isdisjoint(
+        predictor.received_coordinates())
+
+
+def _handle_snake_movement(
+    engine_instance: engine.SnakeEngine,
+    state_instance: state.State,
+    turns: turn_buffer.TurnBuffer,
+) -> bool:
+    """
+    Steps the engine if the snake moves on this logic tick. The move takes
+    the oldest buffered turn, if any.
+
+    Args:
+        engine_instance (engine.SnakeEngine): The engine simulating the local snake.
+        state_instance (state.State): The current game state instance.
+        turns (turn_buffer.TurnBuffer): The buffered turns of the local snake.
+
+    Returns:
+        bool: False if the snake died or there is no place for new food, True otherwise.
+    """
+    if not game_clock.moves():
+        return True
+    if _is_lockstep(state_instance):
+        return _handle_lockstep_movement(engine_instance, state_instance,
+                                         turns)
+    local_snake = state_instance.local_snake
+    tail, length = local_snake.tail, len(local_snake)
+    events = engine_instance.step([turns.pop(time.perf_counter())])
+    if engine.has_event(events, engine.EventTypes.MOVED):
+        snake_delta.local_snake_log.record(
+            engine_instance.tick_count,
+            local_snake.head,
+            tail if len(local_snake) == length else None,
+        )
+    state_instance.movement_direction = engine_instance.directions[0]
+    state_instance.add_do_snake = engine_instance.grow[0]
+    return not (engine.has_event(events, engine.EventTypes.DIED)
+                or engine.has_event(events, engine.EventTypes.BOARD_FULL))
+
+
+def _handle_lockstep_movement(
+    engine_instance: engine.SnakeEngine,
+    state_instance: state.State,
+    turns: turn_buffer.TurnBuffer,
+) -> bool:
+    """
+    Queues the oldest buffered turn for a later move and steps both snakes
+    with the keys scheduled for this move.
+
+    Args:
+        engine_instance (engine.SnakeEngine): The engine simulating both snakes.
+        state_instance (state.State): The current game state instance.
+        turns (turn_buffer.TurnBuffer): The buffered turns of the local snake.
+
+    Returns:
+        bool: False if a snake died or there is no place for new food, True otherwise.
+    """
+    local_index = _local_snake_index(engine_instance, state_instance)
+    move = engine_instance.tick_count
+    lockstep.input_exchange.queue_local_key(move,
+                                            turns.pop(time.perf_counter()))
+    events = engine_instance.step(
+        lockstep.input_exchange.movement_keys(move, local_index))
+    state_instance.movement_direction = engine_instance.directions[
+        local_index]
+    state_instance.add_do_snake = engine_instance.grow[local_index]
+    return not (engine.has_event(events, engine.EventTypes.DIED)
+                or engine.has_event(events, engine.EventTypes.BOARD_FULL))
+
+
+def _is_waiting_for_remote_key(
+    engine_instance: engine.SnakeEngine,
+    state_instance: state.State,
+) -> bool:
+    """
+    Returns:
+        bool: Whether the next logic tick is a move of the lockstep mode for
+            which the key of the remote snake was not received yet.
+    """
+    return (_is_lockstep(state_instance) and game_clock.moves()
+            and not lockstep.input_exchange.has_remote_key(
+                engine_instance.tick_count))
+
+
+def _is_lockstep(state_instance: state.State) -> bool:
+    return (state_instance.multiplayer
+            and arg_parser.SYNC_MODE == communicator.SYNC_MODE_LOCKSTEP)
+
+
+def _local_snake_index(
+    engine_instance: engine.SnakeEngine,
+    state_instance: state.State,
+) -> int:
+    for index, snake in enumerate(engine_instance.snakes):
+        if snake is state_instance.local_snake:
+            return index
+    raise ValueError("The engine does not simulate the local snake")
+
+
+def _local_direction(
+    engine_instance: engine.SnakeEngine,
+    state_instance: state.State,
+) -> int:
+    """
+    Returns:
+        int: Direction the local snake moves in, in the lockstep mode after
+            the keys that are queued but not applied yet.
+    """
+    local_index = _local_snake_index(engine_instance, state_instance)
+    direction = engine_instance.directions[local_index]
+    if _is_lockstep(state_instance):
+        direction = lockstep.input_exchange.pending_direction(
+            engine_instance.tick_count, direction)
+    return direction
+
+
+def _report_stats(turns: turn_buffer.TurnBuffer) -> None:
+    if arg_parser.SHOW_INPUT_LATENCY:
+        print(turns.latency.summary())
+    if arg_parser.SHOW_SEND_STATS:
+        print(communicator.send_stats.summary())
 
 
 def _draw_game_view(
@@ -320,9 +605,19 @@ def _draw_game_view(
     Returns:
         None
     """
+    local_snake = state_instance.local_snake
+    head_motion = None
+    if (state_instance.game_status == state.GameStates.RUNNING.value
+            and len(local_snake) > 1):
+        head_motion = game_view.HeadMotion(
+            neck=local_snake.segments[-2],
+            head=local_snake.head,
+            alpha=game_clock.interpolation_alpha(),
+        )
     game_view.draw_game_view(
         playground_instance,
         state_instance.local_snake_placement,
         state_instance.remote_snake_placement,
         state_instance.food_placement,
+        head_motion=head_motion,
     )
@@ -0,0 +1,214 @@
+"""
+This module contains a batched version of the game rules for training and
+evaluating bots. It holds many single-snake boards as stacked numpy arrays and
+advances all of them with array operations in one `step` call. The rules
+follow `logic_controller.move_snake`: the head wraps around the board edges,
+a snake grows on the move after eating food, and it dies when it moves into
+any of its own segments (the tail included). Finished boards are reset
+automatically.
+"""
+from __future__ import annotations
+import dataclasses
+import math
+import numpy as np
+import numpy.typing as npt
+from snakext.game.logic import logic_controller
+from snakext.game.state import state, board
+
+INITIAL_SNAKE_LENGTH = 3
+
+# Indexed by direction, row 0 is the "keep direction" key
+DIRECTION_VECTORS = np.array([(0, 0)] + [
+    logic_controller.MOVEMENT_DIRECTIONS[direction] for direction in (
+        state.TOP_DIRECTION,
+        state.BOTTOM_DIRECTION,
+        state.RIGHT_DIRECTION,
+        state.LEFT_DIRECTION,
+    )
+],
+                             dtype=np.intp)
+OPPOSITE_DIRECTIONS = np.array([
+    0,
+    state.BOTTOM_DIRECTION,
+    state.TOP_DIRECTION,
+    state.LEFT_DIRECTION,
+    state.RIGHT_DIRECTION,
+],
+                               dtype=np.int8)
+
+
+@dataclasses.dataclass
+class BatchStepResult:
+    """
+    Outcome of one step of every board. All arrays have one entry per board
+    and describe the board before it was reset.
+    """
+    ate: npt.NDArray[np.bool_]
+    died: npt.NDArray[np.bool_]
+    board_full: npt.NDArray[np.bool_]
+    lengths: npt.NDArray[np.int32]
+    reset: npt.NDArray[np.bool_]
+
+
+class BatchEngine:
+    """
+    Simulates N single-snake boards in lockstep.
+
+    Every snake is kept as a ring buffer of flat cell indices, so a step
+    touches only the head and the tail of each snake. `occupied` holds the
+    occupancy of every board and `food` the flat index of the food cell of
+    every board (-1 when the board is full).
+    """
+
+    def __init__(
+        self,
+        board_count: int,
+        shape: tuple[int, int],
+        seed: int | None = None,
+    ) -> None:
+        rows, cols = shape
+        self.board_count = board_count
+        self.shape = shape
+        self.cell_count = rows * cols
+        self.rng = np.random.default_rng(seed)
+        self.occupied = np.zeros((board_count, self.cell_count),
+                                 dtype=np.bool_)
+        self.body = np.zeros((board_count, self.cell_count), dtype=np.int32)
+        self.head_pointers = np.zeros(board_count, dtype=np.intp)
+        self.lengths = np.zeros(board_count, dtype=np.int32)
+        self.directions = np.zeros(board_count, dtype=np.int8)
+        self.grow = np.zeros(board_count, dtype=np.bool_)
+        self.food = np.zeros(board_count, dtype=np.intp)
+        self.board_steps = 0
+        self._boards = np.arange(board_count)
+        self.reset_boards(np.ones(board_count, dtype=np.bool_))
+
+    def reset_boards(self, mask: npt.NDArray[np.bool_]) -> None:
+        """
+        Resets the selected boards to the initial layout of the game: a snake
+        of three segments heading right in the middle-left part of the board
+        and one food.
+
+        Args:
+            mask (npt.NDArray[np.bool_]): True for every board to reset.
+        """
+        boards = self._boards[mask]
+        if boards.size == 0:
+            return
+        rows, cols = self.shape
+        # Same position as matrix.middle_left_element_position
+        row, col = math.floor(rows / 2), math.floor(cols / 4)
+        initial_cells = np.array(
+            [row * cols + (col + offset) % cols for offset in (-1, 0, 1)],
+            dtype=np.int32)
+        self.occupied[boards] = False
+        self.occupied[boards[:, None], initial_cells[None, :]] = True
+        self.body[boards, :INITIAL_SNAKE_LENGTH] = initial_cells
+        self.head_pointers[boards] = INITIAL_SNAKE_LENGTH - 1
+        self.lengths[boards] = INITIAL_SNAKE_LENGTH
+        self.directions[boards] = state.RIGHT_DIRECTION
+        self.grow[boards] = False
+        self._place_food(boards)
+
+    def heads(self) -> npt.NDArray[np.int32]:
+        """
+        Returns:
+            npt.NDArray[np.int32]: Flat index of the head cell of every board.
+        """
+        return self.body[self._boards, self.head_pointers]
+
+    def step(self, actions: npt.NDArray[np.integer]) -> BatchStepResult:
+        """
+        Moves the snake of every board.
+
+        Args:
+            actions (npt.NDArray[np.integer]): Movement key of every board,
+                0 keeps the current direction and a key opposite to the
+                current direction is ignored.
+
+        Returns:
+            BatchStepResult: What happened on every board.
+        """
+        rows, cols = self.shape
+        boards = self._boards
+        keys = np.where(actions == 0, self.directions, actions)
+        is_opposite = OPPOSITE_DIRECTIONS[self.directions] == keys
+        self.directions = np.where(is_opposite, self.directions,
+                                   keys).astype(np.int8)
+        vectors = DIRECTION_VECTORS[self.directions]
+
+        heads = self.heads()
+        head_rows = (heads // cols + vectors[:, 0]) % rows
+        head_cols = (heads % cols + vectors[:, 1]) % cols
+        new_heads = (head_rows * cols + head_cols).astype(np.int32)
+
+        # The tail is still in place when the head moves, as in move_snake
+        died = self.occupied[boards, new_heads]
+        alive = boards[~died]
+
+        shrinking = alive[~self.grow[alive]]
+        tail_pointers = (self.head_pointers[shrinking] -
+                         self.lengths[shrinking] + 1) % self.cell_count
+        self.occupied[shrinking, self.body[shrinking, tail_pointers]] = False
+        self.lengths[alive] += self.grow[alive]
+
+        self.head_pointers[alive] = (self.head_pointers[alive] +
+                                     1) % self.cell_count
+        self.body[alive, self.head_pointers[alive]] = new_heads[alive]
+        self.occupied[alive, new_heads[alive]] = True
+
+        ate = np.zeros(self.board_count, dtype=np.bool_)
+        ate[alive] = new_heads[alive] == self.food[alive]
+        self.grow = ate
+        board_full = np.zeros(self.board_count, dtype=np.bool_)
+        board_full[ate] = ~self._place_food(boards[ate])
+
+        result = BatchStepResult(
+            ate=ate,
+            died=died,
+            board_full=board_full,
+            lengths=self.lengths.copy(),
+            reset=died | board_full,
+        )
+        self.board_steps += self.board_count
+        self.reset_boards(result.reset)
+        return result
+
+    def _place_food(
+            self, boards: npt.NDArray[np.intp]) -> npt.NDArray[np.bool_]:
+        """
+        Places food on a uniformly random free cell of every selected board.
+
+        Args:
+            boards (npt.NDArray[np.intp]): Indices of the boards.
+
+        Returns:
+            npt.NDArray[np.bool_]: False for every board without a free cell.
+        """
+        if boards.size == 0:
+            return np.zeros(0, dtype=np.bool_)
+        scores = self.rng.random((boards.size, self.cell_count))
+        scores[self.occupied[boards]] = -1.0
+        chosen = np.argmax(scores, axis=1)
+        placed: npt.NDArray[np.bool_] = scores[np.arange(boards.size),
+                                               chosen] >= 0.0
+        self.food[boards] = np.where(placed, chosen, -1)
+        return placed
+
+    def board_grid(self, board_index: int) -> npt.NDArray[np.int8]:
+        """
+        Renders one board as a grid of board module cell kinds for debugging
+        and inspection. All segments but the head are drawn as the body.
+
+        Args:
+            board_index (int): Index of the board.
+
+        Returns:
+            npt.NDArray[np.int8]: The grid of the board.
+        """
+        grid = np.where(self.occupied[board_index], board.SNAKE_BODY_CELL,
+                        board.VOID_CELL).astype(board.KIND_DTYPE)
+        grid[self.heads()[board_index]] = board.SNAKE_HEAD_CELL
+        if self.food[board_index] >= 0:
+            grid[self.food[board_index]] = board.FOOD_CELL
+        return grid.reshape(self.shape)
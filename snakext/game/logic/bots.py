@@ -0,0 +1,109 @@
+"""
+This module contains simple bot policies for the headless engine. A policy
+looks at the engine and returns the movement key for one of its snakes. The
+policies are registered by name, so they can be chosen from the command line
+and referred to from worker processes.
+"""
+import random
+from typing import Callable
+import numpy as np
+from snakext.game.logic import engine, logic_controller
+from snakext.game.state import state
+
+Policy = Callable[[engine.SnakeEngine, int, random.Random], int]
+
+DIRECTIONS = (
+    state.TOP_DIRECTION,
+    state.BOTTOM_DIRECTION,
+    state.RIGHT_DIRECTION,
+    state.LEFT_DIRECTION,
+)
+
+
+def straight_policy(engine_instance: engine.SnakeEngine, snake_index: int,
+                    rng: random.Random) -> int:
+    """
+    Keeps the current direction.
+    """
+    return 0
+
+
+def random_policy(engine_instance: engine.SnakeEngine, snake_index: int,
+                  rng: random.Random) -> int:
+    """
+    Chooses a random direction, the opposite one included, which is ignored
+    by the engine.
+    """
+    return rng.choice(DIRECTIONS)
+
+
+def safe_random_policy(engine_instance: engine.SnakeEngine, snake_index: int,
+                       rng: random.Random) -> int:
+    """
+    Chooses a random direction that does not move into an occupied cell.
+    """
+    safe_directions = _safe_directions(engine_instance, snake_index)
+    if not safe_directions:
+        return 0
+    return rng.choice(safe_directions)
+
+
+def greedy_policy(engine_instance: engine.SnakeEngine, snake_index: int,
+                  rng: random.Random) -> int:
+    """
+    Chooses the safe direction that gets closest to the food, taking the
+    wrap-around of the board into account.
+    """
+    safe_directions = _safe_directions(engine_instance, snake_index)
+    if not safe_directions:
+        return 0
+    food_cells = np.flatnonzero(engine_instance.food_placement.occupied)
+    if food_cells.size == 0:
+        return rng.choice(safe_directions)
+    rows, cols = engine_instance.shape
+    food = divmod(int(food_cells[0]), cols)
+    head = engine_instance.snakes[snake_index].head
+
+    def food_distance(direction: int) -> int:
+        i, k = _next_cell(head, direction, (rows, cols))
+        row_distance = abs(i - food[0])
+        col_distance = abs(k - food[1])
+        return (min(row_distance, rows - row_distance) +
+                min(col_distance, cols - col_distance))
+
+    return min(safe_directions, key=food_distance)
+
+
+POLICIES: dict[str, Policy] = {
+    "straight": straight_policy,
+    "random": random_policy,
+    "safe-random": safe_random_policy,
+    "greedy": greedy_policy,
+}
+
+
+def _next_cell(
+    head: tuple[int, int],
+    direction: int,
+    shape: tuple[int, int],
+) -> tuple[int, int]:
+    vector = logic_controller.MOVEMENT_DIRECTIONS[direction]
+    return ((head[0] + vector[0]) % shape[0], (head[1] + vector[1]) % shape[1])
+
+
+def _safe_directions(engine_instance: engine.SnakeEngine,
+                     snake_index: int) -> list[int]:
+    snake = engine_instance.snakes[snake_index]
+    current_direction = engine_instance.directions[snake_index]
+    placements = [other.placement for other in engine_instance.snakes
+                  ] + engine_instance.obstacles
+    safe_directions = []
+    for direction in DIRECTIONS:
+        if logic_controller._is_opposite(
+                logic_controller.MOVEMENT_DIRECTIONS[direction],
+                logic_controller.MOVEMENT_DIRECTIONS[current_direction]):
+            continue
+        cell = _next_cell(snake.head, direction, engine_instance.shape)
+        if not any(placement.occupied[cell] for placement in placements):
+            safe_directions.append(direction)
+    return safe_directions
@@ -0,0 +1,345 @@
+"""
+This module contains the headless simulation engine of the snake game. The
+engine holds the boards of the game, takes a movement key per snake on every
+step and reports what happened as a list of events. It does not depend on
+pygame or on the game clock, so it can be driven by the pygame game loop, by
+the network code, or by bots and load tests running without a window.
+
+An engine can take a snapshot of its state and be restored to it later, so
+predicted moves can be rolled back and simulated again.
+"""
+from __future__ import annotations
+import dataclasses
+import random
+from enum import Enum
+from typing import Any
+from snakext.game.logic import logic_controller
+from snakext.game.state import state, board, snake_body, free_cells
+from snakext.utils import matrix
+
+# Start positions of the snakes, the same as in the two player game
+START_POSITIONS = (
+    matrix.middle_left_element_position,
+    matrix.middle_right_element_position,
+)
+
+
+class EventTypes(Enum):
+    MOVED = 1
+    ATE = 2
+    DIED = 3
+    BOARD_FULL = 4
+
+
+@dataclasses.dataclass
+class Event:
+    """
+    Something that happened to a snake during a step of the engine.
+
+    `snake` is the index of the snake in the engine, or -1 for events that
+    concern the whole board.
+    """
+    event_type: int
+    snake: int
+    coords: tuple[int, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class EngineSnapshot:
+    """
+    State of an engine after a tick: the coordinates of every snake from the
+    tail to the head, the food and the state of the random number generator.
+    """
+    snakes: tuple[tuple[tuple[int, int], ...], ...]
+    directions: tuple[int, ...]
+    grow: tuple[bool, ...]
+    alive: tuple[bool, ...]
+    tick_count: int
+    food: tuple[tuple[int, int], ...]
+    rng_state: tuple[Any, ...]
+
+
+class SnakeEngine:
+    """
+    Simulates the game rules of `logic_controller` for one or more snakes.
+
+    Obstacles are boards the simulated snakes collide with but which the
+    engine does not move, e.g. the remote snake in a multiplayer game. Food
+    eaters are boards of such snakes that eat food, by default the obstacles.
+    If the engine has food authority, it lets the food eaters eat food and
+    places new food whenever some was eaten. Food is placed with the random number
+    generator of the engine, so a seeded engine given the same movement keys
+    always plays the same game.
+    """
+
+    def __init__(
+        self,
+        food_placement: board.Board,
+        snakes: list[snake_body.SnakeBody],
+        obstacles: list[board.Board] | None = None,
+        food_authority: bool = True,
+        seed: int | None = None,
+        food_eaters: list[board.Board] | None = None,
+    ) -> None:
+        self.food_placement = food_placement
+        self.snakes = snakes
+        self.obstacles = obstacles if obstacles is not None else []
+        self.food_eaters = (food_eaters
+                            if food_eaters is not None else self.obstacles)
+        self.food_authority = food_authority
+        self.directions = [state.RIGHT_DIRECTION for _ in snakes]
+        self.grow = [False for _ in snakes]
+        self.alive = [True for _ in snakes]
+        self.tick_count = 0
+        self.rng = random.Random(seed)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.food_placement.shape
+
+    def is_over(self) -> bool:
+        return not any(self.alive)
+
+    def reset(self, seed: int | None = None) -> None:
+        """
+        Clears the boards and places the snakes and the first food again,
+        reusing the board buffers of the engine.
+
+        Args:
+            seed (int | None): New seed of the random number generator, the
+                generator keeps its state if not given.
+
+        Raises:
+            ValueError: If the engine has more snakes than start positions.
+        """
+        if len(self.snakes) > len(START_POSITIONS):
+            raise ValueError("Only one or two snakes are supported.")
+        if seed is not None:
+            self.rng.seed(seed)
+        for snake in self.snakes:
+            while len(snake) > 0:
+                snake.pop_tail()
+        for coords in board.cells_of_kind(self.food_placement,
+                                          board.FOOD_CELL):
+            self.food_placement.set_cell(coords, board.VOID_CELL)
+        for snake, choose_function in zip(self.snakes, START_POSITIONS):
+            logic_controller.place_initial_snake(
+                snake, choose_coordinates=choose_function)
+        self.directions = [state.RIGHT_DIRECTION for _ in self.snakes]
+        self.grow = [False for _ in self.snakes]
+        self.alive = [True for _ in self.snakes]
+        self.tick_count = 0
+        self._sort_free_cells()
+        self.place_food()
+
+    def step(self, movement_keys: list[int]) -> list[Event]:
+        """
+        Advances the game by one move of every living snake.
+
+        Args:
+            movement_keys (list[int]): Movement key of every snake, 0 keeps
+                the current direction.
+
+        Returns:
+            list[Event]: Events that happened during the step.
+        """
+        events: list[Event] = []
+        food_eaten = False
+        for index, snake in enumerate(self.snakes):
+            if not self.alive[index]:
+                continue
+            (_, self.directions[index],
+             moved) = logic_controller.move_snake(
+                 snake,
+                 self.directions[index],
+                 movement_keys[index],
+                 add_to_snake=self.grow[index],
+             )
+            if not moved:
+                self.alive[index] = False
+                events.append(
+                    Event(EventTypes.DIED.value, index, snake.head))
+                continue
+            events.append(Event(EventTypes.MOVED.value, index, snake.head))
+            _, self.grow[index] = logic_controller.handle_food_collision(
+                snake.placement,
+                self.food_placement,
+                head_coords=snake.head,
+            )
+            if self.grow[index]:
+                food_eaten = True
+                events.append(Event(EventTypes.ATE.value, index, snake.head))
+        events.extend(self._handle_snake_collisions())
+        if self.food_authority:
+            for food_eater in self.food_eaters:
+                _, eater_ate = logic_controller.handle_food_collision(
+                    food_eater,
+                    self.food_placement,
+                )
+                food_eaten = food_eaten or eater_ate
+            if food_eaten and not self.place_food():
+                events.append(
+                    Event(EventTypes.BOARD_FULL.value, -1,
+                          logic_controller.COORDINATES_NOT_FOUND))
+        self.tick_count += 1
+        return events
+
+    def snapshot(self) -> EngineSnapshot:
+        return EngineSnapshot(
+            snakes=tuple(tuple(snake.segments) for snake in self.snakes),
+            directions=tuple(self.directions),
+            grow=tuple(self.grow),
+            alive=tuple(self.alive),
+            tick_count=self.tick_count,
+            food=tuple(
+                board.cells_of_kind(self.food_placement, board.FOOD_CELL)),
+            rng_state=self.rng.getstate(),
+        )
+
+    def restore(self, snapshot: EngineSnapshot) -> None:
+        """
+        Restores the engine to a snapshot of it. Snakes and food that did not
+        change since the snapshot are left as they are.
+
+        Args:
+            snapshot (EngineSnapshot): A snapshot taken by this engine.
+        """
+        for snake, coordinates in zip(self.snakes, snapshot.snakes):
+            if tuple(snake.segments) != coordinates:
+                _restore_snake(snake, coordinates)
+        food = board.cells_of_kind(self.food_placement, board.FOOD_CELL)
+        if tuple(food) != snapshot.food:
+            for coords in food:
+                self.food_placement.set_cell(coords, board.VOID_CELL)
+            for coords in snapshot.food:
+                self.food_placement.set_cell(coords, board.FOOD_CELL)
+        self.directions = list(snapshot.directions)
+        self.grow = list(snapshot.grow)
+        self.alive = list(snapshot.alive)
+        self.tick_count = snapshot.tick_count
+        self.rng.setstate(snapshot.rng_state)
+
+    def place_food(self) -> bool:
+        """
+        Places food on a cell that is not occupied by any snake or food.
+
+        Returns:
+            bool: whether the food was placed successfully
+        """
+        if self.food_placement.free_cells is not None:
+            other_placement = self.food_placement
+        else:
+            other_placement = self._combined_placement()
+        return logic_controller.place_food(self.food_placement,
+                                           other_placement,
+                                           rng=self.rng)
+
+    def _sort_free_cells(self) -> None:
+        if self.food_placement.free_cells is not None:
+            self.food_placement.free_cells.sort()
+
+    def _handle_snake_collisions(self) -> list[Event]:
+        events: list[Event] = []
+        moved_into_other = [
+            self.alive[index] and any(
+                other.occupied[snake.head] for other in self._placements()
+                if other is not snake.placement)
+            for index, snake in enumerate(self.snakes)
+        ]
+        for index, collided in enumerate(moved_into_other):
+            if collided:
+                self.alive[index] = False
+                events.append(
+                    Event(EventTypes.DIED.value, index,
+                          self.snakes[index].head))
+        return events
+
+    def _placements(self) -> list[board.Board]:
+        return [snake.placement for snake in self.snakes] + self.obstacles
+
+    def _combined_placement(self) -> board.Board:
+        combined = board.make_board(self.shape)
+        for placement in self._placements():
+            combined = logic_controller._combine_bodies_on_grid(
+                combined, placement)
+        return combined
+
+
+def _restore_snake(snake: snake_body.SnakeBody,
+                   coordinates: tuple[tuple[int, int], ...]) -> None:
+    while len(snake) > 0:
+        snake.pop_tail()
+    for coords in coordinates:
+        snake.push_head(coords)
+
+
+def make_engine(
+    shape: tuple[int, int],
+    snake_count: int = 1,
+    seed: int | None = None,
+) -> SnakeEngine:
+    """
+    Creates an engine with new boards, places the snakes the same way as the
+    game does (the first one in the middle-left, the second one in the
+    middle-right part of the board) and places the first food.
+
+    Args:
+        shape (tuple[int, int]): Rows and columns of the board.
+        snake_count (int): Number of simulated snakes, 1 or 2.
+        seed (int | None): Seed of the random number generator of the engine.
+
+    Returns:
+        SnakeEngine: The engine ready to be stepped.
+
+    Raises:
+        ValueError: If the snake count is not supported.
+    """
+    free_cells_instance = free_cells.FreeCells(shape)
+    food_placement = board.make_board(shape, free_cells_instance)
+    snakes = [
+        snake_body.SnakeBody(board.make_board(shape, free_cells_instance))
+        for _ in range(snake_count)
+    ]
+    engine = SnakeEngine(food_placement, snakes, seed=seed)
+    engine.reset()
+    return engine
+
+
+def engine_from_state(
+    state_instance: state.State,
+    food_authority: bool,
+    seed: int | None = None,
+    remote_snake_obstacle: bool = True,
+) -> SnakeEngine:
+    """
+    Creates an engine that simulates the local snake of the game state on
+    the boards of the state. The remote snake eats food if the engine has
+    food authority, and is an obstacle unless its collisions are judged
+    outside of the engine.
+
+    Args:
+        state_instance (state.State): The game state.
+        food_authority (bool): Whether the engine places the food.
+        seed (int | None): Seed of the random number generator of the engine.
+        remote_snake_obstacle (bool): Whether the local snake dies on the
+            remote snake.
+
+    Returns:
+        SnakeEngine: The engine sharing the boards of the state.
+    """
+    engine = SnakeEngine(
+        state_instance.food_placement,
+        [state_instance.local_snake],
+        obstacles=([state_instance.remote_snake_placement]
+                   if remote_snake_obstacle else []),
+        food_authority=food_authority,
+        seed=seed,
+        food_eaters=[state_instance.remote_snake_placement],
+    )
+    engine.directions[0] = state_instance.movement_direction
+    engine.grow[0] = state_instance.add_do_snake
+    return engine
+
+
+def has_event(events: list[Event], event_type: EventTypes) -> bool:
+    return any(event.event_type == event_type.value for event in events)
@@ -5,9 +5,10 @@ grid, and updating the snake's movement and position. The module uses numpy for
 array manipulations and state management to track the game state.
 """
 import numpy as np
+import numpy.typing as npt
+import random
 import typing
-from snakext.game.state import state_types
-from snakext.utils import game_clock
+from snakext.game.state import board, snake_body
 from snakext.game.state import state
 from snakext.utils import matrix
 
@@ -18,213 +19,194 @@ MOVEMENT_DIRECTIONS = {
     state.BOTTOM_DIRECTION: (1, 0)
 }
 
-HEAD_PLACE = f"{state.SNAKE_HEAD_PLACE}0"
-INITIAL_BODY_PLACE = f"{state.SNAKE_BODY_PLACE}1"
-INITIAL_TAIL_PLACE = f"{state.SNAKE_TAIL_PLACE}2"
 COORDINATES_NOT_FOUND = (-1, -1)
 
 
 def handle_food_collision(
-    snake_placement: state_types.OBJECT_ND_ARRAY,
-    food_placement: state_types.OBJECT_ND_ARRAY,
-) -> tuple[state_types.OBJECT_ND_ARRAY, bool]:
+    snake_placement: board.Board,
+    food_placement: board.Board,
+    head_coords: tuple[int, int] | None = None,
+) -> tuple[board.Board, bool]:
     """
     Checks and handles collisions between the snake and food.
 
     Args:
-        snake_placement (state_types.OBJECT_ND_ARRAY): The current placement of the snake.
-        food_placement (state_types.OBJECT_ND_ARRAY): The current placement of the food.
+        snake_placement (board.Board): The current placement of the snake.
+        food_placement (board.Board): The current placement of the food.
+        head_coords (tuple[int, int] | None): Coordinates of the snake head, if
+            known. Only the head cell is looked up then.
 
     Returns:
-        tuple[state_types.OBJECT_ND_ARRAY, bool]: Updated food placement and a flag indicating collision.
+        tuple[board.Board, bool]: Updated food placement and a flag indicating collision.
     """
     collision_coordinates = _search_collision(snake_placement,
                                               food_placement,
-                                              only_head=False)
+                                              only_head=False,
+                                              head_coords=head_coords)
     collided = False
     if collision_coordinates != COORDINATES_NOT_FOUND:
         collided = True
-        food_placement[collision_coordinates] = state.VOID_PLACE
+        food_placement.set_cell(collision_coordinates, board.VOID_CELL)
     return (food_placement, collided)
 
 
 def check_remote_snake_collision(
-    local_snake_placement: state_types.OBJECT_ND_ARRAY,
-    remote_snake_placement: state_types.OBJECT_ND_ARRAY,
+    local_snake_placement: board.Board,
+    remote_snake_placement: board.Board,
 ) -> bool:
     """
     Checks for collisions between the local snake and a remote snake.
 
     Args:
-        local_snake_placement (state_types.OBJECT_ND_ARRAY): The placement of the local snake.
-        remote_snake_placement (state_types.OBJECT_ND_ARRAY): The placement of the remote snake.
+        local_snake_placement (board.Board): The placement of the local snake.
+        remote_snake_placement (board.Board): The placement of the remote snake.
 
     Returns:
         bool: True if there is a collision, False otherwise.
     """
-    collision_coordinates = _search_collision(local_snake_placement,
-                                              remote_snake_placement,
-                                              only_head=False)
-    return collision_coordinates != COORDINATES_NOT_FOUND
+    return bool(
+        np.logical_and(
+            local_snake_placement.occupied,
+            remote_snake_placement.occupied,
+        ).any())
 
 
 def place_food(
-    food_placement: state_types.OBJECT_ND_ARRAY,
-    other_placement: state_types.OBJECT_ND_ARRAY,
+    food_placement: board.Board,
+    other_placement: board.Board,
     choose_coordinates: typing.Callable[
-        [str, state_types.OBJECT_ND_ARRAY],
+        [int, npt.NDArray[np.int8], random.Random],
         tuple[int, int]] = matrix.choose_random_match,
-    where_to_place: str = state.VOID_PLACE,
+    where_to_place: int = board.VOID_CELL,
+    rng: random.Random = matrix.DEFAULT_RNG,
 ) -> bool:
     """
     Places food on the grid in a location not occupied by the snake.
 
+    If the food placement shares a free cell index with the other boards, a
+    free cell is chosen from it in constant time. Otherwise the cell is
+    chosen from the combined occupancy of the food and the other placement.
+
     Args:
-        food_placement (state_types.OBJECT_ND_ARRAY): The current placement of the food.
-        other_placement (state_types.OBJECT_ND_ARRAY): The placement of the snake or other objects.
-        choose_coordinates (Callable): Function to choose coordinates for placing food.
-        where_to_place (str): The type of place to search for placement.
+        food_placement (board.Board): The current placement of the food.
+        other_placement (board.Board): The placement of the snake or other objects.
+        choose_coordinates (Callable): Function to choose coordinates for placing food
+            when there is no free cell index.
+        where_to_place (int): The cell kind to search for placement.
+        rng (random.Random): The random number generator choosing the cell.
 
     Returns:
         bool: whether the food was placed successfully
     """
-    i, k = choose_coordinates(where_to_place, food_placement)
+    if food_placement.free_cells is not None:
+        i, k = food_placement.free_cells.choose(rng.randrange)
+    else:
+        occupancy = np.maximum(food_placement.kinds, other_placement.kinds)
+        i, k = choose_coordinates(where_to_place, occupancy, rng)
     place_found = (i, k) != COORDINATES_NOT_FOUND
     if place_found:
-        food_placement[i, k] = state.FOOD_PLACE
+        food_placement.set_cell((i, k), board.FOOD_CELL)
     return place_found
 
 
-def placement_array(
-        placement: state_types.OBJECT_ND_ARRAY) -> list[tuple[int, int]]:
-    placement_arr: list[tuple[int, int]] = []
+def placement_array(placement: board.Board) -> list[tuple[int, int]]:
     """
     Converts a placement grid into a list of coordinates.
 
     Args:
-        placement (state_types.OBJECT_ND_ARRAY): The placement grid to convert.
+        placement (board.Board): The placement grid to convert.
 
     Returns:
         list[tuple[int, int]]: A list of coordinates where objects are placed.
     """
-    for i, row in enumerate(placement):
-        for k, place in enumerate(row):
-            if place != state.VOID_PLACE:
-                placement_arr.append((i, k))
-    return placement_arr
+    return [(int(i), int(k))
+            for i, k in np.argwhere(placement.kinds != board.VOID_CELL)]
 
 
 def placement_from_array(
     placement_arr: list[tuple[int, int]],
     shape: tuple[int, int],
-    place_str: str,
-) -> state_types.OBJECT_ND_ARRAY:
+    cell_kind: int,
+) -> board.Board:
     """
     Converts a list of coordinates back into a placement grid.
 
     Args:
         placement_arr (list[tuple[int, int]]): List of coordinates.
         shape (tuple[int, int]): Shape of the grid.
-        place_str (str): String identifier for the placement.
+        cell_kind (int): Cell kind to place at the coordinates.
 
     Returns:
-        state_types.OBJECT_ND_ARRAY: The reconstructed placement grid.
+        board.Board: The reconstructed placement grid.
     """
-    placement = np.full(shape, state.VOID_PLACE, dtype=np.object_)
-    for i, row in enumerate(placement):
-        for k, place in enumerate(row):
-            if [i, k] in placement_arr:
-                placement[i, k] = place_str
+    placement = board.make_board(shape)
+    if len(placement_arr) > 0:
+        rows, cols = np.asarray(placement_arr, dtype=np.intp).T
+        placement.kinds[rows, cols] = cell_kind
+        placement.occupied[rows, cols] = True
+        if cell_kind in board.SNAKE_CELLS:
+            placement.segments[rows, cols] = 0
     return placement
 
 
 def place_initial_snake(
-    snake_placement: state_types.OBJECT_ND_ARRAY,
-    choose_coordinates: typing.Callable[[state_types.OBJECT_ND_ARRAY], tuple[
+    snake: snake_body.SnakeBody,
+    choose_coordinates: typing.Callable[[npt.NDArray[np.int8]], tuple[
         int, int]] = matrix.middle_left_element_position
-) -> state_types.OBJECT_ND_ARRAY:
+) -> snake_body.SnakeBody:
     """
     Places the initial snake on the grid.
 
     Args:
-        snake_placement (state_types.OBJECT_ND_ARRAY): The grid to place the snake on.
+        snake (snake_body.SnakeBody): The snake to place on its grid.
         choose_coordinates (Callable): Function to choose the initial coordinates for the snake.
 
     Returns:
-        state_types.OBJECT_ND_ARRAY: Updated grid with the initial snake placement.
+        snake_body.SnakeBody: The snake with its initial placement.
 
     Raises:
         ValueError: If the snake is already initialized.
     """
-    initial_places = [
-        el for row in snake_placement for el in row if el == HEAD_PLACE
-    ]
-    if len(initial_places) > 0:
+    if check_for_headless(snake):
         raise ValueError("Snake is already initialized.")
-    i, k = choose_coordinates(snake_placement)
-
-    snake_placement[i, k + 1] = HEAD_PLACE
-    snake_placement[i, k] = INITIAL_BODY_PLACE
-    snake_placement[i, k - 1] = INITIAL_TAIL_PLACE
-    return snake_placement
+    i, k = choose_coordinates(snake.placement.kinds)
 
-
-def _increment_place(place: str) -> str:
-    incremented_number = int(place[1:]) + 1
-    place = f"{place[0]}{incremented_number}"
-    return place
+    snake.push_head((i, k - 1))
+    snake.push_head((i, k))
+    snake.push_head((i, k + 1))
+    return snake
 
 
 def move_snake(
-    snake_placement: state_types.OBJECT_ND_ARRAY,
+    snake: snake_body.SnakeBody,
     movement_direction: int,
     movement_key: int,
     add_to_snake: bool = False,
-) -> tuple[state_types.OBJECT_ND_ARRAY, int, bool]:
+) -> tuple[board.Board, int, bool]:
     """
     Moves the snake in the given direction.
 
+    The snake and its placement are changed in place: the new head is pushed
+    and, unless the snake grows, the tail is popped, so a move costs constant
+    time.
+
     Args:
-        snake_placement (state_types.OBJECT_ND_ARRAY): Current snake placement.
+        snake (snake_body.SnakeBody): The snake to move.
         movement_direction (int): The current direction of movement.
         movement_key (int): The new direction of movement.
         add_to_snake (bool): Flag to indicate whether to grow the snake.
 
     Returns:
-        tuple[state_types.OBJECT_ND_ARRAY, int, bool]: New snake placement, new movement direction, and success flag.
+        tuple[board.Board, int, bool]: Snake placement, new movement direction, and success flag.
     """
-    new_snake_placement = np.copy(snake_placement)
-
-    tail_coords = matrix.matrix_substring_element_coordinates(
-        state.SNAKE_TAIL_PLACE, new_snake_placement)
-    tail_place = new_snake_placement[tail_coords]
-    tail_number = int(tail_place[1:])
-    new_tail_coords = matrix.matrix_substring_element_coordinates(
-        f"{state.SNAKE_BODY_PLACE}{tail_number - 1}", new_snake_placement)
-
-    head_coords = matrix.matrix_substring_element_coordinates(
-        state.SNAKE_HEAD_PLACE, new_snake_placement)
-    new_snake_placement[head_coords] = _change_place(
-        new_snake_placement[head_coords], state.SNAKE_BODY_PLACE, number=0)
     movement_key, movement_direction, movement_vector = _movement_attributes(
         movement_direction,
         movement_key,
     )
-
-    new_snake_placement = _increment_snake_places(new_snake_placement)
-    new_snake_placement, movement_successful = _move_head(
-        new_snake_placement, head_coords, movement_vector)
-
+    movement_successful = _move_head(snake, movement_vector)
     if not add_to_snake and movement_successful:
-        new_snake_placement[tail_coords] = state.VOID_PLACE
-        new_snake_placement[new_tail_coords] = _change_place(
-            new_snake_placement[new_tail_coords], state.SNAKE_TAIL_PLACE,
-            tail_number)
-
-    if not movement_successful:
-        new_snake_placement = snake_placement
-
-    return new_snake_placement, movement_direction, movement_successful
+        snake.pop_tail()
+    return snake.placement, movement_direction, movement_successful
 
 
 def _movement_attributes(
@@ -242,134 +224,78 @@ def _movement_attributes(
     return movement_key, movement_direction, movement_vector
 
 
-def check_for_headless(snake_placement: state_types.OBJECT_ND_ARRAY) -> bool:
+def check_for_headless(snake: snake_body.SnakeBody) -> bool:
     """
     Checks if the snake is headless in the current placement.
 
     Args:
-        snake_placement (state_types.OBJECT_ND_ARRAY): The current snake placement.
+        snake (snake_body.SnakeBody): The snake to check.
 
     Returns:
         bool: True if the snake is headless, False otherwise.
     """
-    return matrix.matrix_substring_element_coordinates(
-        state.SNAKE_HEAD_PLACE, snake_placement) != COORDINATES_NOT_FOUND
+    return len(snake) > 0
 
 
-def headless_placement(
-    snake_placement: state_types.OBJECT_ND_ARRAY
-) -> state_types.OBJECT_ND_ARRAY:
+def headless_placement(snake_placement: board.Board) -> board.Board:
     """
     Generates a placement grid for the snake without its head.
 
     Args:
-        snake_placement (state_types.OBJECT_ND_ARRAY): The current snake placement.
+        snake_placement (board.Board): The current snake placement.
 
     Returns:
-        state_types.OBJECT_ND_ARRAY: The snake placement without the head.
+        board.Board: The snake placement without the head.
     """
-    head_coords = matrix.matrix_substring_element_coordinates(
-        state.SNAKE_HEAD_PLACE, snake_placement)
+    head_coords = board.first_cell_of_kind(snake_placement,
+                                           board.SNAKE_HEAD_CELL)
     headless_placement = snake_placement
     if head_coords != COORDINATES_NOT_FOUND:
-        headless_placement = np.copy(snake_placement)
-        headless_placement[head_coords] = state.VOID_PLACE
+        headless_placement = snake_placement.copy()
+        headless_placement.set_cell(head_coords, board.VOID_CELL)
     return headless_placement
 
 
-def check_collision(placement1: state_types.OBJECT_ND_ARRAY,
-                    placement2: state_types.OBJECT_ND_ARRAY,
-                    only_head: bool = True) -> bool:
+def check_collision(placement1: board.Board,
+                    placement2: board.Board,
+                    only_head: bool = True,
+                    head_coords: tuple[int, int] | None = None) -> bool:
     """
     Checks for a collision between two placements.
 
     Args:
-        placement1 (state_types.OBJECT_ND_ARRAY): First placement grid.
-        placement2 (state_types.OBJECT_ND_ARRAY): Second placement grid.
+        placement1 (board.Board): First placement grid.
+        placement2 (board.Board): Second placement grid.
         only_head (bool): Flag to consider only the head for collision.
+        head_coords (tuple[int, int] | None): Coordinates of the head of the
+            first placement, if known. Only the head cell is looked up then.
 
     Returns:
         bool: True if there is a collision, False otherwise.
     """
     collision_found = _search_collision(
-        placement1, placement2, only_head=only_head) != COORDINATES_NOT_FOUND
+        placement1, placement2, only_head=only_head,
+        head_coords=head_coords) != COORDINATES_NOT_FOUND
     return collision_found
 
 
-def handle_snake_movement(
-    state_instance: state.State,
-    movement_key: int,
-    local_communication_state: state.TransmittedState,
-    remote_communication_state: state.TransmittedState,
-) -> bool:
-    """
-    Handles the movement of the snake based on the current state and movement key.
-
-    Args:
-        state_instance (state.State): The current game state.
-        movement_key (int): The key indicating the new direction of movement.
-        local_communication_state (state.TransmittedState): The local communication state.
-        remote_communication_state (state.TransmittedState): The remote communication state.
-
-    Returns:
-        bool: True if the movement was successful, False otherwise.
-    """
-    if game_clock.moves():
-        state_instance.previous_snake_placement = state_instance.local_snake_placement
-        (state_instance.local_snake_placement,
-         state_instance.movement_direction, movement_successful) = move_snake(
-             state_instance.local_snake_placement,
-             state_instance.movement_direction,
-             movement_key,
-             add_to_snake=state_instance.add_do_snake,
-         )
-        if not movement_successful:
-            return False
-        state_instance.food_placement, state_instance.add_do_snake = handle_food_collision(
-            state_instance.local_snake_placement,
-            state_instance.food_placement,
-        )
-        add_to_remote_snake = False
-        if state_instance.multiplayer and state.is_host(
-                local_communication_state, remote_communication_state):
-            state_instance.food_placement, add_to_remote_snake = handle_food_collision(
-                state_instance.remote_snake_placement,
-                state_instance.food_placement,
-            )
-        if state_instance.multiplayer and (
-                state_instance.add_do_snake
-                or add_to_remote_snake) and state.is_host(
-                    local_communication_state, remote_communication_state):
-            food_placed = place_food(
-                state_instance.food_placement,
-                _combine_bodies_on_grid(
-                    state_instance.local_snake_placement,
-                    state_instance.remote_snake_placement,
-                ))
-            if not food_placed:
-                return False
-        elif not state_instance.multiplayer and state_instance.add_do_snake:
-            food_placed = place_food(
-                state_instance.food_placement,
-                state_instance.local_snake_placement,
-            )
-            if not food_placed:
-                return False
-    return True
-
-
-def _search_collision(placement1: state_types.OBJECT_ND_ARRAY,
-                      placement2: state_types.OBJECT_ND_ARRAY,
-                      only_head: bool = False) -> tuple[int, int]:
-    coordinates = COORDINATES_NOT_FOUND
-    for i, row in enumerate(placement1):
-        for k, place in enumerate(row):
-            if (not only_head or placement1[i, k][0] == state.SNAKE_HEAD_PLACE
-                ) and placement1[i, k] != state.VOID_PLACE and placement2[
-                    i, k] != state.VOID_PLACE:
-                coordinates = (i, k)
-                break
-    return coordinates
+def _search_collision(
+        placement1: board.Board,
+        placement2: board.Board,
+        only_head: bool = False,
+        head_coords: tuple[int, int] | None = None) -> tuple[int, int]:
+    if head_coords is not None:
+        is_collision = (placement1.occupied[head_coords]
+                        and placement2.occupied[head_coords])
+        return head_coords if is_collision else COORDINATES_NOT_FOUND
+    colliding = placement1.occupied & placement2.occupied
+    if only_head:
+        colliding &= placement1.kinds == board.SNAKE_HEAD_CELL
+    flat_matches = np.flatnonzero(colliding)
+    if flat_matches.size == 0:
+        return COORDINATES_NOT_FOUND
+    i, k = np.unravel_index(flat_matches[0], colliding.shape)
+    return (int(i), int(k))
 
 
 def _is_opposite(vec1: tuple[int, int], vec2: tuple[int, int]) -> bool:
@@ -377,56 +303,31 @@ def _is_opposite(vec1: tuple[int, int], vec2: tuple[int, int]) -> bool:
     return opposite
 
 
-def _increment_snake_places(
-    snake_placement: state_types.OBJECT_ND_ARRAY
-) -> state_types.OBJECT_ND_ARRAY:
-    initial_shape = snake_placement.shape
-    snake_placement = np.array([
-        _increment_place(place) if place != state.VOID_PLACE else place
-        for row in snake_placement for place in row
-    ]).reshape(initial_shape)
-    return snake_placement
-
-
 def _move_head(
-    snake_placement: state_types.OBJECT_ND_ARRAY,
-    snake_head_coords: tuple[int, int],
-    movement_vector: tuple[int,
-                           int]) -> tuple[state_types.OBJECT_ND_ARRAY, bool]:
+    snake: snake_body.SnakeBody,
+    movement_vector: tuple[int, int],
+) -> bool:
+    snake_head_coords = snake.head
     new_snake_head_coords = (snake_head_coords[0] + movement_vector[0],
                              snake_head_coords[1] + movement_vector[1])
-    dim_y, dim_x = snake_placement.shape
+    dim_y, dim_x = snake.placement.shape
     new_snake_head_coords = (new_snake_head_coords[0] % dim_y,
                              new_snake_head_coords[1] % dim_x)
-    is_occupied = snake_placement[new_snake_head_coords] != state.VOID_PLACE
+    is_occupied = snake.placement.occupied[new_snake_head_coords]
     if not is_occupied:
-        snake_placement[new_snake_head_coords] = HEAD_PLACE
-    return snake_placement, not is_occupied
-
-
-def _change_place(place: str,
-                  letter: str | None = None,
-                  number: int = -1) -> str:
-    letter = letter if letter else place[0]
-    number = number if number != -1 else int(place[1])
-    new_place = f"{letter}{number}"
-    return new_place
+        snake.push_head(new_snake_head_coords)
+    return not is_occupied
 
 
 def _combine_bodies_on_grid(
-    grid_1: state_types.OBJECT_ND_ARRAY,
-    grid_2: state_types.OBJECT_ND_ARRAY,
-) -> state_types.OBJECT_ND_ARRAY:
-    shape = grid_1.shape
-    combined_grid = np.full(shape, state.VOID_PLACE, dtype=np.object_)
-    for i, rows in enumerate(zip(grid_1, grid_2)):
-        row1, row2 = rows
-        for k, cols in enumerate(zip(row1, row2)):
-            col1, col2 = cols
-            is_body = col1[0] in state.SNAKE_PLACES or col2[
-                0] in state.SNAKE_BODY_PLACE
-            combined_grid[
-                i,
-                k,
-            ] = f"{state.SNAKE_BODY_PLACE}0" if is_body else state.VOID_PLACE
+    grid_1: board.Board,
+    grid_2: board.Board,
+) -> board.Board:
+    is_body = grid_1.occupied | grid_2.occupied
+    combined_grid = board.Board(
+        kinds=np.where(is_body, board.SNAKE_BODY_CELL,
+                       board.VOID_CELL).astype(board.KIND_DTYPE),
+        segments=np.where(is_body, 0,
+                          board.NO_SEGMENT).astype(board.SEGMENT_DTYPE),
+    )
     return combined_grid
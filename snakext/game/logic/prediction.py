@@ -0,0 +1,138 @@
+"""
+This module predicts the remote snake of a multiplayer game. The received
+remote snake is always behind by the network delay, so it is moved on along
+its last known direction once for every move period since the other player
+sent it, for at most `MAX_PREDICTION_MOVES` moves. When an update of the
+remote snake arrives, the predicted moves are rolled back to the last
+received snake by restoring an engine snapshot, the update is applied and
+the moves up to now are predicted again.
+
+The send time is taken from the clock of the other player, so the clocks of
+both players are assumed to be synchronized; the limit on predicted moves
+bounds the error if they are not.
+"""
+from __future__ import annotations
+from snakext.game.logic import engine, logic_controller, turn_buffer
+from snakext.game.state import state, board, snake_body
+
+MAX_PREDICTION_MOVES = 3
+UNKNOWN_TICK = -1
+
+
+class RemoteSnakePredictor:
+    """
+    Predicts the moves of the remote snake on its own engine. The engine has
+    a food board of its own and no food authority, so predicted moves never
+    eat the food of the game, and it stops a predicted snake that would hit
+    itself or an obstacle.
+    """
+
+    def __init__(
+        self,
+        remote_snake: snake_body.SnakeBody,
+        obstacles: list[board.Board],
+        move_seconds: float,
+        max_moves: int = MAX_PREDICTION_MOVES,
+    ) -> None:
+        self.engine = engine.SnakeEngine(
+            board.make_board(remote_snake.placement.shape),
+            [remote_snake],
+            obstacles=obstacles,
+            food_authority=False,
+        )
+        self.move_seconds = move_seconds
+        self.max_moves = max_moves
+        self.received: engine.EngineSnapshot | None = None
+        self.sent_time = 0.0
+
+    @property
+    def snake(self) -> snake_body.SnakeBody:
+        return self.engine.snakes[0]
+
+    @property
+    def tick(self) -> int:
+        """
+        Returns:
+            int: Tick of the last received snake, `UNKNOWN_TICK` if the
+                remote snake is not predicted.
+        """
+        return self.received.tick_count if self.received else UNKNOWN_TICK
+
+    def roll_back(self) -> None:
+        """
+        Restores the last received snake, undoing the predicted moves.
+        """
+        if self.received is not None:
+            self.engine.restore(self.received)
+
+    def accept(self, tick: int, sent_time: float, current_time: float) -> None:
+        """
+        Takes the snake, after received updates were applied to it, as the
+        authoritative remote snake and predicts it up to the current time.
+
+        Args:
+            tick (int): Tick of the received snake, `UNKNOWN_TICK` to show it
+                without prediction.
+            sent_time (float): `time.time` the other player sent the snake
+                at, right after its move.
+            current_time (float): The current `time.time`.
+        """
+        if tick == UNKNOWN_TICK or len(self.snake) < 2:
+            self.received = None
+            return
+        self.engine.directions[0] = _direction_of(self.snake)
+        self.engine.grow[0] = False
+        self.engine.alive[0] = True
+        self.engine.tick_count = tick
+        self.received = self.engine.snapshot()
+        self.sent_time = sent_time
+        self.predict(current_time)
+
+    def predict(self, current_time: float) -> None:
+        """
+        Moves the snake along its direction once for every move period since
+        it was sent, up to `max_moves` moves past the received tick.
+
+        Args:
+            current_time (float): The current `time.time`.
+        """
+        if self.received is None:
+            return
+        elapsed_moves = int(
+            max(current_time - self.sent_time, 0.0) / self.move_seconds)
+        target_tick = self.received.tick_count + min(elapsed_moves,
+                                                     self.max_moves)
+        while self.engine.tick_count < target_tick and self.engine.alive[0]:
+            self.engine.step([turn_buffer.NO_TURN])
+
+    def received_coordinates(self) -> tuple[tuple[int, int], ...]:
+        """
+        Returns:
+            tuple[tuple[int, int], ...]: Coordinates of the last received
+                snake, without the predicted moves.
+        """
+        if self.received is None:
+            return tuple(self.snake.segments)
+        return self.received.snakes[0]
+
+
+def _direction_of(snake: snake_body.SnakeBody) -> int:
+    """
+    Returns the direction of the last move of a snake, also across the edges
+    of the board.
+
+    Args:
+        snake (snake_body.SnakeBody): A snake of at least two cells.
+
+    Returns:
+        int: The direction.
+    """
+    (neck_i, neck_k), (head_i, head_k) = snake.segments[-2], snake.head
+    rows, cols = snake.placement.shape
+    vector = ((head_i - neck_i + 1) % rows - 1,
+              (head_k - neck_k + 1) % cols - 1)
+    for direction, direction_vector in (
+            logic_controller.MOVEMENT_DIRECTIONS.items()):
+        if direction_vector == vector:
+            return direction
+    return state.RIGHT_DIRECTION
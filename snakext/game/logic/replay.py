@@ -0,0 +1,237 @@
+"""
+This module records and plays back replays of engine games. Since a seeded
+engine is deterministic, a replay stores only the seed, the initial layout
+of the board and the movement keys of every tick. The keys are packed into
+4-bit codes and compressed, so a full match fits in a few kilobytes, and
+playback re-simulates the game as fast as the engine can step.
+
+Binary layout (big-endian):
+    header   magic, version, rows, cols, snake count, seed, tick count
+    snakes   per snake: direction, length, (row, col) from tail to head
+    food     count, (row, col) of every food cell
+    inputs   zlib-compressed 4-bit movement keys, tick by tick
+"""
+from __future__ import annotations
+import dataclasses
+import struct
+import zlib
+from typing import Callable
+from snakext.game.logic import engine
+from snakext.game.state import board, snake_body, free_cells
+
+REPLAY_MAGIC = b"SNKR"
+REPLAY_VERSION = 1
+HEADER_FORMAT = ">4sBHHBQI"
+SNAKE_FORMAT = ">BH"
+COUNT_FORMAT = ">H"
+COORDINATES_FORMAT = ">HH"
+KEYS_PER_BYTE = 2
+KEY_BITS = 4
+KEY_MASK = 0x0F
+SEED_MASK = 2**64 - 1
+
+INVALID_REPLAY_MESSAGE = "Data is not a snake replay"
+UNSUPPORTED_VERSION_MESSAGE = "Unsupported replay version"
+
+
+@dataclasses.dataclass
+class Replay:
+    """
+    Everything needed to re-simulate a game on the engine.
+    """
+    shape: tuple[int, int]
+    seed: int
+    directions: list[int]
+    snakes: list[list[tuple[int, int]]]
+    food: list[tuple[int, int]]
+    inputs: list[tuple[int, ...]] = dataclasses.field(default_factory=list)
+
+
+class ReplayRecorder:
+    """
+    Records a game of an engine, starting from its current layout. Starting
+    a recording reseeds the engine, so the recorded seed and layout fully
+    determine the rest of the game. A recording should start after a reset,
+    before any snake has eaten.
+    """
+
+    def __init__(self, engine_instance: engine.SnakeEngine, seed: int) -> None:
+        engine_instance.rng.seed(seed)
+        engine_instance._sort_free_cells()
+        self.engine = engine_instance
+        self.replay = Replay(
+            shape=engine_instance.shape,
+            seed=seed,
+            directions=list(engine_instance.directions),
+            snakes=[snake.coordinates() for snake in engine_instance.snakes],
+            food=board.cells_of_kind(engine_instance.food_placement,
+                                     board.FOOD_CELL),
+        )
+
+    def step(self, movement_keys: list[int]) -> list[engine.Event]:
+        """
+        Records the movement keys and steps the engine with them.
+
+        Args:
+            movement_keys (list[int]): Movement key of every snake.
+
+        Returns:
+            list[engine.Event]: Events of the step.
+        """
+        self.replay.inputs.append(tuple(movement_keys))
+        return self.engine.step(movement_keys)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as replay_file:
+            replay_file.write(encode_replay(self.replay))
+
+
+def encode_replay(replay: Replay) -> bytes:
+    """
+    Encodes a replay into the compact binary format.
+
+    Args:
+        replay (Replay): The replay to encode.
+
+    Returns:
+        bytes: The encoded replay.
+    """
+    rows, cols = replay.shape
+    chunks = [
+        struct.pack(HEADER_FORMAT, REPLAY_MAGIC, REPLAY_VERSION, rows, cols,
+                    len(replay.snakes), replay.seed & SEED_MASK,
+                    len(replay.inputs))
+    ]
+    for direction, coordinates in zip(replay.directions, replay.snakes):
+        chunks.append(struct.pack(SNAKE_FORMAT, direction, len(coordinates)))
+        chunks.extend(
+            struct.pack(COORDINATES_FORMAT, *coords) for coords in coordinates)
+    chunks.append(struct.pack(COUNT_FORMAT, len(replay.food)))
+    chunks.extend(
+        struct.pack(COORDINATES_FORMAT, *coords) for coords in replay.food)
+    chunks.append(zlib.compress(_pack_inputs(replay.inputs)))
+    return b"".join(chunks)
+
+
+def decode_replay(data: bytes) -> Replay:
+    """
+    Decodes a replay from the binary format.
+
+    Args:
+        data (bytes): The encoded replay.
+
+    Returns:
+        Replay: The decoded replay.
+
+    Raises:
+        ValueError: If the data is not a replay of a supported version.
+    """
+    if not data.startswith(REPLAY_MAGIC):
+        raise ValueError(INVALID_REPLAY_MESSAGE)
+    (_, version, rows, cols, snake_count, seed,
+     tick_count) = struct.unpack_from(HEADER_FORMAT, data)
+    if version != REPLAY_VERSION:
+        raise ValueError(UNSUPPORTED_VERSION_MESSAGE)
+    offset = struct.calcsize(HEADER_FORMAT)
+    directions = []
+    snakes = []
+    for _ in range(snake_count):
+        direction, length = struct.unpack_from(SNAKE_FORMAT, data, offset)
+        offset += struct.calcsize(SNAKE_FORMAT)
+        coordinates, offset = _unpack_coordinates(data, offset, length)
+        directions.append(direction)
+        snakes.append(coordinates)
+    (food_count, ) = struct.unpack_from(COUNT_FORMAT, data, offset)
+    offset += struct.calcsize(COUNT_FORMAT)
+    food, offset = _unpack_coordinates(data, offset, food_count)
+    inputs = _unpack_inputs(zlib.decompress(data[offset:]), tick_count,
+                            snake_count)
+    return Replay((rows, cols), seed, directions, snakes, food, inputs)
+
+
+def load_replay(path: str) -> Replay:
+    with open(path, "rb") as replay_file:
+        return decode_replay(replay_file.read())
+
+
+def replay_engine(replay: Replay) -> engine.SnakeEngine:
+    """
+    Creates an engine in the initial state of a replay.
+
+    Args:
+        replay (Replay): The replay.
+
+    Returns:
+        engine.SnakeEngine: The engine before the first recorded tick.
+    """
+    free_cells_instance = free_cells.FreeCells(replay.shape)
+    food_placement = board.make_board(replay.shape, free_cells_instance)
+    snakes = []
+    for coordinates in replay.snakes:
+        snake = snake_body.SnakeBody(
+            board.make_board(replay.shape, free_cells_instance))
+        for coords in coordinates:
+            snake.push_head(coords)
+        snakes.append(snake)
+    for coords in replay.food:
+        food_placement.set_cell(coords, board.FOOD_CELL)
+    engine_instance = engine.SnakeEngine(food_placement,
+                                         snakes,
+                                         seed=replay.seed)
+    engine_instance.directions = list(replay.directions)
+    free_cells_instance.sort()
+    return engine_instance
+
+
+def play_replay(
+    replay: Replay,
+    on_step: Callable[[engine.SnakeEngine, list[engine.Event]], None]
+    | None = None,
+) -> engine.SnakeEngine:
+    """
+    Re-simulates a replay without any delay between ticks.
+
+    Args:
+        replay (Replay): The replay to play.
+        on_step (Callable | None): Called with the engine and the events
+            after every tick, e.g. to draw the board.
+
+    Returns:
+        engine.SnakeEngine: The engine after the last recorded tick.
+    """
+    engine_instance = replay_engine(replay)
+    for movement_keys in replay.inputs:
+        events = engine_instance.step(list(movement_keys))
+        if on_step is not None:
+            on_step(engine_instance, events)
+    return engine_instance
+
+
+def _pack_inputs(inputs: list[tuple[int, ...]]) -> bytes:
+    keys = [key & KEY_MASK for movement_keys in inputs for key in movement_keys]
+    if len(keys) % KEYS_PER_BYTE:
+        keys.append(0)
+    return bytes((keys[index] << KEY_BITS) | keys[index + 1]
+                 for index in range(0, len(keys), KEYS_PER_BYTE))
+
+
+def _unpack_inputs(packed: bytes, tick_count: int,
+                   snake_count: int) -> list[tuple[int, ...]]:
+    keys = []
+    for byte in packed:
+        keys.append(byte >> KEY_BITS)
+        keys.append(byte & KEY_MASK)
+    return [
+        tuple(keys[tick * snake_count:(tick + 1) * snake_count])
+        for tick in range(tick_count)
+    ]
+
+
+def _unpack_coordinates(data: bytes, offset: int,
+                        count: int) -> tuple[list[tuple[int, int]], int]:
+    coordinates = []
+    for _ in range(count):
+        i, k = struct.unpack_from(COORDINATES_FORMAT, data, offset)
+        coordinates.append((i, k))
+        offset += struct.calcsize(COORDINATES_FORMAT)
+    return coordinates, offset
@@ -0,0 +1,98 @@
+"""
+This module buffers the turns of the local snake between moves. Key presses
+are read from the event queue as they happen and queued here, and every move
+of the snake consumes one queued turn, so quick combinations like up and then
+left while moving right turn the snake twice instead of losing the first key.
+The buffer also measures the latency from a key press to the move it causes.
+"""
+from __future__ import annotations
+import collections
+import dataclasses
+from snakext.game.logic import logic_controller
+
+TURN_BUFFER_SIZE = 3
+NO_TURN = 0
+
+
+@dataclasses.dataclass
+class LatencyStats:
+    """
+    Latency from key presses to the moves they caused, in seconds.
+    """
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, latency: float) -> None:
+        self.count += 1
+        self.total += latency
+        self.maximum = max(self.maximum, latency)
+
+    def summary(self) -> str:
+        return (f"Input latency over {self.count} turns: "
+                f"mean {self.mean * 1000:.1f} ms, "
+                f"max {self.maximum * 1000:.1f} ms")
+
+
+class TurnBuffer:
+    """
+    Bounded queue of turns, each a direction and the time its key was
+    pressed. Turns that would not change the direction of the snake, or that
+    would reverse it, are not queued, and turns are dropped when the buffer
+    is full.
+    """
+
+    def __init__(self, capacity: int = TURN_BUFFER_SIZE) -> None:
+        self.turns: collections.deque[tuple[int, float]] = collections.deque()
+        self.capacity = capacity
+        self.latency = LatencyStats()
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def push(self, direction: int, current_direction: int,
+             pressed_time: float) -> bool:
+        """
+        Queues a turn.
+
+        Args:
+            direction (int): Direction of the pressed key.
+            current_direction (int): Direction the snake is moving in now.
+            pressed_time (float): `time.perf_counter` time of the key press.
+
+        Returns:
+            bool: Whether the turn was queued.
+        """
+        previous_direction = (self.turns[-1][0]
+                              if self.turns else current_direction)
+        if (len(self.turns) >= self.capacity
+                or direction == previous_direction
+                or logic_controller._is_opposite(
+                    logic_controller.MOVEMENT_DIRECTIONS[direction],
+                    logic_controller.MOVEMENT_DIRECTIONS[previous_direction])):
+            return False
+        self.turns.append((direction, pressed_time))
+        return True
+
+    def pop(self, move_time: float) -> int:
+        """
+        Takes the oldest turn for a move and records its latency.
+
+        Args:
+            move_time (float): `time.perf_counter` time of the move.
+
+        Returns:
+            int: Direction of the turn, or `NO_TURN` to keep the direction.
+        """
+        if not self.turns:
+            return NO_TURN
+        direction, pressed_time = self.turns.popleft()
+        self.latency.add(move_time - pressed_time)
+        return direction
+
+    def clear(self) -> None:
+        self.turns.clear()
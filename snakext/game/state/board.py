@@ -0,0 +1,171 @@
+"""
+Contains the integer-coded board representation of the game. Every cell of a
+board stores a small integer kind (void, food or a part of a snake) and an
+integer segment index, so the game logic and the renderer can work with plain
+numpy arrays instead of object arrays of per-cell strings.
+"""
+from __future__ import annotations
+import dataclasses
+import numpy as np
+from snakext.game.state import state_types, free_cells as free_cells_module
+
+VOID_CELL = 0
+FOOD_CELL = 1
+SNAKE_TAIL_CELL = 2
+SNAKE_BODY_CELL = 3
+SNAKE_HEAD_CELL = 4
+SNAKE_CELLS: tuple[int, ...] = (
+    SNAKE_TAIL_CELL,
+    SNAKE_BODY_CELL,
+    SNAKE_HEAD_CELL,
+)
+NO_SEGMENT = -1
+
+KIND_DTYPE = np.int8
+SEGMENT_DTYPE = np.int32
+
+
+@dataclasses.dataclass
+class Board:
+    """
+    Integer-coded placement of one layer of the game (a snake or the food).
+
+    `kinds` holds the kind of every cell. `segments` holds the index of the
+    snake segment occupying the cell, counted from the tail, so the tail has
+    the lowest and the head the highest index. Cells that are not a part of a
+    snake have the index `NO_SEGMENT`.
+
+    `occupied` is a boolean mask of the non-void cells used for collision
+    checks. Boards of the game state also share a free cell index. Both are
+    kept up to date as long as the cells are changed through `set_cell` and
+    `assign`.
+    """
+    kinds: state_types.KIND_ND_ARRAY
+    segments: state_types.SEGMENT_ND_ARRAY
+    free_cells: free_cells_module.FreeCells | None = None
+    occupied: state_types.BOOL_ND_ARRAY = dataclasses.field(init=False)
+
+    def __post_init__(self) -> None:
+        self.occupied = self.kinds != VOID_CELL
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        rows, cols = self.kinds.shape
+        return rows, cols
+
+    def copy(self) -> Board:
+        return Board(kinds=np.copy(self.kinds),
+                     segments=np.copy(self.segments))
+
+    def set_cell(
+        self,
+        coords: tuple[int, int],
+        kind: int,
+        segment: int = NO_SEGMENT,
+    ) -> None:
+        """
+        Changes a single cell and updates the occupancy mask and the free
+        cell index.
+
+        Args:
+            coords (tuple[int, int]): Coordinates of the cell.
+            kind (int): The new kind of the cell.
+            segment (int): The new segment index of the cell.
+        """
+        was_occupied = self.occupied[coords]
+        is_occupied = kind != VOID_CELL
+        self.kinds[coords] = kind
+        self.segments[coords] = segment
+        self.occupied[coords] = is_occupied
+        if self.free_cells is None:
+            return
+        if is_occupied and not was_occupied:
+            self.free_cells.occupy(coords)
+        elif was_occupied and not is_occupied:
+            self.free_cells.release(coords)
+
+    def assign(self, other: Board) -> None:
+        """
+        Replaces the contents of the board with the contents of another
+        board of the same shape and updates the occupancy mask and the free
+        cell index. Only the cells whose occupancy changed are visited in
+        Python.
+
+        Args:
+            other (Board): The board to copy the cells from.
+        """
+        if self.free_cells is not None:
+            for i, k in np.argwhere(other.occupied & ~self.occupied):
+                self.free_cells.occupy((int(i), int(k)))
+            for i, k in np.argwhere(self.occupied & ~other.occupied):
+                self.free_cells.release((int(i), int(k)))
+        np.copyto(self.kinds, other.kinds)
+        np.copyto(self.segments, other.segments)
+        np.copyto(self.occupied, other.occupied)
+
+
+def make_board(
+    shape: tuple[int, int],
+    free_cells: free_cells_module.FreeCells | None = None,
+) -> Board:
+    """
+    Creates an empty board.
+
+    Args:
+        shape (tuple[int, int]): Rows and columns of the board.
+        free_cells (free_cells_module.FreeCells | None): Free cell index
+            shared with the other boards of the game state.
+
+    Returns:
+        Board: A board where every cell is void.
+    """
+    return Board(
+        kinds=np.full(shape, VOID_CELL, dtype=KIND_DTYPE),
+        segments=np.full(shape, NO_SEGMENT, dtype=SEGMENT_DTYPE),
+        free_cells=free_cells,
+    )
+
+
+def snake_mask(board: Board) -> state_types.BOOL_ND_ARRAY:
+    """
+    Returns a mask of the cells occupied by a snake.
+
+    Args:
+        board (Board): The board to check.
+
+    Returns:
+        state_types.BOOL_ND_ARRAY: True where a snake segment is placed.
+    """
+    return board.kinds >= SNAKE_TAIL_CELL
+
+
+def cells_of_kind(board: Board, kind: int) -> list[tuple[int, int]]:
+    """
+    Lists the coordinates of all cells of the given kind.
+
+    Args:
+        board (Board): The board to search.
+        kind (int): The cell kind to look for.
+
+    Returns:
+        list[tuple[int, int]]: Coordinates of the matching cells in row order.
+    """
+    return [(int(i), int(k)) for i, k in np.argwhere(board.kinds == kind)]
+
+
+def first_cell_of_kind(board: Board, kind: int) -> tuple[int, int]:
+    """
+    Finds the first cell of the given kind.
+
+    Args:
+        board (Board): The board to search.
+        kind (int): The cell kind to look for.
+
+    Returns:
+        tuple[int, int]: Coordinates of the cell, or (-1, -1) if not found.
+    """
+    flat_matches = np.flatnonzero(board.kinds == kind)
+    if flat_matches.size == 0:
+        return (-1, -1)
+    i, k = np.unravel_index(flat_matches[0], board.kinds.shape)
+    return (int(i), int(k))
@@ -0,0 +1,114 @@
+"""
+Contains the index of free cells of the playground. The free cells are kept
+in a swap-remove array with a map from every cell to its position in the
+array, so a cell can be occupied, released or a random free cell chosen in
+constant time. Occupants are counted per cell, so several layers (the snakes
+and the food) can share one index.
+"""
+from __future__ import annotations
+import array
+import random
+from typing import Callable
+
+COORDINATES_NOT_FOUND = (-1, -1)
+
+
+class FreeCells:
+    """
+    Index of the cells that are not occupied by any snake or food.
+
+    The first `len(self)` entries of the cell array are the free cells in no
+    particular order. Occupying a cell swaps it with the last free cell and
+    shrinks the free part, releasing a cell grows the free part again.
+    """
+
+    def __init__(self, shape: tuple[int, int]) -> None:
+        rows, cols = shape
+        self.shape = shape
+        self._cols = cols
+        self._cells = array.array('l', range(rows * cols))
+        self._positions = array.array('l', range(rows * cols))
+        self._occupants = array.array('H', bytes(2 * rows * cols))
+        self._free_count = rows * cols
+
+    def __len__(self) -> int:
+        return self._free_count
+
+    def is_free(self, coords: tuple[int, int]) -> bool:
+        return self._occupants[self._flat_index(coords)] == 0
+
+    def occupy(self, coords: tuple[int, int]) -> None:
+        """
+        Registers a new occupant of the cell. The cell stops being free when
+        it gets its first occupant.
+
+        Args:
+            coords (tuple[int, int]): Coordinates of the cell.
+        """
+        cell = self._flat_index(coords)
+        self._occupants[cell] += 1
+        if self._occupants[cell] == 1:
+            self._free_count -= 1
+            self._swap(self._positions[cell], self._free_count)
+
+    def release(self, coords: tuple[int, int]) -> None:
+        """
+        Removes an occupant of the cell. The cell becomes free when its last
+        occupant is removed.
+
+        Args:
+            coords (tuple[int, int]): Coordinates of the cell.
+
+        Raises:
+            ValueError: If the cell has no occupants.
+        """
+        cell = self._flat_index(coords)
+        if self._occupants[cell] == 0:
+            raise ValueError(f"Cell {coords} is not occupied.")
+        self._occupants[cell] -= 1
+        if self._occupants[cell] == 0:
+            self._swap(self._positions[cell], self._free_count)
+            self._free_count += 1
+
+    def choose(
+        self,
+        randrange: Callable[[int], int] = random.randrange,
+    ) -> tuple[int, int]:
+        """
+        Chooses a uniformly random free cell.
+
+        Args:
+            randrange (Callable[[int], int]): Function returning a random
+                integer below the given bound.
+
+        Returns:
+            tuple[int, int]: Coordinates of the chosen cell, or (-1, -1) if
+                there are no free cells.
+        """
+        if self._free_count == 0:
+            return COORDINATES_NOT_FOUND
+        cell = self._cells[randrange(self._free_count)]
+        return divmod(cell, self._cols)
+
+    def sort(self) -> None:
+        """
+        Puts the free cells in row-major order. The order of the free cells
+        depends on the history of the board, sorting it makes the choices of
+        a seeded generator depend only on the current layout.
+        """
+        free = sorted(self._cells[:self._free_count])
+        occupied = sorted(self._cells[self._free_count:])
+        self._cells = array.array('l', free + occupied)
+        for position, cell in enumerate(self._cells):
+            self._positions[cell] = position
+
+    def _flat_index(self, coords: tuple[int, int]) -> int:
+        return coords[0] * self._cols + coords[1]
+
+    def _swap(self, position_1: int, position_2: int) -> None:
+        cell_1 = self._cells[position_1]
+        cell_2 = self._cells[position_2]
+        self._cells[position_1] = cell_2
+        self._cells[position_2] = cell_1
+        self._positions[cell_2] = position_1
+        self._positions[cell_1] = position_2
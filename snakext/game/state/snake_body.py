@@ -0,0 +1,97 @@
+"""
+Contains the snake body model. The segments of a snake are kept in a deque
+ordered from the tail to the head, and the integer-coded board of the snake is
+updated incrementally, so moving the snake costs constant time regardless of
+the board size and the snake length.
+"""
+from __future__ import annotations
+import collections
+import numpy as np
+from snakext.game.state import board
+
+
+class SnakeBody:
+    """
+    Ordered segments of a snake kept in sync with its board.
+
+    The board is only changed through `push_head` and `pop_tail`, so the
+    kinds and segment indices of the board always match the deque.
+    """
+
+    def __init__(self, placement: board.Board) -> None:
+        self.placement = placement
+        self.segments: collections.deque[tuple[int, int]] = collections.deque()
+        self._next_segment = 0
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @property
+    def head(self) -> tuple[int, int]:
+        return self.segments[-1]
+
+    @property
+    def tail(self) -> tuple[int, int]:
+        return self.segments[0]
+
+    def coordinates(self) -> list[tuple[int, int]]:
+        """
+        Lists the coordinates of the snake from the tail to the head.
+
+        Returns:
+            list[tuple[int, int]]: Coordinates of every segment.
+        """
+        return list(self.segments)
+
+    def push_head(self, coords: tuple[int, int]) -> None:
+        """
+        Adds a new head to the snake. The previous head becomes a part of the
+        body, or the tail if the snake consisted only of the head.
+
+        Args:
+            coords (tuple[int, int]): Coordinates of the new head.
+        """
+        if len(self.segments) == 1:
+            self.placement.kinds[self.head] = board.SNAKE_TAIL_CELL
+        elif len(self.segments) > 1:
+            self.placement.kinds[self.head] = board.SNAKE_BODY_CELL
+        self.placement.set_cell(coords, board.SNAKE_HEAD_CELL,
+                                self._next_segment)
+        self._next_segment += 1
+        self.segments.append(coords)
+
+    def pop_tail(self) -> tuple[int, int]:
+        """
+        Removes the tail of the snake. The following segment becomes the new
+        tail, unless it is the head.
+
+        Returns:
+            tuple[int, int]: Coordinates of the removed tail.
+        """
+        coords = self.segments.popleft()
+        self.placement.set_cell(coords, board.VOID_CELL)
+        if len(self.segments) > 1:
+            self.placement.kinds[self.tail] = board.SNAKE_TAIL_CELL
+        return coords
+
+
+def snake_from_board(placement: board.Board) -> SnakeBody:
+    """
+    Builds a snake body from a board that already contains a snake. The
+    segments are ordered by their segment indices.
+
+    Args:
+        placement (board.Board): The board with the snake.
+
+    Returns:
+        SnakeBody: The snake body attached to the board.
+    """
+    snake = SnakeBody(placement)
+    snake_coords = np.argwhere(board.snake_mask(placement))
+    order = np.argsort(placement.segments[tuple(snake_coords.T)],
+                       kind="stable")
+    for i, k in snake_coords[order]:
+        snake.segments.append((int(i), int(k)))
+    if len(snake.segments) > 0:
+        snake._next_segment = int(placement.segments[snake.head]) + 1
+    return snake
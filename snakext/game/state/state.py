@@ -5,7 +5,7 @@ import numpy as np
 import dataclasses
 import json
 from enum import Enum
-from snakext.game.state import state_types
+from snakext.game.state import state_types, board, snake_body, free_cells
 from snakext.utils import arg_parser
 
 VOID_PLACE = 'v'
@@ -21,6 +21,18 @@ BOTTOM_DIRECTION = 2
 RIGHT_DIRECTION = 3
 LEFT_DIRECTION = 4
 
+PLACE_CELL_KINDS: dict[str, int] = {
+    VOID_PLACE: board.VOID_CELL,
+    FOOD_PLACE: board.FOOD_CELL,
+    SNAKE_TAIL_PLACE: board.SNAKE_TAIL_CELL,
+    SNAKE_BODY_PLACE: board.SNAKE_BODY_CELL,
+    SNAKE_HEAD_PLACE: board.SNAKE_HEAD_CELL,
+}
+CELL_KIND_PLACES: dict[int, str] = {
+    kind: place
+    for place, kind in PLACE_CELL_KINDS.items()
+}
+
 
 class GameStates(Enum):
     NOT_STARTED = 1
@@ -39,6 +51,14 @@ class TransmittedState:
     is_handshake: bool = False
     sent_handshake: float = 0.0
     game_state: int = GameStates.NOT_STARTED.value
+    # Snake updates of the delta protocol, see communication.snake_delta.
+    # The defaults describe a snapshot in snake_placement.
+    snake_base_tick: int = -1
+    snake_tick: int = -1
+    snake_heads: list[tuple[int, int]] = dataclasses.field(
+        default_factory=list)
+    snake_tails: list[tuple[int, int] | None] = dataclasses.field(
+        default_factory=list)
 
     def to_json(self) -> str:
         dict_ = dataclasses.asdict(self)
@@ -54,11 +74,13 @@ class TransmittedState:
 
 @dataclasses.dataclass
 class State:
-    local_snake_placement: state_types.OBJECT_ND_ARRAY
-    remote_snake_placement: state_types.OBJECT_ND_ARRAY
-    food_placement: state_types.OBJECT_ND_ARRAY
+    local_snake_placement: board.Board
+    remote_snake_placement: board.Board
+    food_placement: board.Board
+    local_snake: snake_body.SnakeBody
+    remote_snake: snake_body.SnakeBody
+    free_cells: free_cells.FreeCells
     movement_direction: int
-    previous_snake_placement: state_types.OBJECT_ND_ARRAY
     add_do_snake: bool
     multiplayer: bool
     is_host: bool
@@ -115,14 +137,18 @@ def _init_state(
 ) -> State:
     global state_instance
     grid_shape = (grid_rows, grid_cols)
-    local_snake_placement = np.full(grid_shape, 'v', dtype=np.object_)
-    remote_snake_placement = np.full(grid_shape, 'v', dtype=np.object_)
-    food_placement = np.full(grid_shape, 'v', dtype=np.object_)
+    # All boards share one index of the cells free for food
+    free_cells_instance = free_cells.FreeCells(grid_shape)
+    local_snake_placement = board.make_board(grid_shape, free_cells_instance)
+    remote_snake_placement = board.make_board(grid_shape, free_cells_instance)
+    food_placement = board.make_board(grid_shape, free_cells_instance)
     # Choose some direction for the snake
     state_instance = State(
         local_snake_placement=local_snake_placement,
         remote_snake_placement=remote_snake_placement,
-        previous_snake_placement=local_snake_placement,
+        local_snake=snake_body.SnakeBody(local_snake_placement),
+        remote_snake=snake_body.SnakeBody(remote_snake_placement),
+        free_cells=free_cells_instance,
         add_do_snake=False,
         food_placement=food_placement,
         movement_direction=RIGHT_DIRECTION,
@@ -132,3 +158,61 @@ def _init_state(
         game_status=GameStates.NOT_STARTED.value,
     )
     return state_instance
+
+
+def board_from_placement(placement: state_types.OBJECT_ND_ARRAY) -> board.Board:
+    """
+    Converts a placement in the string layout (e.g. 'h0', 'b1', 't2', 'f',
+    'v') into an integer-coded board.
+
+    Snake place numbers count from the head, while board segment indices
+    count from the tail, so the numbers are reversed during the conversion.
+
+    Args:
+        placement (state_types.OBJECT_ND_ARRAY): Placement in the string layout.
+
+    Returns:
+        board.Board: The equivalent integer-coded board.
+
+    Raises:
+        ValueError: If the placement contains an unknown place.
+    """
+    converted = board.make_board(placement.shape)
+    numbers: dict[tuple[int, int], int] = {}
+    for i, row in enumerate(placement):
+        for k, place in enumerate(row):
+            if place[0] not in PLACE_CELL_KINDS:
+                raise ValueError(f"Unknown place: {place}")
+            if place[0] in SNAKE_PLACES:
+                numbers[(i, k)] = int(place[1:])
+            else:
+                converted.set_cell((i, k), PLACE_CELL_KINDS[place[0]])
+    last_number = max(numbers.values(), default=0)
+    for coords, number in numbers.items():
+        converted.set_cell(coords, PLACE_CELL_KINDS[placement[coords][0]],
+                           last_number - number)
+    return converted
+
+
+def placement_from_board(
+        board_instance: board.Board) -> state_types.OBJECT_ND_ARRAY:
+    """
+    Converts an integer-coded board into a placement in the string layout.
+
+    Args:
+        board_instance (board.Board): The board to convert.
+
+    Returns:
+        state_types.OBJECT_ND_ARRAY: The equivalent placement in the string layout.
+    """
+    placement = np.full(board_instance.shape, VOID_PLACE, dtype=np.object_)
+    is_snake = board.snake_mask(board_instance)
+    last_segment = int(board_instance.segments[is_snake].max(initial=0))
+    for i, row in enumerate(board_instance.kinds):
+        for k, kind in enumerate(row):
+            place = CELL_KIND_PLACES[int(kind)]
+            if place in SNAKE_PLACES:
+                number = last_segment - int(board_instance.segments[i, k])
+                place = f"{place}{number}"
+            placement[i, k] = place
+    return placement
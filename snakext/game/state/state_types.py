@@ -1,3 +1,6 @@
 import numpy as np
 
 OBJECT_ND_ARRAY = np.ndarray[tuple[int, int], np.dtype[np.object_]]
+KIND_ND_ARRAY = np.ndarray[tuple[int, int], np.dtype[np.int8]]
+SEGMENT_ND_ARRAY = np.ndarray[tuple[int, int], np.dtype[np.int32]]
+BOOL_ND_ARRAY = np.ndarray[tuple[int, int], np.dtype[np.bool_]]
@@ -3,147 +3,508 @@ This module represents the change of state in a snake game by rendering the
 game view. It includes functions to draw the game view, including the snake(s),
 food, and walls, using the Pygame facade. The module interacts with the 
 playground module for layout and the state module for game state information.
+
+The background and the walls never change during a game, so they are
+rendered once into an off-screen static layer together with a sprite for
+every cell content. The first frame is drawn in full from them. After that,
+the view compares every frame with the previous one and redraws and pushes
+to the display only the cells whose content changed, which are usually the
+heads and tails of the snakes and the food.
+
+Boards with many cells are drawn by the surfarray renderer instead: the frame
+is copied into an 8-bit image with one pixel per cell and a palette of the
+cell colors, which is scaled up to the grid area and blitted in one go.
 """
-from types import ModuleType
+from __future__ import annotations
+import dataclasses
+import numpy as np
+import numpy.typing as npt
 from snakext.facades import pygame_facade
-from snakext.game.state import state_types
 from snakext.game.views import playground
-from snakext.game.state import state
+from snakext.game.state import board
+
+# Content of a cell in a frame, later layers are drawn over earlier ones
+FRAME_VOID = 0
+FRAME_FOOD = 1
+FRAME_LOCAL_SNAKE = 2
+FRAME_REMOTE_SNAKE = 3
+
+RENDERER_AUTO = "auto"
+RENDERER_CELLS = "cells"
+RENDERER_SURFARRAY = "surfarray"
+RENDERERS = (RENDERER_AUTO, RENDERER_CELLS, RENDERER_SURFARRAY)
+# The auto renderer switches to surfarray for boards with more cells
+SURFARRAY_CELL_THRESHOLD = 10_000
+
+
+@dataclasses.dataclass
+class StaticLayer:
+    """
+    Pre-rendered parts of the view that do not change during a game: the
+    background with the walls, and a sprite of every cell content.
+    `layout_key` identifies the resolution and layout it was rendered for.
+    """
+    surface: pygame_facade.Surface
+    cell_sprites: dict[int, pygame_facade.Surface]
+    layout_key: tuple[object, ...]
+
+
+@dataclasses.dataclass
+class PaletteLayer:
+    """
+    Surfaces of the surfarray renderer: the frame with one pixel per cell
+    and the same image scaled to `grid_rect`, the area of the grid.
+    """
+    indexed_surface: pygame_facade.Surface
+    scaled_surface: pygame_facade.Surface
+    grid_rect: pygame_facade.Rect
+    layout_key: tuple[object, ...]
+
+
+@dataclasses.dataclass
+class HeadMotion:
+    """
+    Movement of the head of the local snake between two moves. The head is
+    drawn growing out of the `neck` cell into the `head` cell as `alpha`
+    goes from 0 to 1.
+    """
+    neck: tuple[int, int]
+    head: tuple[int, int]
+    alpha: float
+
+
+_renderer = RENDERER_AUTO
+_gliding_cell: tuple[int, int] | None = None
+_previous_frame: npt.NDArray[np.int8] | None = None
+_static_layer: StaticLayer | None = None
+_palette_layer: PaletteLayer | None = None
 
 
 def draw_game_view(
     playground: playground.Playground,
-    snake_placement: state_types.OBJECT_ND_ARRAY,
-    remote_snake_placement: state_types.OBJECT_ND_ARRAY,
-    food_placement: state_types.OBJECT_ND_ARRAY,
+    snake_placement: board.Board,
+    remote_snake_placement: board.Board,
+    food_placement: board.Board,
+    head_motion: HeadMotion | None = None,
 ) -> None:
     """
-    Draws the entire game view including the snake(s), food, and background.
+    Draws the game view including the snake(s), food, and background. Only
+    the cells that changed since the previous frame are redrawn, unless the
+    frame was invalidated.
 
     Args:
         playground (playground.Playground): The playground object with game layout information.
-        snake_placement (state_types.OBJECT_ND_ARRAY): The placement array of the local snake.
-        remote_snake_placement (state_types.OBJECT_ND_ARRAY): The placement array of the remote snake.
-        food_placement (state_types.OBJECT_ND_ARRAY): The placement array of the food.
+        snake_placement (board.Board): The placement board of the local snake.
+        remote_snake_placement (board.Board): The placement board of the remote snake.
+        food_placement (board.Board): The placement board of the food.
+        head_motion (HeadMotion | None): Motion of the local snake head to
+            render between cells. Ignored by the surfarray renderer.
+    """
+    global _previous_frame
+    # A change of the layout invalidates the frame before it is compared
+    _get_static_layer(playground)
+    frame = _compose_frame(snake_placement, remote_snake_placement,
+                           food_placement)
+    previous_frame = _previous_frame
+    full_redraw = (previous_frame is None
+                   or previous_frame.shape != frame.shape)
+    if _uses_surfarray(frame.size):
+        if (full_redraw or previous_frame is None
+                or not np.array_equal(frame, previous_frame)):
+            grid_rect = _draw_palette_frame(playground, frame, full_redraw)
+            if full_redraw:
+                pygame_facade.update_display()
+            else:
+                pygame_facade.update_display_rects([grid_rect])
+    elif full_redraw or previous_frame is None:
+        _draw_contents(playground, frame)
+        _draw_gliding_head(playground, frame, head_motion)
+        pygame_facade.update_display()
+    else:
+        changed_rects = _draw_changed_cells(playground, frame,
+                                            previous_frame)
+        changed_rects.extend(
+            _draw_gliding_head(playground, frame, head_motion))
+        if changed_rects:
+            pygame_facade.update_display_rects(changed_rects)
+    _previous_frame = frame
+
+
+def set_renderer(renderer: str) -> None:
+    """
+    Chooses how the board is drawn: cell by cell, with the surfarray
+    renderer, or automatically by the number of cells.
+
+    Args:
+        renderer (str): One of `RENDERERS`.
+
+    Raises:
+        ValueError: If the renderer is unknown.
+    """
+    global _renderer
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer {renderer}")
+    _renderer = renderer
+    invalidate_frame()
+
+
+def invalidate_frame() -> None:
+    """
+    Makes the next call of `draw_game_view` redraw the whole screen, e.g.
+    after the display mode was set again.
     """
-    _draw_contents(playground, snake_placement, food_placement,
-                   remote_snake_placement)
-    pygame_facade.update_display()
+    global _previous_frame, _gliding_cell
+    _previous_frame = None
+    _gliding_cell = None
+
+
+def _compose_frame(
+    snake_placement: board.Board,
+    remote_snake_placement: board.Board,
+    food_placement: board.Board,
+) -> npt.NDArray[np.int8]:
+    """
+    Flattens the boards into the content of every cell as it is drawn.
+
+    Args:
+        snake_placement (board.Board): The placement board of the local snake.
+        remote_snake_placement (board.Board): The placement board of the remote snake.
+        food_placement (board.Board): The placement board of the food.
+
+    Returns:
+        npt.NDArray[np.int8]: The frame code of every cell.
+    """
+    frame = np.zeros(food_placement.shape, dtype=np.int8)
+    frame[food_placement.kinds == board.FOOD_CELL] = FRAME_FOOD
+    frame[board.snake_mask(snake_placement)] = FRAME_LOCAL_SNAKE
+    frame[board.snake_mask(remote_snake_placement)] = FRAME_REMOTE_SNAKE
+    return frame
+
+
+def _draw_changed_cells(
+    playground_instance: playground.Playground,
+    frame: npt.NDArray[np.int8],
+    previous_frame: npt.NDArray[np.int8],
+) -> list[pygame_facade.Rect]:
+    """
+    Redraws the cells whose content differs from the previous frame. An
+    emptied cell is restored from the static layer.
+
+    Args:
+        playground_instance (playground.Playground): The playground object with layout information.
+        frame (npt.NDArray[np.int8]): The frame to draw.
+        previous_frame (npt.NDArray[np.int8]): The frame on the screen.
+
+    Returns:
+        list[pygame_facade.Rect]: Areas of the screen that were redrawn.
+    """
+    return [
+        _draw_cell(playground_instance, frame, (i, k))
+        for i, k in np.argwhere(frame != previous_frame)
+    ]
+
+
+def _draw_cell(
+    playground_instance: playground.Playground,
+    frame: npt.NDArray[np.int8],
+    cell: tuple[int, int],
+) -> pygame_facade.Rect:
+    """
+    Draws a cell of the frame from the static layer and the cell sprites.
+
+    Args:
+        playground_instance (playground.Playground): The playground object with layout information.
+        frame (npt.NDArray[np.int8]): The frame to draw.
+        cell (tuple[int, int]): Row and column of the cell.
+
+    Returns:
+        pygame_facade.Rect: Area of the screen that was drawn.
+    """
+    static_layer = _get_static_layer(playground_instance)
+    cell_rect = playground_instance.grid.cell_rect(*cell)
+    content = frame[cell]
+    if content == FRAME_VOID:
+        pygame_facade.blit(static_layer.surface, cell_rect.topleft, cell_rect)
+    else:
+        pygame_facade.blit(static_layer.cell_sprites[content],
+                           cell_rect.topleft)
+    return cell_rect
+
+
+def _draw_gliding_head(
+    playground_instance: playground.Playground,
+    frame: npt.NDArray[np.int8],
+    head_motion: HeadMotion | None,
+) -> list[pygame_facade.Rect]:
+    """
+    Draws the head cell of the local snake partially filled from the side of
+    the neck, and restores the cell of the previous gliding head.
+
+    Args:
+        playground_instance (playground.Playground): The playground object with layout information.
+        frame (npt.NDArray[np.int8]): The frame being drawn.
+        head_motion (HeadMotion | None): Motion of the head, None to draw it
+            as a whole cell.
+
+    Returns:
+        list[pygame_facade.Rect]: Areas of the screen that were drawn.
+    """
+    global _gliding_cell
+    drawn_rects = []
+    new_gliding_cell = head_motion.head if head_motion is not None else None
+    if _gliding_cell is not None and _gliding_cell != new_gliding_cell:
+        drawn_rects.append(_draw_cell(playground_instance, frame,
+                                      _gliding_cell))
+    _gliding_cell = new_gliding_cell
+    if head_motion is None:
+        return drawn_rects
+    cell_rect = playground_instance.grid.cell_rect(*head_motion.head)
+    pygame_facade.blit(
+        _get_static_layer(playground_instance).surface,
+        cell_rect.topleft,
+        cell_rect,
+    )
+    pygame_facade.draw_rect(
+        _partial_rect(cell_rect, _glide_direction(head_motion, frame.shape),
+                      head_motion.alpha),
+        playground_instance.local_snake_color,
+    )
+    drawn_rects.append(cell_rect)
+    return drawn_rects
+
+
+def _glide_direction(head_motion: HeadMotion,
+                     shape: tuple[int, ...]) -> tuple[int, int]:
+    # Steps across the board edge wrap around to a single step
+    return (
+        (head_motion.head[0] - head_motion.neck[0] + 1) % shape[0] - 1,
+        (head_motion.head[1] - head_motion.neck[1] + 1) % shape[1] - 1,
+    )
+
+
+def _partial_rect(
+    cell_rect: pygame_facade.Rect,
+    direction: tuple[int, int],
+    alpha: float,
+) -> pygame_facade.Rect:
+    """
+    Returns the part of a cell covered by a head that entered it moving in
+    the direction.
+
+    Args:
+        cell_rect (pygame_facade.Rect): The rect of the cell.
+        direction (tuple[int, int]): Row and column step of the movement.
+        alpha (float): Covered fraction of the cell.
+
+    Returns:
+        pygame_facade.Rect: The covered part of the cell.
+    """
+    partial = cell_rect.copy()
+    if direction[1] != 0:
+        partial.width = max(1, round(cell_rect.width * alpha))
+        if direction[1] < 0:
+            partial.right = cell_rect.right
+    else:
+        partial.height = max(1, round(cell_rect.height * alpha))
+        if direction[0] < 0:
+            partial.bottom = cell_rect.bottom
+    return partial
 
 
 def _draw_contents(
     playground: playground.Playground,
-    snake_placement: state_types.OBJECT_ND_ARRAY,
-    food_placement: state_types.OBJECT_ND_ARRAY,
-    remote_snake_placement: state_types.OBJECT_ND_ARRAY,
+    frame: npt.NDArray[np.int8],
 ) -> None:
     """
-    Helper function to draw the contents of the game.
+    Helper function to draw the contents of the game: the static layer as the
+    base and a sprite for every occupied cell.
 
     Args:
         playground (playground.Playground): The playground object with game layout information.
-        snake_placement (state_types.OBJECT_ND_ARRAY): The placement array of the local snake.
-        food_placement (state_types.OBJECT_ND_ARRAY): The placement array of the food.
-        remote_snake_placement (state_types.OBJECT_ND_ARRAY): The placement array of the remote snake.
-    """
-    pygame_facade.fill_background_with_color(playground.background_color)
-    _draw_walls(playground)
-    _place_food(pygame_facade, playground, food_placement,
-                playground.food_grid)
-    _place_snake(
-        pygame_facade,
-        playground,
-        snake_placement,
-        playground.snake_grid,
-        playground.local_snake_color,
-    )
-    _place_snake(
-        pygame_facade,
-        playground,
-        remote_snake_placement,
-        playground.remote_snake_grid,
-        playground.remote_snake_color,
-    )
+        frame (npt.NDArray[np.int8]): The frame to draw.
+    """
+    static_layer = _get_static_layer(playground)
+    pygame_facade.blit(static_layer.surface, (0, 0))
+    cells = np.argwhere(frame != FRAME_VOID)
+    positions = playground.grid.cell_positions(cells)
+    pygame_facade.blit_many([
+        (static_layer.cell_sprites[frame[i, k]], (x, y))
+        for (i, k), (x, y) in zip(cells.tolist(), positions.tolist())
+    ])
+
+
+def _uses_surfarray(cell_count: int) -> bool:
+    if _renderer == RENDERER_AUTO:
+        return cell_count > SURFARRAY_CELL_THRESHOLD
+    return _renderer == RENDERER_SURFARRAY
 
 
-def _draw_walls(playground_instance: playground.Playground) -> None:
+def _draw_palette_frame(
+    playground_instance: playground.Playground,
+    frame: npt.NDArray[np.int8],
+    full_redraw: bool,
+) -> pygame_facade.Rect:
     """
-    Draws the walls of the playground.
+    Draws the frame with the surfarray renderer.
 
     Args:
-        playground (playground.Playground): The playground object with wall information.
+        playground_instance (playground.Playground): The playground object with layout information.
+        frame (npt.NDArray[np.int8]): The frame to draw.
+        full_redraw (bool): Whether to draw the static layer too.
+
+    Returns:
+        pygame_facade.Rect: Area of the screen covered by the grid.
     """
-    for wall in playground_instance.walls:
-        pygame_facade.draw_rect(
-            wall,
-            playground_instance.wall_color,
-            border_radius=playground.WALL_BORDER_RADIUS,
-        )
+    palette_layer = _get_palette_layer(playground_instance, frame.shape)
+    if full_redraw:
+        pygame_facade.blit(_get_static_layer(playground_instance).surface,
+                           (0, 0))
+    # Surfaces are indexed by (x, y), frames by (row, column)
+    pygame_facade.blit_array(palette_layer.indexed_surface, frame.T)
+    pygame_facade.scale_surface(palette_layer.indexed_surface,
+                                palette_layer.scaled_surface)
+    pygame_facade.blit(palette_layer.scaled_surface,
+                       palette_layer.grid_rect.topleft)
+    return palette_layer.grid_rect
 
 
-def _draw_grid(playground: playground.Playground) -> None:
+def _get_palette_layer(
+    playground_instance: playground.Playground,
+    shape: tuple[int, ...],
+) -> PaletteLayer:
     """
-    Draws the grid on the playground.
+    Returns the cached surfaces of the surfarray renderer, creating them
+    again if the board or the layout of the playground changed.
 
     Args:
-        playground (playground.Playground): The playground object with grid information.
+        playground_instance (playground.Playground): The playground object with layout information.
+        shape (tuple[int, ...]): Rows and columns of the board.
+
+    Returns:
+        PaletteLayer: The surfaces of the surfarray renderer.
     """
-    for row in playground.snake_grid:
-        for el in row:
-            pygame_facade.draw_rect(el, playground.local_snake_color)
+    global _palette_layer
+    layout_key = _layout_key(playground_instance) + (shape, )
+    if _palette_layer is not None and _palette_layer.layout_key == layout_key:
+        return _palette_layer
+    # Indexed by frame content
+    palette = [
+        playground_instance.background_color,
+        playground_instance.food_color,
+        playground_instance.local_snake_color,
+        playground_instance.remote_snake_color,
+    ]
+    rows, cols = shape
+    grid_rect = playground_instance.grid.area_rect()
+    _palette_layer = PaletteLayer(
+        indexed_surface=pygame_facade.make_indexed_surface((cols, rows),
+                                                           palette),
+        scaled_surface=pygame_facade.make_indexed_surface(
+            grid_rect.size, palette),
+        grid_rect=grid_rect,
+        layout_key=layout_key,
+    )
+    return _palette_layer
 
 
-def _place_snake(
-    pygame_facade: ModuleType,
-    playground: playground.Playground,
-    snake_placement: state_types.OBJECT_ND_ARRAY,
-    grid: state_types.OBJECT_ND_ARRAY,
-    snake_color: pygame_facade.Color,
-) -> None:
+def _get_static_layer(playground_instance: playground.Playground) -> StaticLayer:
     """
-    Places the snake on the game grid.
+    Returns the cached static layer, rendering it again and invalidating
+    the frame if the resolution or the layout of the playground changed.
 
     Args:
-        pygame_facade (ModuleType): The Pygame facade module for drawing.
-        playground (playground.Playground): The playground object with layout information.
-        snake_placement (state_types.OBJECT_ND_ARRAY): The placement array of the snake.
-        grid (state_types.OBJECT_ND_ARRAY): The grid array to place the snake on.
-        snake_color (pygame_facade.Color): Color of the snake drawn
+        playground_instance (playground.Playground): The playground object with layout information.
 
-    Raises:
-        TypeError: If the grid does not consist of Pygame Rect objects.
+    Returns:
+        StaticLayer: The static layer of the playground.
     """
-    for i, row in enumerate(snake_placement):
-        for k, place in enumerate(row):
-            if not isinstance(grid[i, k], pygame_facade.Rect):
-                raise TypeError("Grid should consist of only Rect objects")
-            if place[0] in state.SNAKE_PLACES:
-                pygame_facade.draw_rect(grid[i, k], snake_color)
+    global _static_layer
+    layout_key = _layout_key(playground_instance)
+    if _static_layer is None or _static_layer.layout_key != layout_key:
+        _static_layer = _render_static_layer(playground_instance, layout_key)
+        invalidate_frame()
+    return _static_layer
 
 
-def _place_food(pygame_facade: ModuleType,
-                playground_instance: playground.Playground,
-                food_placement: state_types.OBJECT_ND_ARRAY,
-                grid: state_types.OBJECT_ND_ARRAY) -> None:
+def _render_static_layer(
+    playground_instance: playground.Playground,
+    layout_key: tuple[object, ...],
+) -> StaticLayer:
     """
-    Places the food on the game grid.
+    Renders the background and the walls into an off-screen surface and the
+    content of a cell of every kind into a sprite.
 
     Args:
-        pygame_facade (ModuleType): The Pygame facade module for drawing.
-        playground (playground.Playground): The playground object with layout information.
-        food_placement (state_types.OBJECT_ND_ARRAY): The placement array of the food.
-        grid (state_types.OBJECT_ND_ARRAY): The grid array to place the food on.
+        playground_instance (playground.Playground): The playground object with layout information.
+        layout_key (tuple[object, ...]): The layout the layer is rendered for.
 
-    Raises:
-        TypeError: If the grid does not consist of Pygame Rect objects.
-    """
-    for i, row in enumerate(food_placement):
-        for k, place in enumerate(row):
-            if not isinstance(grid[i, k], pygame_facade.Rect):
-                raise TypeError("Grid should consist of only Rect objects")
-            if place == state.FOOD_PLACE:
-                pygame_facade.draw_rect(
-                    grid[i, k],
-                    playground_instance.food_color,
-                    border_radius=playground.FOOD_BORDER_RADIUS,
-                )
+    Returns:
+        StaticLayer: The rendered static layer.
+    """
+    surface = pygame_facade.make_surface(pygame_facade.screen_size(),
+                                         playground_instance.background_color)
+    _draw_walls(surface, playground_instance)
+    cell_size = playground_instance.grid.cell_size
+    cell_rect = pygame_facade.rect((0, 0), cell_size)
+    cell_sprites = {}
+    for content, color, border_radius in (
+        (FRAME_FOOD, playground_instance.food_color,
+         playground.FOOD_BORDER_RADIUS),
+        (FRAME_LOCAL_SNAKE, playground_instance.local_snake_color, 0),
+        (FRAME_REMOTE_SNAKE, playground_instance.remote_snake_color, 0),
+    ):
+        sprite = pygame_facade.make_surface(
+            cell_size, playground_instance.background_color)
+        pygame_facade.draw_rect_on_surface(sprite,
+                                           cell_rect,
+                                           color,
+                                           border_radius=border_radius)
+        cell_sprites[content] = sprite
+    return StaticLayer(surface, cell_sprites, layout_key)
+
+
+def _layout_key(
+        playground_instance: playground.Playground) -> tuple[object, ...]:
+    return (
+        pygame_facade.screen_size(),
+        tuple(tuple(wall) for wall in playground_instance.walls),
+        playground_instance.grid,
+        tuple(playground_instance.background_color),
+        tuple(playground_instance.wall_color),
+        tuple(playground_instance.food_color),
+        tuple(playground_instance.local_snake_color),
+        tuple(playground_instance.remote_snake_color),
+    )
+
+
+def _draw_walls(
+    surface: pygame_facade.Surface,
+    playground_instance: playground.Playground,
+) -> None:
+    """
+    Draws the walls of the playground.
+
+    Args:
+        surface (pygame_facade.Surface): The surface to draw on.
+        playground (playground.Playground): The playground object with wall information.
+    """
+    for wall in playground_instance.walls:
+        pygame_facade.draw_rect_on_surface(
+            surface,
+            wall,
+            playground_instance.wall_color,
+            border_radius=playground.WALL_BORDER_RADIUS,
+        )
+
+
+def _draw_grid(playground: playground.Playground) -> None:
+    """
+    Draws the grid on the playground.
+
+    Args:
+        playground (playground.Playground): The playground object with grid information.
+    """
+    for i in range(playground.grid.rows):
+        for k in range(playground.grid.cols):
+            pygame_facade.draw_rect(playground.grid.cell_rect(i, k),
+                                    playground.local_snake_color)
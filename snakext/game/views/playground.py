@@ -8,12 +8,12 @@ instance with all necessary components for the game's visual representation.
 """
 
 import numpy as np
+import numpy.typing as npt
 import math
 from types import ModuleType
 from dataclasses import dataclass
 from snakext.facades import pygame_facade
-from snakext.utils import matrix, vec
-from snakext.game.state import state_types
+from snakext.utils import vec
 
 PLAYGROUND_MARGIN = 40
 WALL_MARGIN = 0
@@ -32,6 +32,70 @@ FOOD_BORDER_RADIUS = 10
 PLAYGROUND_BACKGROUND_COLOR = pygame_facade.Color(129, 143, 180, 255)
 
 
+@dataclass
+class GridGeometry:
+    """
+    Geometry of the grid of cells, shared by the snake and food layers.
+
+    The rect of a cell is computed from its row and column when it is needed,
+    so no Rect objects are kept per cell. Positions are truncated to whole
+    pixels the same way `pygame.Rect` truncates them.
+    """
+    position: tuple[float, float]
+    slot_dimensions: tuple[float, float]
+    rows: int
+    cols: int
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (self.rows, self.cols)
+
+    @property
+    def cell_size(self) -> tuple[int, int]:
+        return (int(self.slot_dimensions[0] - 1),
+                int(self.slot_dimensions[1] - 1))
+
+    def cell_position(self, row: int, col: int) -> tuple[int, int]:
+        """
+        Args:
+            row (int): Row of the cell.
+            col (int): Column of the cell.
+
+        Returns:
+            tuple[int, int]: Screen position of the top left corner of the cell.
+        """
+        return (int(col * self.slot_dimensions[0] + self.position[0]),
+                int(row * self.slot_dimensions[1] + self.position[1]))
+
+    def cell_positions(
+            self, cells: npt.NDArray[np.intp]) -> npt.NDArray[np.intp]:
+        """
+        Vectorized `cell_position` for many cells.
+
+        Args:
+            cells (npt.NDArray[np.intp]): (row, column) of every cell, as
+                returned by `np.argwhere`.
+
+        Returns:
+            npt.NDArray[np.intp]: (x, y) screen position of every cell.
+        """
+        positions: npt.NDArray[np.intp] = (
+            cells[:, ::-1] * np.array(self.slot_dimensions) +
+            np.array(self.position)).astype(np.intp)
+        return positions
+
+    def cell_rect(self, row: int, col: int) -> pygame_facade.Rect:
+        return pygame_facade.rect(self.cell_position(row, col), self.cell_size)
+
+    def area_rect(self) -> pygame_facade.Rect:
+        """
+        Returns:
+            pygame_facade.Rect: Area of the screen covered by all cells.
+        """
+        return self.cell_rect(0, 0).union(
+            self.cell_rect(self.rows - 1, self.cols - 1))
+
+
 @dataclass
 class Playground:
     """
@@ -47,15 +111,13 @@ class Playground:
     walls: list[pygame_facade.Rect]
     internal_playground_dimensions: tuple[float, float]
     internal_playground_position: tuple[float, float]
-    snake_grid: state_types.OBJECT_ND_ARRAY
-    remote_snake_grid: state_types.OBJECT_ND_ARRAY
+    grid: GridGeometry
     grid_rows: int
     grid_cols: int
     wall_color: pygame_facade.Color
     background_color: pygame_facade.Color
     local_snake_color: pygame_facade.Color
     remote_snake_color: pygame_facade.Color
-    food_grid: state_types.OBJECT_ND_ARRAY
     food_color: pygame_facade.Color
 
 
@@ -74,13 +136,9 @@ def _init_playground() -> Playground:
     dimensions = _playground_dimensions(pygame_facade, PLAYGROUND_POSITION)
     grid_dimensions = _playground_grid_dimensions(dimensions, WALL_WIDTH)
     grid_position = _playground_grid_position(PLAYGROUND_POSITION)
-    snake_grid: state_types.OBJECT_ND_ARRAY = _make_rect_grid(
-        grid_position, grid_dimensions, GRID_COLUMN_COUNT)
-    remote_snake_grid: state_types.OBJECT_ND_ARRAY = _make_rect_grid(
-        grid_position, grid_dimensions, GRID_COLUMN_COUNT)
-    food_grid: state_types.OBJECT_ND_ARRAY = _make_rect_grid(
-        grid_position, grid_dimensions, GRID_COLUMN_COUNT)
-    (grid_rows, grid_cols) = snake_grid.shape
+    grid = _make_grid_geometry(grid_position, grid_dimensions,
+                               GRID_COLUMN_COUNT)
+    (grid_rows, grid_cols) = grid.shape
     try:
         playground_instance = Playground(
             position=PLAYGROUND_POSITION,
@@ -94,8 +152,7 @@ def _init_playground() -> Playground:
                                             dimensions[1] - 2 * WALL_WIDTH),
             internal_playground_position=(PLAYGROUND_POSITION[0] + WALL_WIDTH,
                                           PLAYGROUND_POSITION[1] + WALL_WIDTH),
-            snake_grid=snake_grid,
-            remote_snake_grid=remote_snake_grid,
+            grid=grid,
             grid_rows=grid_rows,
             grid_cols=grid_cols,
             wall_color=pygame_facade.create_color(WALL_COLOR),
@@ -103,7 +160,6 @@ def _init_playground() -> Playground:
                 PLAYGROUND_BACKGROUND_COLOR),
             local_snake_color=pygame_facade.create_color(LOCAL_SNAKE_COLOR),
             remote_snake_color=pygame_facade.create_color(REMOTE_SNAKE_COLOR),
-            food_grid=food_grid,
             food_color=pygame_facade.create_color(FOOD_COLOR),
         )
     except pygame_facade.error as e:
@@ -113,18 +169,15 @@ def _init_playground() -> Playground:
     return playground_instance
 
 
-def _make_rect_grid(position_top_left: tuple[float, float],
-                    frame_dimensions: tuple[float, float],
-                    cols: int) -> state_types.OBJECT_ND_ARRAY:
+def _make_grid_geometry(position_top_left: tuple[float, float],
+                        frame_dimensions: tuple[float, float],
+                        cols: int) -> GridGeometry:
     (position_top_left,
      frame_dimensions) = _add_margin_to_frame(position_top_left,
                                               frame_dimensions)
     (slot_width, slot_height, rows) = _grid_dimensions(frame_dimensions, cols)
-    source_list = _rect_grid_list(rows, cols, (slot_width, slot_height),
-                                  position_top_left)
-    arr = np.empty((rows, cols), dtype=pygame_facade.Rect)
-    arr = matrix.fill_matrix(arr, source_list, rows, cols)
-    return arr
+    return GridGeometry(position_top_left, (slot_width, slot_height), rows,
+                        cols)
 
 
 def _make_walls(playground_position: tuple[float, float],
@@ -194,37 +247,6 @@ def _grid_dimensions(frame_dimensions: tuple[float, float],
     return (slot_width, slot_height, rows)
 
 
-def _grid_element(idx: int, rows: int, cols: int, slot_width: float,
-                  slot_height: float, start_position: tuple[float, float],
-                  rect_dimensions: tuple[float, float]) -> pygame_facade.Rect:
-    (y_pos, x_pos) = matrix.matrix_position_of_index(idx, cols)
-    rect_position = (x_pos * slot_width + 1, y_pos * slot_height + 1)
-    rect_position = vec.vec_2d_add(rect_position, start_position)
-    return pygame_facade.rect(
-        rect_position,
-        rect_dimensions,
-    )
-
-
-def _rect_grid_list(
-    rows: int,
-    cols: int,
-    slot_dimensions: tuple[float, float],
-    starting_position: tuple[float, float],
-) -> list[pygame_facade.Rect]:
-    source_list: list[pygame_facade.Rect] = []
-    for i in range(0, rows * cols):
-        (y_pos, x_pos) = matrix.matrix_position_of_index(i, cols)
-        rect_normal_position = (x_pos, y_pos)
-        rect_dimensions = vec.vec_2d_add(slot_dimensions, (-1, -1))
-        rect_position = vec.vec_2d_multiply(rect_normal_position,
-                                            slot_dimensions)
-        rect_position = vec.vec_2d_add(rect_position, starting_position)
-        rect = pygame_facade.rect(rect_position, rect_dimensions)
-        source_list.append(rect)
-    return source_list
-
-
 def _make_right_wall(playground_position: tuple[float, float],
                      playground_dimensions: tuple[float, float],
                      wall_width: float) -> pygame_facade.Rect:
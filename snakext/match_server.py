@@ -0,0 +1,831 @@
+"""
+Entry point of the dedicated match server. The server hosts many two player
+matches in one asyncio loop on a single listening port. Every match runs in
+a room on a headless `SnakeEngine`, the server is the authority for the food
+and the collisions, and the players only send their movement keys, see
+`match_protocol`.
+
+Players are assigned to the room that waits for a second player, or to a
+private room by name, given in the join request or as the path of the
+address. A room plays matches for as long as both of its players stay
+connected, starting a new match `ROOM_RESTART_TICKS` after one is over.
+
+The rooms do not sleep on timers of their own. One tick loop wakes up once
+for every tick of the game clock and advances, in one batch, all rooms due
+on the tick, taken from a `TimingWheel`. A room moves every
+`TICK_PER_MOVE` ticks, on a tick given by its id, and counts the moves it made later than
+`LATE_MOVE_SECONDS` after their deadline as deadline misses.
+
+Spectators of a room get every message encoded once for all players and
+spectators of the room. A spectator whose socket holds more than
+`SPECTATOR_BUFFER_LIMIT` unsent bytes skips the messages until it drained,
+and then catches up with the current state of the match. A spectator that
+stays behind for `SPECTATOR_DROP_SECONDS` is dropped.
+
+With more than one worker the server runs one process per worker. All
+workers accept connections on the same port with `SO_REUSEPORT`, and every
+worker also listens on a port of its own, `port + 1 + worker`. Rooms live in
+the worker that created them. The workers report their load to a shared
+`ShardTable`, and a worker that accepts a connection which belongs to
+another worker redirects it there during the handshake. A private room is
+served by the worker its name hashes to, a join request naming a room of
+another worker is refused with the port of that worker.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import http
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import time
+import urllib.parse
+import zlib
+import websockets
+from websockets import datastructures, frames
+from snakext.communication import match_protocol
+from snakext.game.logic import engine, turn_buffer
+from snakext.utils import game_clock, timing_wheel
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 54320
+DEFAULT_SHAPE = (15, 30)
+PLAYERS_PER_ROOM = 2
+ROOM_RESTART_TICKS = game_clock.TICKS_PER_SECOND
+# Moves later than this after their deadline count as late
+LATE_MOVE_SECONDS = 0.005
+SPECTATOR_BUFFER_LIMIT = 64 * 1024
+SPECTATOR_DROP_SECONDS = 5.0
+# A routed player that did not arrive by then no longer holds its place
+ROUTE_RESERVATION_SECONDS = 5.0
+# Query of a redirect, telling the worker that the player was routed to it
+ROUTED_QUERY = "routed"
+
+SERVER_STARTED_MESSAGE = "Match server worker {} listening on {}:{}"
+REUSE_PORT_UNSUPPORTED = "SO_REUSEPORT is not supported, use one worker"
+WRONG_WORKER_MESSAGE = "The room is served on port {}"
+ROOM_FAILED_MESSAGE = "Room {} failed and was closed: {!r}"
+
+parser = argparse.ArgumentParser(
+    description="""Dedicated server hosting two player snake matches. Players
+    connect to one port and are paired into rooms.""")
+parser.add_argument('--host', default=DEFAULT_HOST, help="Address to bind.")
+parser.add_argument(
+    '--port',
+    type=int,
+    default=DEFAULT_PORT,
+    help=f"Port to listen on. Defaults to {DEFAULT_PORT}.",
+)
+parser.add_argument(
+    '--rows',
+    type=int,
+    default=DEFAULT_SHAPE[0],
+    help=f"Rows of the board. Defaults to {DEFAULT_SHAPE[0]}.",
+)
+parser.add_argument(
+    '--cols',
+    type=int,
+    default=DEFAULT_SHAPE[1],
+    help=f"Columns of the board. Defaults to {DEFAULT_SHAPE[1]}.",
+)
+parser.add_argument(
+    '--workers',
+    type=int,
+    default=os.cpu_count() or 1,
+    help="Number of worker processes. Defaults to the number of cores.",
+)
+
+
+@dataclasses.dataclass
+class ServerStats:
+    """
+    Load of the server since it started. `players` counts the players in
+    rooms, not spectators or other connections.
+    """
+    rooms: int = 0
+    players: int = 0
+    matches: int = 0
+    moves: int = 0
+    late_moves: int = 0
+    total_lateness: float = 0.0
+    max_lateness: float = 0.0
+    max_room_misses: int = 0
+    max_batch: int = 0
+    spectators: int = 0
+    skipped_frames: int = 0
+    dropped_spectators: int = 0
+    cpu_seconds: float = 0.0
+    uptime_seconds: float = 0.0
+
+    def add_move(self, room: Room, lateness: float) -> None:
+        self.moves += 1
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        if lateness > LATE_MOVE_SECONDS:
+            self.late_moves += 1
+            room.deadline_misses += 1
+            self.max_room_misses = max(self.max_room_misses,
+                                       room.deadline_misses)
+
+    def to_json(self) -> str:
+        return json.dumps(dataclasses.asdict(self))
+
+
+class ShardTable:
+    """
+    Load of the workers of a sharded server in shared memory, written by
+    every worker and read by all of them to route new players. Rooms named
+    by players are pinned to a worker by a hash of the name. Other players
+    go to a worker with a player waiting for an opponent, so that they are
+    paired, or else to the worker with the fewest players.
+
+    Routing a player reserves its place on the worker until the player
+    joins there, so players routed at the same time count as waiting ones
+    and are sent to the same worker in pairs.
+    """
+
+    def __init__(self, worker_count: int) -> None:
+        self._lock = multiprocessing.Lock()
+        self.players = multiprocessing.Array("i", worker_count, lock=False)
+        self.waiting = multiprocessing.Array("b", worker_count, lock=False)
+        # Players routed to every worker that did not join yet
+        self.reserved = multiprocessing.Array("i", worker_count, lock=False)
+        self._reserved_until = multiprocessing.Array("d",
+                                                     worker_count,
+                                                     lock=False)
+
+    @property
+    def worker_count(self) -> int:
+        return len(self.players)
+
+    def worker_of_room(self, room_id: int) -> int:
+        return room_id % self.worker_count
+
+    def worker_of_name(self, name: str) -> int:
+        return zlib.crc32(name.encode()) % self.worker_count
+
+    def report(self,
+               worker: int,
+               players: int,
+               waiting: bool,
+               arrived: bool = False) -> None:
+        """
+        Args:
+            worker (int): Index of the reporting worker.
+            players (int): Players in the rooms of the worker.
+            waiting (bool): Whether a player of the worker waits for an
+                opponent in an unnamed room.
+            arrived (bool): Whether a player routed to the worker joined,
+                releasing its reservation.
+        """
+        with self._lock:
+            self.players[worker] = players
+            self.waiting[worker] = waiting
+            if arrived:
+                self._release(worker)
+
+    def release(self, worker: int) -> None:
+        """
+        Releases the reservation of a routed player that left without
+        joining.
+
+        Args:
+            worker (int): Index of the worker the player was routed to.
+        """
+        with self._lock:
+            self._release(worker)
+
+    def route(self, name: str | None) -> int:
+        """
+        Args:
+            name (str | None): Name of the room the player joins, None for
+                any room, which reserves a place on the worker.
+
+        Returns:
+            int: Index of the worker the player should join.
+        """
+        if name:
+            return self.worker_of_name(name)
+        with self._lock:
+            now = time.monotonic()
+            for worker in range(self.worker_count):
+                if self._reserved_until[worker] < now:
+                    self.reserved[worker] = 0
+            # A worker with an odd number of waiting and arriving players
+            # has one without an opponent
+            unpaired = [
+                worker for worker in range(self.worker_count)
+                if (self.waiting[worker] + self.reserved[worker]) % 2
+            ]
+            worker = unpaired[0] if unpaired else min(
+                range(self.worker_count),
+                key=lambda worker: self.players[worker] + self.reserved[
+                    worker])
+            self.reserved[worker] += 1
+            self._reserved_until[worker] = now + ROUTE_RESERVATION_SECONDS
+            return worker
+
+    def _release(self, worker: int) -> None:
+        self.reserved[worker] = max(self.reserved[worker] - 1, 0)
+
+
+class Room:
+    """
+    A room of two players, playing one match after another on an engine that
+    is reused for every match.
+    """
+
+    def __init__(self, room_id: int, name: str | None,
+                 shape: tuple[int, int]) -> None:
+        self.room_id = room_id
+        self.name = name
+        self.engine = engine.make_engine(shape, PLAYERS_PER_ROOM)
+        self.players: list[websockets.WebSocketServerProtocol | None] = [
+            None for _ in range(PLAYERS_PER_ROOM)
+        ]
+        self.keys: list[collections.deque[int]] = [
+            collections.deque(maxlen=turn_buffer.TURN_BUFFER_SIZE)
+            for _ in range(PLAYERS_PER_ROOM)
+        ]
+        # Time every spectator fell behind at, None if it is not behind
+        self.spectators: dict[websockets.WebSocketServerProtocol, float | None] = {}
+        self.is_scheduled = False
+        # No match is played until the room is full
+        self.is_over = True
+        self.deadline_misses = 0
+
+    def is_full(self) -> bool:
+        return all(player is not None for player in self.players)
+
+    def is_empty(self) -> bool:
+        return all(player is None for player in self.players)
+
+    def connections(self) -> list[websockets.WebSocketServerProtocol]:
+        return [player for player in self.players if player is not None]
+
+    def add_player(self, connection: websockets.WebSocketServerProtocol) -> int:
+        """
+        Args:
+            connection (websockets.WebSocketServerProtocol): The joining player.
+
+        Returns:
+            int: Index of the player and of its snake.
+
+        Raises:
+            ValueError: If the room is full.
+        """
+        for index, player in enumerate(self.players):
+            if player is None:
+                self.players[index] = connection
+                self.keys[index].clear()
+                return index
+        raise ValueError("Room is full")
+
+    def remove_player(self, connection: websockets.WebSocketServerProtocol) -> None:
+        for index, player in enumerate(self.players):
+            if player is connection:
+                self.players[index] = None
+
+    def reset(self, seed: int) -> bytes:
+        """
+        Starts a new match.
+
+        Args:
+            seed (int): Seed of the engine.
+
+        Returns:
+            bytes: The start message of the match.
+        """
+        self.engine.reset(seed)
+        self.is_over = False
+        for keys in self.keys:
+            keys.clear()
+        return match_protocol.encode_start(self.engine)
+
+    def step(self) -> bytes:
+        """
+        Moves both snakes with the oldest keys of their players. The match is
+        over once a snake died or there is no place for new food.
+
+        Returns:
+            bytes: The update message of the move.
+        """
+        lengths = [len(snake) for snake in self.engine.snakes]
+        movement_keys = [
+            keys.popleft() if keys else turn_buffer.NO_TURN
+            for keys in self.keys
+        ]
+        events = self.engine.step(movement_keys)
+        self.is_over = (engine.has_event(events, engine.EventTypes.DIED)
+                        or engine.has_event(events,
+                                            engine.EventTypes.BOARD_FULL))
+        moved = [False for _ in self.engine.snakes]
+        for event in events:
+            if event.event_type == engine.EventTypes.MOVED.value:
+                moved[event.snake] = True
+        dropped_tails = [
+            was_moved and len(snake) == length for was_moved, snake, length in
+            zip(moved, self.engine.snakes, lengths)
+        ]
+        return match_protocol.encode_update(self.engine, moved,
+                                            dropped_tails, self.is_over)
+
+
+class MatchServer:
+    """
+    Assigns players to rooms and runs the matches of all rooms.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, int] = DEFAULT_SHAPE,
+        port: int = DEFAULT_PORT,
+        worker: int = 0,
+        shard_table: ShardTable | None = None,
+    ) -> None:
+        self.shape = shape
+        self.port = port
+        self.worker = worker
+        self.shard_table = shard_table
+        self.rooms: dict[int, Room] = {}
+        self.stats = ServerStats()
+        self._waiting_rooms: dict[str | None, Room] = {}
+        # Room and player index of every player
+        self._seats: dict[websockets.WebSocketServerProtocol, tuple[Room, int]] = {}
+        # Routed players holding a reservation in the shard table
+        self._routed: set[websockets.WebSocketServerProtocol] = set()
+        # Room ids tell the worker of the room
+        self._room_ids = itertools.count(
+            worker, shard_table.worker_count if shard_table else 1)
+        self._rng = random.Random()
+        self._start_time = time.perf_counter()
+        self._wheel: timing_wheel.TimingWheel[Room] = (
+            timing_wheel.TimingWheel())
+        self._ticks_task: asyncio.Task[None] | None = None
+
+    async def handle(self, connection: websockets.WebSocketServerProtocol) -> None:
+        """
+        Serves a connection of a player until it is closed.
+
+        Args:
+            connection (websockets.WebSocketServerProtocol): The connection.
+        """
+        watched_room: Room | None = None
+        if self._is_reserved(connection):
+            self._routed.add(connection)
+        try:
+            async for message in connection:
+                seat = self._seats.get(connection)
+                if isinstance(message, bytes):
+                    if seat is not None and message:
+                        room, player_index = seat
+                        room.keys[player_index].append(
+                            match_protocol.decode_input(message))
+                elif message == match_protocol.STATS_REQUEST:
+                    await connection.send(self.current_stats().to_json())
+                elif (message.startswith(match_protocol.JOIN_REQUEST)
+                      and seat is None and watched_room is None):
+                    name = (message[len(match_protocol.JOIN_REQUEST):].strip()
+                            or _room_name(connection.path))
+                    await self._join(connection, name or None)
+                elif (message.startswith(match_protocol.WATCH_REQUEST)
+                      and seat is None and watched_room is None):
+                    room_id = _parse_room_id(
+                        message[len(match_protocol.WATCH_REQUEST):])
+                    if room_id is None:
+                        room_id = _watched_room_id(connection.path)
+                    watched_room = await self._watch(connection, room_id)
+        except websockets.exceptions.ConnectionClosedError:
+            pass
+        except ValueError as error:
+            # Tells the client why it was refused
+            await connection.close(frames.CloseCode.POLICY_VIOLATION,
+                                   str(error))
+        finally:
+            if connection in self._seats:
+                self._leave(connection)
+            if connection in self._routed:
+                self._routed.discard(connection)
+                if self.shard_table is not None:
+                    self.shard_table.release(self.worker)
+            if watched_room is not None:
+                watched_room.spectators.pop(connection, None)
+                self.stats.spectators -= 1
+            self._report_load()
+
+    async def route(
+        self,
+        path: str,
+        request_headers: datastructures.Headers,
+    ) -> tuple[http.HTTPStatus, dict[str, str], bytes] | None:
+        """
+        Redirects a connection accepted on the shared port to the port of
+        the worker it is routed to, unless that is this worker. The redirect
+        is marked with `ROUTED_QUERY`, so that the worker releases the
+        reservation of the player once it joins.
+
+        Args:
+            path (str): Path of the handshake request.
+            request_headers (datastructures.Headers): Its headers.
+
+        Returns:
+            tuple[http.HTTPStatus, dict[str, str], bytes] | None: The
+                redirect, None to accept the connection.
+        """
+        if self.shard_table is None:
+            return None
+        room_id = _watched_room_id(path)
+        if room_id is None:
+            worker = self.shard_table.route(_room_name(path))
+        else:
+            worker = self.shard_table.worker_of_room(room_id)
+        if worker == self.worker:
+            return None
+        host = request_headers.get("Host", "localhost").rsplit(":", 1)[0]
+        if _is_anonymous(path):
+            path += ("&" if urllib.parse.urlsplit(path).query else
+                     "?") + ROUTED_QUERY
+        location = f"ws://{host}:{self.worker_port(worker)}{path}"
+        return http.HTTPStatus.TEMPORARY_REDIRECT, {"Location": location}, b""
+
+    def worker_port(self, worker: int) -> int:
+        return self.port + 1 + worker
+
+    def current_stats(self) -> ServerStats:
+        self.stats.rooms = len(self.rooms)
+        self.stats.cpu_seconds = time.process_time()
+        self.stats.uptime_seconds = time.perf_counter() - self._start_time
+        return self.stats
+
+    def _is_reserved(self,
+                     connection: websockets.WebSocketServerProtocol) -> bool:
+        """
+        Args:
+            connection (websockets.WebSocketServerProtocol): A new
+                connection.
+
+        Returns:
+            bool: Whether `route` reserved a place for the connection, when
+                it kept the connection on the shared port or redirected it
+                to this worker.
+        """
+        if self.shard_table is None or not _is_anonymous(connection.path):
+            return False
+        return (connection.local_address[1] == self.port
+                or ROUTED_QUERY in _query(connection.path).split("&"))
+
+    async def _join(self, connection: websockets.WebSocketServerProtocol,
+                    name: str | None) -> None:
+        """
+        Seats a player in the room waiting under a name, or in a new room.
+
+        Args:
+            connection (websockets.WebSocketServerProtocol): The player.
+            name (str | None): Name of the room, None for any room.
+
+        Raises:
+            ValueError: If the named room is served by another worker.
+        """
+        if name is not None and self.shard_table is not None:
+            worker = self.shard_table.worker_of_name(name)
+            if worker != self.worker:
+                raise ValueError(
+                    WRONG_WORKER_MESSAGE.format(self.worker_port(worker)))
+        room = self._waiting_rooms.get(name)
+        if room is None:
+            room = Room(next(self._room_ids), name, self.shape)
+            self.rooms[room.room_id] = room
+            self._waiting_rooms[name] = room
+        await connection.send(self._seat(room, connection))
+
+    def _seat(self, room: Room,
+              connection: websockets.WebSocketServerProtocol) -> bytes:
+        """
+        Adds a player to a waiting room and starts the matches of the room
+        once it is full.
+
+        Args:
+            room (Room): The waiting room.
+            connection (websockets.WebSocketServerProtocol): The player.
+
+        Returns:
+            bytes: The assigned message for the player.
+        """
+        player_index = room.add_player(connection)
+        self._seats[connection] = (room, player_index)
+        self.stats.players += 1
+        if room.is_full():
+            del self._waiting_rooms[room.name]
+            # Spreads the moves of the rooms over the ticks of a move
+            self._schedule(
+                room, self._wheel.tick +
+                room.room_id % game_clock.TICK_PER_MOVE)
+        arrived = connection in self._routed
+        self._routed.discard(connection)
+        self._report_load(arrived)
+        return match_protocol.encode_assigned(room.room_id, player_index,
+                                              self.shape)
+
+    async def _watch(self, connection: websockets.WebSocketServerProtocol,
+                     room_id: int | None) -> Room:
+        """
+        Attaches a spectator to a room and sends it the current state of the
+        match of the room.
+
+        Args:
+            connection (websockets.WebSocketServerProtocol): The spectator.
+            room_id (int | None): Id of the watched room.
+
+        Returns:
+            Room: The watched room.
+
+        Raises:
+            ValueError: If there is no room with the id.
+        """
+        room = self.rooms.get(room_id) if room_id is not None else None
+        if room is None:
+            raise ValueError(f"No room {room_id}")
+        room.spectators[connection] = None
+        self.stats.spectators += 1
+        await connection.send(
+            match_protocol.encode_assigned(room.room_id,
+                                           match_protocol.SPECTATOR_INDEX,
+                                           self.shape))
+        if not room.is_over:
+            await connection.send(match_protocol.encode_start(room.engine))
+        return room
+
+    def _leave(self, connection: websockets.WebSocketServerProtocol) -> None:
+        room, _ = self._seats.pop(connection)
+        self.stats.players -= 1
+        room.remove_player(connection)
+        # The match is abandoned, the room stops once it is due
+        room.is_over = True
+        waiting_room = self._waiting_rooms.get(room.name)
+        if room.is_empty():
+            self.rooms.pop(room.room_id, None)
+            if waiting_room is room:
+                del self._waiting_rooms[room.name]
+        elif waiting_room is None:
+            # The player left behind waits for a new opponent
+            self._waiting_rooms[room.name] = room
+        else:
+            # The player left behind joins the player already waiting
+            self.rooms.pop(room.room_id, None)
+            for survivor in room.connections():
+                room.remove_player(survivor)
+                del self._seats[survivor]
+                self.stats.players -= 1
+                websockets.broadcast([survivor],
+                                     self._seat(waiting_room, survivor))
+
+    def _report_load(self, arrived: bool = False) -> None:
+        if self.shard_table is not None:
+            self.shard_table.report(self.worker, self.stats.players,
+                                    None in self._waiting_rooms, arrived)
+
+    def _schedule(self, room: Room, tick: int) -> None:
+        if room.is_scheduled:
+            return
+        room.is_scheduled = True
+        self._wheel.schedule(tick, room)
+        if self._ticks_task is None:
+            self._ticks_task = asyncio.create_task(self._run_ticks())
+
+    async def _run_ticks(self) -> None:
+        """
+        Advances the rooms due on every tick of the game clock. Ticks the
+        loop woke up too late for are advanced together. A room that fails
+        to advance is closed, the other rooms keep playing.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time() - self._wheel.tick * game_clock.TICK_PERIOD_SECONDS
+        while True:
+            deadline = start + self._wheel.tick * game_clock.TICK_PERIOD_SECONDS
+            await asyncio.sleep(deadline - loop.time())
+            now = loop.time()
+            current_tick = int((now - start) / game_clock.TICK_PERIOD_SECONDS)
+            due = self._wheel.advance(current_tick)
+            self.stats.max_batch = max(self.stats.max_batch, len(due))
+            for tick, room in due:
+                room.is_scheduled = False
+                lateness = now - (start +
+                                  tick * game_clock.TICK_PERIOD_SECONDS)
+                try:
+                    self._advance_room(room, tick, max(lateness, 0.0))
+                except Exception as error:
+                    self._close_room(room, error)
+
+    def _advance_room(self, room: Room, tick: int, lateness: float) -> None:
+        """
+        Starts a new match in a room or moves the snakes of its match, and
+        schedules the next time the room is due.
+
+        Args:
+            room (Room): The due room.
+            tick (int): The tick the room was due on.
+            lateness (float): Seconds the room is advanced after its tick.
+        """
+        if not room.is_full():
+            return
+        if room.is_over:
+            self.stats.matches += 1
+            message = room.reset(self._rng.getrandbits(32))
+            websockets.broadcast(room.connections(), message)
+            self._send_to_spectators(room, message, message)
+        else:
+            self.stats.add_move(room, lateness)
+            message = room.step()
+            websockets.broadcast(room.connections(), message)
+            self._send_to_spectators(room, message, None)
+        next_ticks = (ROOM_RESTART_TICKS
+                      if room.is_over else game_clock.TICK_PER_MOVE)
+        self._schedule(room, tick + next_ticks)
+
+    def _close_room(self, room: Room, error: Exception) -> None:
+        """
+        Removes a failed room and drops its players and spectators.
+
+        Args:
+            room (Room): The failed room.
+            error (Exception): The error it failed with.
+        """
+        print(ROOM_FAILED_MESSAGE.format(room.room_id, error),
+              file=sys.stderr,
+              flush=True)
+        room.is_over = True
+        self.rooms.pop(room.room_id, None)
+        if self._waiting_rooms.get(room.name) is room:
+            del self._waiting_rooms[room.name]
+        for connection in room.connections():
+            room.remove_player(connection)
+            del self._seats[connection]
+            self.stats.players -= 1
+            connection.transport.abort()
+        for spectator in room.spectators:
+            spectator.transport.abort()
+        self._report_load()
+
+    def _send_to_spectators(self, room: Room, message: bytes,
+                            start_message: bytes | None) -> None:
+        """
+        Sends a message to the spectators of a room that keep up, skips the
+        spectators that are behind and drops the ones that stay behind.
+        Spectators that drained after falling behind get the current state
+        instead, encoded once for all of them.
+
+        Args:
+            room (Room): The room.
+            message (bytes): The message for the spectators that keep up.
+            start_message (bytes | None): The message if it is a start
+                message, None if it is an update.
+        """
+        if not room.spectators:
+            return
+        now = time.perf_counter()
+        keeping_up: list[websockets.WebSocketServerProtocol] = []
+        catching_up: list[websockets.WebSocketServerProtocol] = []
+        for spectator, behind_since in list(room.spectators.items()):
+            if (spectator.transport.get_write_buffer_size()
+                    > SPECTATOR_BUFFER_LIMIT):
+                self.stats.skipped_frames += 1
+                if behind_since is None:
+                    room.spectators[spectator] = now
+                elif now - behind_since > SPECTATOR_DROP_SECONDS:
+                    del room.spectators[spectator]
+                    self.stats.dropped_spectators += 1
+                    spectator.transport.abort()
+            elif behind_since is None:
+                keeping_up.append(spectator)
+            else:
+                room.spectators[spectator] = None
+                catching_up.append(spectator)
+        websockets.broadcast(keeping_up, message)
+        if catching_up:
+            websockets.broadcast(
+                catching_up, start_message
+                or match_protocol.encode_start(room.engine))
+
+
+async def serve(
+    host: str,
+    port: int,
+    shape: tuple[int, int],
+    worker: int = 0,
+    shard_table: ShardTable | None = None,
+) -> None:
+    """
+    Runs a worker of the match server until it is cancelled.
+
+    Args:
+        host (str): Address to bind.
+        port (int): Port shared by all workers.
+        shape (tuple[int, int]): Rows and columns of the boards.
+        worker (int): Index of the worker.
+        shard_table (ShardTable | None): Load of all workers, None if the
+            server has one worker.
+    """
+    server = MatchServer(shape, port, worker, shard_table)
+    async with contextlib.AsyncExitStack() as servers:
+        await servers.enter_async_context(
+            websockets.serve(server.handle,
+                             host,
+                             port,
+                             process_request=server.route,
+                             reuse_port=shard_table is not None))
+        if shard_table is not None:
+            await servers.enter_async_context(
+                websockets.serve(server.handle, host,
+                                 server.worker_port(worker)))
+        print(SERVER_STARTED_MESSAGE.format(worker, host, port), flush=True)
+        await asyncio.get_running_loop().create_future()
+
+
+def run_workers(host: str, port: int, shape: tuple[int, int],
+                worker_count: int) -> None:
+    """
+    Runs one process per worker, all accepting connections on the same
+    port, until they exit.
+
+    Args:
+        host (str): Address to bind.
+        port (int): Port shared by all workers.
+        shape (tuple[int, int]): Rows and columns of the boards.
+        worker_count (int): Number of worker processes.
+
+    Raises:
+        ValueError: If the platform does not support `SO_REUSEPORT`.
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise ValueError(REUSE_PORT_UNSUPPORTED)
+    shard_table = ShardTable(worker_count)
+    workers = [
+        multiprocessing.Process(target=_run_worker,
+                                args=(host, port, shape, worker,
+                                      shard_table),
+                                daemon=True) for worker in range(worker_count)
+    ]
+    for process in workers:
+        process.start()
+    # Stops the workers when the supervisor is terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+    try:
+        for process in workers:
+            process.join()
+    finally:
+        for process in workers:
+            process.terminate()
+
+
+def _run_worker(host: str, port: int, shape: tuple[int, int], worker: int,
+                shard_table: ShardTable) -> None:
+    try:
+        asyncio.run(serve(host, port, shape, worker, shard_table))
+    except KeyboardInterrupt:
+        pass
+
+
+def _parse_room_id(text: str) -> int | None:
+    text = text.strip()
+    return int(text) if text.isdigit() else None
+
+
+def _watched_room_id(path: str) -> int | None:
+    path = urllib.parse.urlsplit(path).path
+    if not path.startswith(match_protocol.WATCH_PATH):
+        return None
+    return _parse_room_id(path[len(match_protocol.WATCH_PATH):])
+
+
+def _room_name(path: str) -> str | None:
+    path = urllib.parse.urlsplit(path).path
+    return urllib.parse.unquote(path.strip("/")) or None
+
+
+def _query(path: str) -> str:
+    return urllib.parse.urlsplit(path).query
+
+
+def _is_anonymous(path: str) -> bool:
+    return _watched_room_id(path) is None and _room_name(path) is None
+
+
+def main() -> None:
+    args = parser.parse_args()
+    shape = (args.rows, args.cols)
+    if args.workers > 1:
+        run_workers(args.host, args.port, shape, args.workers)
+    else:
+        asyncio.run(serve(args.host, args.port, shape))
+
+
+if __name__ == "__main__":
+    main()
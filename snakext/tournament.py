@@ -0,0 +1,356 @@
+"""
+Entry point of the bot tournament runner. It plays round-robin or Swiss
+tournaments between the bot policies of the `bots` module on the headless
+engine, with the two snakes placed as in the two player game. Matches are
+played in a process pool, every worker reuses one engine and its board
+buffers for all of its matches, and results are added to the leaderboard as
+soon as they arrive.
+"""
+from __future__ import annotations
+import argparse
+import concurrent.futures
+import dataclasses
+import itertools
+import os
+import random
+import time
+from snakext.game.logic import bots, engine
+
+ROUND_ROBIN_FORMAT = "round-robin"
+SWISS_FORMAT = "swiss"
+DEFAULT_SHAPE = (15, 30)
+DEFAULT_MAX_TICKS = 2000
+DEFAULT_GAMES_PER_PAIR = 10
+DEFAULT_SWISS_ROUNDS = 5
+DEFAULT_CHUNK_SIZE = 16
+DRAW = -1
+WIN_POINTS = 1.0
+DRAW_POINTS = 0.5
+
+parser = argparse.ArgumentParser(
+    description="""Tournament between snake bot policies. Every match is
+    played by two snakes on the same board, the snake that survives longer
+    wins.""")
+parser.add_argument(
+    '--format',
+    choices=(ROUND_ROBIN_FORMAT, SWISS_FORMAT),
+    default=ROUND_ROBIN_FORMAT,
+    help="Tournament format. Defaults to round-robin.",
+)
+parser.add_argument(
+    '--policies',
+    nargs="+",
+    choices=tuple(bots.POLICIES),
+    default=list(bots.POLICIES),
+    help="Policies taking part in the tournament. Defaults to all.",
+)
+parser.add_argument(
+    '--games',
+    type=int,
+    default=DEFAULT_GAMES_PER_PAIR,
+    help="Games played by every pairing, sides alternate between games.",
+)
+parser.add_argument(
+    '--rounds',
+    type=int,
+    default=DEFAULT_SWISS_ROUNDS,
+    help="Rounds of a Swiss tournament.",
+)
+parser.add_argument(
+    '--workers',
+    type=int,
+    default=os.cpu_count(),
+    help="Worker processes. Defaults to the number of cores.",
+)
+parser.add_argument(
+    '--max-ticks',
+    type=int,
+    default=DEFAULT_MAX_TICKS,
+    help="Ticks after which a match is decided by snake length.",
+)
+parser.add_argument(
+    '--chunk-size',
+    type=int,
+    default=DEFAULT_CHUNK_SIZE,
+    help="Matches sent to a worker at once.",
+)
+parser.add_argument('--seed', type=int, default=0)
+
+
+@dataclasses.dataclass
+class MatchTask:
+    policies: tuple[str, str]
+    seed: int
+
+
+@dataclasses.dataclass
+class MatchResult:
+    """
+    Outcome of a match. `winner` is the index of the winning snake or
+    `DRAW`.
+    """
+    policies: tuple[str, str]
+    winner: int
+    ticks: int
+    lengths: tuple[int, int]
+
+
+@dataclasses.dataclass
+class LeaderboardEntry:
+    policy: str
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+
+    @property
+    def points(self) -> float:
+        return self.wins * WIN_POINTS + self.draws * DRAW_POINTS
+
+
+class Leaderboard:
+    """
+    Aggregated results of the tournament, updated as match results arrive.
+    """
+
+    def __init__(self, policies: list[str]) -> None:
+        self.entries = {policy: LeaderboardEntry(policy) for policy in policies}
+        self.played_pairs: set[frozenset[str]] = set()
+        self.match_count = 0
+        self.total_ticks = 0
+
+    def add_result(self, result: MatchResult) -> None:
+        self.match_count += 1
+        self.total_ticks += result.ticks
+        self.played_pairs.add(frozenset(result.policies))
+        for index, policy in enumerate(result.policies):
+            entry = self.entries[policy]
+            entry.games += 1
+            if result.winner == DRAW:
+                entry.draws += 1
+            elif result.winner == index:
+                entry.wins += 1
+            else:
+                entry.losses += 1
+
+    def standings(self) -> list[LeaderboardEntry]:
+        return sorted(self.entries.values(),
+                      key=lambda entry: (-entry.points, entry.policy))
+
+    def format_table(self) -> str:
+        lines = [
+            f"{'#':>3} {'policy':<14} {'games':>7} {'wins':>7} "
+            f"{'draws':>7} {'losses':>7} {'points':>9}"
+        ]
+        for place, entry in enumerate(self.standings(), start=1):
+            lines.append(f"{place:>3} {entry.policy:<14} {entry.games:>7} "
+                         f"{entry.wins:>7} {entry.draws:>7} "
+                         f"{entry.losses:>7} {entry.points:>9.1f}")
+        return "\n".join(lines)
+
+
+_worker_engine: engine.SnakeEngine | None = None
+_worker_max_ticks = DEFAULT_MAX_TICKS
+
+
+def play_match(
+    engine_instance: engine.SnakeEngine,
+    task: MatchTask,
+    max_ticks: int,
+) -> MatchResult:
+    """
+    Plays a match on a two snake engine. The engine is reset first, so the
+    same engine can be used for many matches.
+
+    Args:
+        engine_instance (engine.SnakeEngine): The engine to play on.
+        task (MatchTask): Policies of the snakes and the seed of the match.
+        max_ticks (int): Ticks after which the longer snake wins.
+
+    Returns:
+        MatchResult: The outcome of the match.
+    """
+    engine_instance.reset(seed=task.seed)
+    rng = random.Random(task.seed)
+    policies = [bots.POLICIES[policy] for policy in task.policies]
+    while engine_instance.tick_count < max_ticks:
+        movement_keys = [
+            policy(engine_instance, index, rng)
+            for index, policy in enumerate(policies)
+        ]
+        events = engine_instance.step(movement_keys)
+        if not all(engine_instance.alive) or engine.has_event(
+                events, engine.EventTypes.BOARD_FULL):
+            break
+    lengths = (len(engine_instance.snakes[0]), len(engine_instance.snakes[1]))
+    return MatchResult(
+        policies=task.policies,
+        winner=_match_winner(engine_instance.alive, lengths),
+        ticks=engine_instance.tick_count,
+        lengths=lengths,
+    )
+
+
+def round_robin_tasks(policies: list[str], games: int,
+                      seed: int) -> list[MatchTask]:
+    """
+    Creates the matches of a round-robin tournament. Sides alternate between
+    the games of a pairing.
+
+    Args:
+        policies (list[str]): Names of the policies.
+        games (int): Games played by every pairing.
+        seed (int): Seed from which the match seeds are derived.
+
+    Returns:
+        list[MatchTask]: All matches of the tournament.
+    """
+    tasks: list[MatchTask] = []
+    for first, second in itertools.combinations(policies, 2):
+        for game in range(games):
+            pairing = (first, second) if game % 2 == 0 else (second, first)
+            tasks.append(MatchTask(pairing, seed + len(tasks)))
+    return tasks
+
+
+def swiss_round_tasks(leaderboard: Leaderboard, games: int,
+                      seed: int) -> list[MatchTask]:
+    """
+    Creates the matches of a Swiss round. Policies are paired by their
+    current points, avoiding pairings that were already played when
+    possible. With an odd number of policies the last one sits out.
+
+    Args:
+        leaderboard (Leaderboard): The current leaderboard.
+        games (int): Games played by every pairing.
+        seed (int): Seed from which the match seeds are derived.
+
+    Returns:
+        list[MatchTask]: The matches of the round.
+    """
+    unpaired = [entry.policy for entry in leaderboard.standings()]
+    pairings = []
+    while len(unpaired) > 1:
+        first = unpaired.pop(0)
+        opponent_index = next(
+            (index for index, policy in enumerate(unpaired)
+             if frozenset((first, policy)) not in leaderboard.played_pairs),
+            0,
+        )
+        pairings.append((first, unpaired.pop(opponent_index)))
+    return [
+        MatchTask(pairing if game % 2 == 0 else (pairing[1], pairing[0]),
+                  seed + index * games + game)
+        for index, pairing in enumerate(pairings) for game in range(games)
+    ]
+
+
+def run_tournament(
+    tournament_format: str,
+    policies: list[str],
+    games: int,
+    rounds: int,
+    workers: int,
+    max_ticks: int,
+    chunk_size: int,
+    seed: int,
+    shape: tuple[int, int] = DEFAULT_SHAPE,
+) -> Leaderboard:
+    """
+    Plays a tournament in a process pool.
+
+    Args:
+        tournament_format (str): `ROUND_ROBIN_FORMAT` or `SWISS_FORMAT`.
+        policies (list[str]): Names of the policies taking part.
+        games (int): Games played by every pairing.
+        rounds (int): Rounds of a Swiss tournament.
+        workers (int): Number of worker processes.
+        max_ticks (int): Ticks after which a match is decided by length.
+        chunk_size (int): Matches sent to a worker at once.
+        seed (int): Seed of the tournament.
+        shape (tuple[int, int]): Rows and columns of the board.
+
+    Returns:
+        Leaderboard: The final leaderboard.
+    """
+    leaderboard = Leaderboard(policies)
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shape, max_ticks),
+    ) as executor:
+        if tournament_format == ROUND_ROBIN_FORMAT:
+            _play_tasks(executor, round_robin_tasks(policies, games, seed),
+                        chunk_size, leaderboard)
+        else:
+            for round_number in range(rounds):
+                round_seed = seed + round_number * len(policies) * games
+                _play_tasks(executor,
+                            swiss_round_tasks(leaderboard, games, round_seed),
+                            chunk_size, leaderboard)
+    return leaderboard
+
+
+def main() -> None:
+    """
+    Parses the command-line arguments, plays the tournament and prints the
+    leaderboard.
+    """
+    args = parser.parse_args()
+    start_time = time.perf_counter()
+    leaderboard = run_tournament(
+        tournament_format=args.format,
+        policies=args.policies,
+        games=args.games,
+        rounds=args.rounds,
+        workers=args.workers,
+        max_ticks=args.max_ticks,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+    )
+    elapsed = time.perf_counter() - start_time
+    print(leaderboard.format_table())
+    print(f"{leaderboard.match_count} matches, {leaderboard.total_ticks} "
+          f"ticks in {elapsed:.1f} s "
+          f"({leaderboard.match_count / elapsed * 60:.0f} matches/min)")
+
+
+def _init_worker(shape: tuple[int, int], max_ticks: int) -> None:
+    global _worker_engine, _worker_max_ticks
+    _worker_engine = engine.make_engine(shape, snake_count=2)
+    _worker_max_ticks = max_ticks
+
+
+def _play_matches(tasks: list[MatchTask]) -> list[MatchResult]:
+    if _worker_engine is None:
+        raise ValueError("Worker engine is not initialized")
+    return [
+        play_match(_worker_engine, task, _worker_max_ticks) for task in tasks
+    ]
+
+
+def _play_tasks(
+    executor: concurrent.futures.ProcessPoolExecutor,
+    tasks: list[MatchTask],
+    chunk_size: int,
+    leaderboard: Leaderboard,
+) -> None:
+    futures = [
+        executor.submit(_play_matches, tasks[start:start + chunk_size])
+        for start in range(0, len(tasks), chunk_size)
+    ]
+    for future in concurrent.futures.as_completed(futures):
+        for result in future.result():
+            leaderboard.add_result(result)
+
+
+def _match_winner(alive: list[bool], lengths: tuple[int, int]) -> int:
+    if alive[0] != alive[1]:
+        return 0 if alive[0] else 1
+    if not alive[0] or lengths[0] == lengths[1]:
+        return DRAW
+    return 0 if lengths[0] > lengths[1] else 1
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import re
 NO_IP_WITH_LOCAL_PORT_MESSAGE = "Cannot use custom ports without specified ip address or socket."
 INVALID_IP_MESSAGE = "Provided socket is invalid"
 INVALID_PORT_MESSAGE = "Provided port is invalid"
+INVALID_FPS_MESSAGE = "Target FPS cannot be negative"
 
 PORT_REGEX = r'(?P<PORT>\d{1,5}$)'
 IP_V4_SOCKET_REGEX = r'^(?P<IP>((\d{1,3}\.){3}\d{1,3})|(localhost)):?(?P<PORT>\d{1,5}$)?'
@@ -28,6 +29,13 @@ REMOTE_SERVER_IP = None
 REMOTE_SERVER_PORT = None
 LOCALHOST_IPS = ("127.0.0.1", "localhost")
 REMOTE_LISTEN_IP = "0.0.0.0"
+RENDERER = "auto"
+TARGET_FPS = 60
+VSYNC = False
+SHOW_INPUT_LATENCY = False
+SHOW_SEND_STATS = False
+SYNC_MODE = "stream"
+WIRE_FORMAT = "binary"
 
 parser = argparse.ArgumentParser(
     description="""Snake game with both singleplayer and multiplayer. You need 
@@ -49,6 +57,55 @@ parser.add_argument(
     Defaults to 54321.""",
 )
 
+parser.add_argument(
+    '--renderer',
+    choices=("auto", "cells", "surfarray"),
+    default="auto",
+    help="""How the board is drawn. The surfarray renderer is faster for
+    very large boards, auto picks it by the number of cells.""",
+)
+
+parser.add_argument(
+    '--fps',
+    type=int,
+    default=TARGET_FPS,
+    help="Target frame rate, 0 for unlimited. Defaults to 60.",
+)
+parser.add_argument(
+    '--vsync',
+    action="store_true",
+    help="Synchronize the display updates with the monitor refresh rate.",
+)
+
+parser.add_argument(
+    '--input-latency',
+    action="store_true",
+    help="Print the latency from key presses to snake moves on exit.",
+)
+parser.add_argument(
+    '--send-stats',
+    action="store_true",
+    help="""Print how many streamed states were sent, merged or dropped
+    on exit.""",
+)
+
+parser.add_argument(
+    '--sync-mode',
+    choices=("stream", "poll", "lockstep"),
+    default=SYNC_MODE,
+    help="""How the state of the other player is received in multiplayer:
+    pushed by the other player on every move, polled 3 times a second, or
+    simulated from the movement keys of the other player in lockstep.
+    Defaults to stream.""",
+)
+parser.add_argument(
+    '--wire-format',
+    choices=("binary", "json"),
+    default=WIRE_FORMAT,
+    help="""Encoding of the state sent to the other player. Binary falls back
+    to JSON if the other player does not support it. Defaults to binary.""",
+)
+
 args: argparse.Namespace | None = None
 is_configuration_initialized = False
 
@@ -63,11 +120,20 @@ def parse_arguments() -> None:
         AttributeError: If the local server port or remote server socket is invalid.
     """
     global is_configuration_initialized
-    global REMOTE_SERVER_SOCKET, LOCAL_SERVER_PORT, REMOTE_SERVER_IP, REMOTE_SERVER_PORT, MULTIPLAYER, LOCAL_SERVER_IP
+    global REMOTE_SERVER_SOCKET, LOCAL_SERVER_PORT, REMOTE_SERVER_IP, REMOTE_SERVER_PORT, MULTIPLAYER, LOCAL_SERVER_IP, RENDERER, TARGET_FPS, VSYNC, SHOW_INPUT_LATENCY, SHOW_SEND_STATS, SYNC_MODE, WIRE_FORMAT
     if is_configuration_initialized:
         return
     args = parser.parse_args()
     REMOTE_SERVER_SOCKET = args.socket
+    RENDERER = args.renderer
+    if args.fps < 0:
+        raise AttributeError(INVALID_FPS_MESSAGE)
+    TARGET_FPS = args.fps
+    VSYNC = args.vsync
+    SHOW_INPUT_LATENCY = args.input_latency
+    SHOW_SEND_STATS = args.send_stats
+    SYNC_MODE = args.sync_mode
+    WIRE_FORMAT = args.wire_format
     LOCAL_SERVER_PORT = args.local_port if args.local_port else "0"
     if LOCAL_SERVER_PORT != "0" and REMOTE_SERVER_SOCKET == "":
         raise AttributeError(NO_IP_WITH_LOCAL_PORT_MESSAGE)
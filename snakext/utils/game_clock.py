@@ -4,22 +4,75 @@ using a pygame facade. It provides functionalities to handle the timing of
 game ticks and logic ticks, which are essential for consistent game updates 
 and logic processing. The module calculates the time difference between ticks 
 and determines if it's time to execute game logic based on predefined intervals.
+
+Frames are paced to a target frame rate: before every frame the clock sleeps
+until the frame is due instead of spinning through the game loop.
+
+Logic runs on a fixed timestep. Every frame adds the elapsed time of a
+monotonic high-resolution clock to an accumulator, and the game loop runs one
+logic tick for every full tick period in it, so the game speed does not
+depend on the frame rate. After a long stall only `MAX_CATCH_UP_TICKS` ticks
+are caught up and the rest of the time is dropped. The time left in the
+accumulator gives the renderer an interpolation alpha between two moves.
 """
+import time
 from types import ModuleType
 
 TICKS_PER_SECOND = 30
 TICK_PERIOD_SECONDS = 1 / TICKS_PER_SECOND
 TICK_PER_MOVE = 5
+MAX_CATCH_UP_TICKS = 5
+DEFAULT_TARGET_FPS = 60
+# Sleeping is only accurate to about a millisecond, the rest is spun
+SPIN_SECONDS = 0.001
 
-_game_tick_time = 0
+_previous_tick_time: float | None = None
+_accumulator = 0.0
 _logic_ticks = 0
+_target_fps = DEFAULT_TARGET_FPS
+_last_frame_time = 0.0
+
+
+def set_target_fps(target_fps: int) -> None:
+    """
+    Sets the frame rate the game loop is paced to.
+
+    Args:
+        target_fps (int): Frames per second, 0 disables frame pacing.
+
+    Raises:
+        ValueError: If the frame rate is negative.
+    """
+    global _target_fps
+    if target_fps < 0:
+        raise ValueError("Target FPS cannot be negative")
+    _target_fps = target_fps
+
+
+def wait_for_next_frame() -> float:
+    """
+    Sleeps until the next frame is due. Logic ticks do not need a wake-up of
+    their own, the accumulator catches up with them on the next frame. Does
+    not wait if frame pacing is disabled.
+
+    Returns:
+        float: The time slept in seconds.
+    """
+    global _last_frame_time
+    start_time = time.perf_counter()
+    if _target_fps > 0:
+        _sleep_until(_last_frame_time + 1 / _target_fps)
+    _last_frame_time = time.perf_counter()
+    return _last_frame_time - start_time
 
 
 def tick(pygame_facade: ModuleType) -> float:
     """
-    Updates the game tick time and returns the time difference since the last tick.
+    Waits for the next frame, adds the time since the last tick to the
+    accumulator and returns it.
 
-    This function is called to update the game's tick count based on the predefined tick period. It calculates the time difference since the last tick and updates the global game tick time.
+    The accumulator is capped at `MAX_CATCH_UP_TICKS` tick periods, so a long
+    stall does not make the game run many moves at once.
 
     Args:
         pygame_facade (ModuleType): The Pygame facade module for accessing tick-related functions.
@@ -27,20 +80,23 @@ def tick(pygame_facade: ModuleType) -> float:
     Returns:
         float: The time difference in seconds since the last game tick.
     """
-    global _game_tick_time
+    global _previous_tick_time, _accumulator
+    wait_for_next_frame()
     pygame_facade.tick()
-    current_time = pygame_facade.get_ticks_seconds()
-    time_difference = current_time - _game_tick_time
-    if time_difference >= TICK_PERIOD_SECONDS:
-        _game_tick_time = current_time
+    current_time = time.perf_counter()
+    time_difference = (0.0 if _previous_tick_time is None else current_time -
+                       _previous_tick_time)
+    _previous_tick_time = current_time
+    _accumulator = min(_accumulator + time_difference,
+                       MAX_CATCH_UP_TICKS * TICK_PERIOD_SECONDS)
     return time_difference
 
 
 def is_logic_tick(pygame_facade: ModuleType) -> bool:
     """
-    Determines whether the current time is appropriate for a logic tick.
+    Determines whether a logic tick is due.
 
-    This function checks if the time since the last game tick has reached or exceeded the predefined tick period, indicating that it's time for a logic tick.
+    A logic tick is due while the accumulator holds at least one tick period, so it should be checked in a loop that calls `logic_tick` for every tick.
 
     Args:
         pygame_facade (ModuleType): The Pygame facade module for accessing tick-related functions.
@@ -48,25 +104,35 @@ def is_logic_tick(pygame_facade: ModuleType) -> bool:
     Returns:
         bool: True if it's time for a logic tick, False otherwise.
     """
-    global _game_tick_time
-    time_since_last_game_tick = pygame_facade.get_ticks_seconds(
-    ) - _game_tick_time
-
-    is_tick = time_since_last_game_tick >= TICK_PERIOD_SECONDS
-    return is_tick
+    return _accumulator >= TICK_PERIOD_SECONDS
 
 
 def logic_tick(pygame_facade: ModuleType) -> None:
     """
     Increments the logic tick count.
 
-    This function should be called to signify that a logic tick has occurred, incrementing the internal logic tick counter.
+    This function should be called to signify that a logic tick has occurred, incrementing the internal logic tick counter and consuming one tick period of the accumulator.
 
     Args:
         pygame_facade (ModuleType): The Pygame facade module for accessing tick-related functions.
     """
-    global _logic_ticks
+    global _logic_ticks, _accumulator
     _logic_ticks += 1
+    _accumulator -= TICK_PERIOD_SECONDS
+
+
+def interpolation_alpha() -> float:
+    """
+    Returns how far the game is between the last move and the next one, for
+    rendering the snake between cells.
+
+    Returns:
+        float: 0.0 right after a move, 1.0 when the next move is due.
+    """
+    ticks_since_move = (_logic_ticks - 1) % TICK_PER_MOVE
+    alpha = (ticks_since_move * TICK_PERIOD_SECONDS +
+             _accumulator) / (TICK_PER_MOVE * TICK_PERIOD_SECONDS)
+    return min(max(alpha, 0.0), 1.0)
 
 
 def moves() -> bool:
@@ -80,3 +146,18 @@ def moves() -> bool:
     """
     global _logic_ticks
     return _logic_ticks % TICK_PER_MOVE == 0
+
+
+def _sleep_until(deadline: float) -> None:
+    """
+    Sleeps until the `time.perf_counter` deadline, spinning for the last
+    `SPIN_SECONDS` to wake up precisely.
+
+    Args:
+        deadline (float): The time to wake up at.
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_SECONDS:
+        time.sleep(remaining - SPIN_SECONDS)
+    while time.perf_counter() < deadline:
+        time.sleep(0)
@@ -5,12 +5,16 @@ matrices, and selecting positions based on various criteria. These utilities
 are designed to manipulate and interact with game state arrays, facilitating 
 key game mechanics such as random element placement and coordinate calculations.
 """
+import numpy as np
 import numpy.typing as npt
 from typing import Any
 import math
 from snakext.game.state import state_types
 import random
 
+# Used when no seeded random number generator is passed
+DEFAULT_RNG = random.Random()
+
 
 def matrix_substring_element_coordinates(
         substring: Any, haystack: npt.NDArray[Any]) -> tuple[int, int]:
@@ -74,50 +78,56 @@ def matrix_position_of_index(idx: int, cols: int) -> tuple[int, int]:
 
 
 def choose_random_element(
-        matrix: state_types.OBJECT_ND_ARRAY) -> tuple[int, int]:
+    matrix: state_types.OBJECT_ND_ARRAY,
+    rng: random.Random = DEFAULT_RNG,
+) -> tuple[int, int]:
     """
     Selects a random element's position from a matrix.
 
     Args:
         matrix (state_types.OBJECT_ND_ARRAY): The matrix to choose from.
+        rng (random.Random): The random number generator to use.
 
     Returns:
         tuple[int, int]: The coordinates of the randomly selected element.
     """
     row_count, col_count = matrix.shape
-    random_row = random.randrange(0, row_count - 1, 1)
-    random_col = random.randrange(0, col_count - 1, 1)
+    random_row = rng.randrange(0, row_count - 1, 1)
+    random_col = rng.randrange(0, col_count - 1, 1)
     return random_row, random_col
 
 
 def choose_random_match(
-        match_: str, matrix: state_types.OBJECT_ND_ARRAY) -> tuple[int, int]:
+    match_: Any,
+    matrix: npt.NDArray[Any],
+    rng: random.Random = DEFAULT_RNG,
+) -> tuple[int, int]:
     """
     Chooses a random position in the matrix where the element matches the specified value.
 
     Args:
-        match_ (str): The value to match in the matrix.
-        matrix (state_types.OBJECT_ND_ARRAY): The matrix to search.
+        match_ (Any): The value to match in the matrix.
+        matrix (npt.NDArray[Any]): The matrix to search.
+        rng (random.Random): The random number generator to use.
 
     Returns:
-        tuple[int, int]: The coordinates of a randomly chosen element matching the specified value.
+        tuple[int, int]: The coordinates of a randomly chosen element matching
+            the specified value, or (-1, -1) if there is no such element.
     """
-    available_coords = []
-    for i, row in enumerate(matrix):
-        for k, place in enumerate(row):
-            if place == match_:
-                available_coords.append((i, k))
-    chosen_coordinates = random.choice(available_coords)
-    return chosen_coordinates
+    available_coords = np.argwhere(matrix == match_)
+    if len(available_coords) == 0:
+        return (-1, -1)
+    i, k = rng.choice(available_coords)
+    return (int(i), int(k))
 
 
 def middle_left_element_position(
-        matrix: state_types.OBJECT_ND_ARRAY) -> tuple[int, int]:
+        matrix: npt.NDArray[Any]) -> tuple[int, int]:
     """
     Calculates the position in the middle-left part of the matrix.
 
     Args:
-        matrix (state_types.OBJECT_ND_ARRAY): The matrix to calculate the position for.
+        matrix (npt.NDArray[Any]): The matrix to calculate the position for.
 
     Returns:
         tuple[int, int]: The middle-left position in the matrix.
@@ -128,12 +138,12 @@ def middle_left_element_position(
 
 
 def middle_right_element_position(
-        matrix: state_types.OBJECT_ND_ARRAY) -> tuple[int, int]:
+        matrix: npt.NDArray[Any]) -> tuple[int, int]:
     """
     Calculates the position in the middle-right part of the matrix.
 
     Args:
-        matrix (state_types.OBJECT_ND_ARRAY): The matrix to calculate the position for.
+        matrix (npt.NDArray[Any]): The matrix to calculate the position for.
 
     Returns:
         tuple[int, int]: The middle-right position in the matrix.
@@ -0,0 +1,68 @@
+"""
+A hashed timing wheel of items due on integer ticks. Every slot holds the
+items due on the ticks that map to it, so scheduling an item and taking the
+items of a tick do not depend on the number of scheduled items. An item due
+more than one turn of the wheel ahead waits in its slot until its own tick.
+
+Items are not cancelled: the owner of an item checks whether it is still
+wanted when it becomes due.
+"""
+from __future__ import annotations
+from typing import Generic, TypeVar
+
+DEFAULT_SLOT_COUNT = 64
+
+T = TypeVar("T")
+
+
+class TimingWheel(Generic[T]):
+    """
+    Items scheduled on ticks, taken in batches by advancing the wheel.
+    """
+
+    def __init__(self, slot_count: int = DEFAULT_SLOT_COUNT) -> None:
+        self._slots: list[list[tuple[int, T]]] = [[]
+                                                   for _ in range(slot_count)]
+        self.tick = 0
+        self.size = 0
+
+    def schedule(self, tick: int, item: T) -> None:
+        """
+        Schedules an item. An item due on a past tick is due on the next
+        advanced tick.
+
+        Args:
+            tick (int): The tick the item is due on.
+            item (T): The item.
+        """
+        tick = max(tick, self.tick)
+        self._slots[tick % len(self._slots)].append((tick, item))
+        self.size += 1
+
+    def advance(self, tick: int) -> list[tuple[int, T]]:
+        """
+        Takes the items due up to a tick, which is the next tick to advance
+        after.
+
+        Args:
+            tick (int): The last tick to take the items of.
+
+        Returns:
+            list[tuple[int, T]]: The due items with the ticks they were due
+                on, in the order of their ticks.
+        """
+        due: list[tuple[int, T]] = []
+        # A full turn visits every slot, further ticks have no items
+        last_tick = min(tick, self.tick + len(self._slots) - 1)
+        while self.tick <= last_tick:
+            index = self.tick % len(self._slots)
+            slot = self._slots[index]
+            if slot:
+                waiting = [entry for entry in slot if entry[0] > tick]
+                due.extend(entry for entry in slot if entry[0] <= tick)
+                self._slots[index] = waiting
+            self.tick += 1
+        self.tick = max(self.tick, tick + 1)
+        self.size -= len(due)
+        due.sort(key=lambda entry: entry[0])
+        return due